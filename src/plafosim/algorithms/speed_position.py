@@ -18,12 +18,16 @@
 #
 
 import argparse
+import heapq
 import logging
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from distutils.util import strtobool
 from timeit import default_timer as timer
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from ..formation_algorithm import FormationAlgorithm
 from ..platoon_role import PlatoonRole
 
@@ -40,6 +44,8 @@ DEFAULTS = {
     'position_deviation_threshold': 1000,  # m
     'formation_centralized_kind': 'greedy',
     'solver_time_limit': 60,  # s
+    'solver_workers': 1,
+    'solver_decomposition': True,
     'record_solver_traces': False,
     'record_infrastructure_assignments': False,
 }
@@ -153,6 +159,219 @@ def initialize_infrastructure_assignments(basename: str):
         )
 
 
+def get_components(vids: np.ndarray, lids: np.ndarray) -> np.ndarray:
+    """
+    Return the connected components of the graph of assignment candidates.
+
+    The vehicles are the nodes and every candidate connects a searching vehicle with a leader.
+    Candidates of different components do not share any constraint of the assignment problem.
+
+    Parameters
+    ----------
+    vids : np.ndarray
+        The ids of the searching vehicles of all candidates
+    lids : np.ndarray
+        The ids of the leaders of all candidates
+
+    Returns
+    -------
+    np.ndarray
+        The component of every candidate, numbered in order of the first candidate of a component
+    """
+
+    nodes, inverse = np.unique(np.concatenate([vids, lids]), return_inverse=True)
+    parents = list(range(len(nodes)))
+
+    def find(node: int) -> int:
+        """
+        Return the root of a node and compress its path.
+
+        Parameters
+        ----------
+        node : int
+            The node to find the root for
+        """
+
+        root = node
+        while parents[root] != root:
+            root = parents[root]
+        while parents[node] != root:
+            parents[node], node = root, parents[node]
+        return root
+
+    # union-find
+    for vehicle, leader in zip(inverse[:len(vids)].tolist(), inverse[len(vids):].tolist()):
+        vehicle_root = find(vehicle)
+        leader_root = find(leader)
+        if vehicle_root != leader_root:
+            parents[max(vehicle_root, leader_root)] = min(vehicle_root, leader_root)
+
+    roots = np.array([find(node) for node in inverse[:len(vids)].tolist()], dtype=int)
+    # number components in order of their first candidate
+    _, first, components = np.unique(roots, return_index=True, return_inverse=True)
+    return np.argsort(np.argsort(first))[components]
+
+
+def solve_assignment_problem(
+    name: str,
+    vids: list,
+    pids: list,
+    lids: list,
+    costs: list,
+    time_limit: int,
+    debug: bool = False,
+) -> dict:
+    """
+    Build and solve the assignment problem for the given candidates.
+
+    This does not use any simulation state and can thus be executed in a separate process.
+
+    Parameters
+    ----------
+    name : str
+        The name of the solver
+    vids : list
+        The ids of the searching vehicles of all candidates, grouped by searching vehicle
+    pids : list
+        The ids of the platoons of all candidates
+    lids : list
+        The ids of the leaders of all candidates
+    costs : list
+        The costs of all candidates
+    time_limit : int
+        The time limit in s to apply to the solver
+    debug : bool, optional
+        Whether to print the cost and assignment matrices as well as the solver output
+
+    Returns
+    -------
+    dict
+        The result of the solver
+        keys: [result_status, variables, constraints, run_time, solution_value, best_bound, assignments]
+        The assignments are the indices of the selected candidates.
+    """
+
+    from ortools.linear_solver import pywraplp
+    solver = pywraplp.Solver(name, pywraplp.Solver.SCIP_MIXED_INTEGER_PROGRAMMING)
+    solver.SetNumThreads(1)
+    if time_limit > 0:
+        # influences the quality of the solution
+        solver.set_time_limit(time_limit * 1000)  # s --> ms
+
+    objective = solver.Objective()
+    objective.SetMinimization()
+
+    # the variables are created in the order of the candidates
+    variables = []
+    # the variables of all candidates (except self-assignments), indexed by the searching vehicle and the leader
+    variables_by_vid = {}
+    variables_by_lid = {}
+
+    # select all searching vehicles
+    for candidate, vid in enumerate(vids):
+        lid = lids[candidate]
+        if candidate == 0 or vids[candidate - 1] != vid:
+            # allow a vehicle to be assigned to exactly one platoon
+            constraint_one_target_platoon = solver.RowConstraint(1, 1, f"only one platoon for {vid}")
+
+        # all applicable platoons or platoon candidates (including the own platoon)
+        # define (0,1) decision variable for assignment of vehicle to platoon
+        variable = solver.IntVar(0, 1, f"{vid} -> {pids[candidate]} ({lid})")
+        variables.append(variable)
+        if vid != lid:
+            # not a self-assignment
+            variables_by_vid.setdefault(vid, []).append(variable)
+            variables_by_lid.setdefault(lid, []).append(variable)
+
+        # add decision variable from vehicle to platoon to row sum
+        constraint_one_target_platoon.SetCoefficient(variable, 1)
+
+        # add decision variable from vehicle to platoon with corresponding cost to the row sum
+        objective.SetCoefficient(variable, costs[candidate])
+
+    # print cost matrix
+    if debug:
+        # the candidate of every pair of vehicle and leader
+        matrix = {(vid, lid): candidate for candidate, (vid, lid) in enumerate(zip(vids, lids))}
+        all_vids = set(vids)
+        all_lids = set(lids)
+        print(' ', end=' ')
+        for lid in all_lids:
+            print(lid, ' ', end=' ')
+        print('(lid)')
+        for vid in all_vids:
+            print(vid, end=' ')
+            for lid in all_lids:
+                if (vid, lid) in matrix:
+                    print(round(costs[matrix[(vid, lid)]], 1), end=' ')
+                else:
+                    print(' - ', end=' ')
+            print()
+        print('(vid)')
+
+    # add more platoon constraints
+    # NOTE: We need to take the leader here, since the platoon id does not necessarily match the leader id (e.g., when the leader left already)
+    # Also, we want to compare the vehicle id to the leader id to make sure that only one assignment is done for this vehicle
+
+    # get all platoons
+    for lid in set(lids):
+        # create constraint for this platoon
+        # assign only one (other) vehicle to this leader
+        constraint_one_member_per_platoon = solver.RowConstraint(0, 1, f"one other member for leader {lid}")
+        # assign a vehicle only if no other vehicles has been assigned to this vehicle
+        constraint_one_assignment_per_vehicle = solver.RowConstraint(0, 1, f"one assignment per vehicle {lid}")
+        # get all variables that assign a vehicle to this vehicle (as leader)
+        for variable in variables_by_lid.get(lid, []):
+            constraint_one_member_per_platoon.SetCoefficient(variable, 1)
+            constraint_one_assignment_per_vehicle.SetCoefficient(variable, 1)
+
+        # get all variables that assign this vehicle to someone else (as leader)
+        for variable in variables_by_vid.get(lid, []):
+            constraint_one_assignment_per_vehicle.SetCoefficient(variable, 1)
+
+    # solver debug output
+    if debug:
+        solver.EnableOutput()
+
+    start_time = timer()
+    result_status = solver.Solve()
+    end_time = timer()
+
+    result = {
+        'result_status': result_status,  # this is a simple int
+        'variables': solver.NumVariables(),
+        'constraints': solver.NumConstraints(),
+        'run_time': end_time - start_time,
+        'solution_value': 0.0,
+        'best_bound': 0.0,
+        'assignments': [],
+    }
+    if result_status >= solver.INFEASIBLE:  # 2
+        return result
+    result['solution_value'] = objective.Value()
+    result['best_bound'] = objective.BestBound()
+
+    # print assingment matrix
+    if debug:
+        print(' ', end=' ')
+        for lid in all_lids:
+            print(lid, '', end=' ')
+        print('(lid)')
+        for vid in all_vids:
+            print(vid, end=' ')
+            for lid in all_lids:
+                if (vid, lid) in matrix:
+                    print(int(variables[matrix[(vid, lid)]].solution_value()), '', end=' ')
+                else:
+                    print('- ', end=' ')
+            print()
+        print('(vid)')
+
+    # the variables are created in the order of the candidates
+    result['assignments'] = [candidate for candidate, variable in enumerate(variables) if variable.solution_value() > 0]
+    return result
+
+
 class SpeedPosition(FormationAlgorithm):
     """
     Platoon Formation Algorithm based on Similarity, considering Speed and Position.
@@ -180,6 +399,8 @@ class SpeedPosition(FormationAlgorithm):
         position_deviation_threshold: int = DEFAULTS['position_deviation_threshold'],
         formation_centralized_kind: str = DEFAULTS['formation_centralized_kind'],
         solver_time_limit: int = DEFAULTS['solver_time_limit'],
+        solver_workers: int = DEFAULTS['solver_workers'],
+        solver_decomposition: bool = DEFAULTS['solver_decomposition'],
         record_solver_traces: bool = DEFAULTS['record_solver_traces'],
         record_infrastructure_assignments: bool = DEFAULTS['record_infrastructure_assignments'],
         **kw_args,
@@ -202,6 +423,10 @@ class SpeedPosition(FormationAlgorithm):
             TODO
         solver_time_limit : int
             The time limit in s to apply to the solver
+        solver_workers : int
+            The number of processes for solving independent assignment problems in parallel
+        solver_decomposition : bool
+            Whether to solve the assignment problem separately for independent clusters of vehicles
         record_solver_traces : bool
             Whether to record continuous solver traces
         record_infrastructure_assignments : bool
@@ -234,6 +459,11 @@ class SpeedPosition(FormationAlgorithm):
             elif solver_time_limit < 2:
                 LOG.warning("The time limit for the solver should be at least 2s! Otherwise it may not be possible for the solver to produce a solution (especially with many vehicles)!")
         self._solver_time_limit = solver_time_limit  # the time limit for the optimal solver per assignment problem
+        if solver_workers < 1:
+            sys.exit(f"ERROR [{__name__}]: The number of solver workers needs to be at least 1!")
+        self._solver_workers = solver_workers  # the number of processes for solving independent assignment problems
+        self._solver_pool = None  # the pool of processes for solving independent assignment problems, created on first use
+        self._solver_decomposition = solver_decomposition  # whether to solve independent assignment problems separately
         self._record_solver_traces = record_solver_traces  # whether to record continuous solver traces
         self._record_infrastructure_assignments = record_infrastructure_assignments  # whether to record infrastructure assignments
 
@@ -257,6 +487,15 @@ class SpeedPosition(FormationAlgorithm):
                 # create output file for infrastructure assignments
                 initialize_infrastructure_assignments(basename=self._owner._simulator._result_base_filename)
 
+    def __getstate__(self) -> dict:
+        """
+        Return the state for pickling (e.g., for a snapshot), which does not contain the pool of solver processes.
+        """
+
+        state = self.__dict__.copy()
+        state['_solver_pool'] = None
+        return state
+
     @classmethod
     def add_parser_argument_group(self, parser: argparse.ArgumentParser) -> argparse._ArgumentGroup:
         """
@@ -305,6 +544,19 @@ class SpeedPosition(FormationAlgorithm):
             default=int(DEFAULTS['solver_time_limit']),
             help="The time limit for the optimal solver per assignment problem in s. Influences the quality of the solution. A value below 1 disables the limit.",
         )
+        group.add_argument(
+            "--solver-workers",
+            type=int,
+            default=DEFAULTS['solver_workers'],
+            help="The number of processes for solving independent assignment problems (i.e., clusters of vehicles) of the optimal solver in parallel",
+        )
+        group.add_argument(
+            "--solver-decomposition",
+            type=lambda x: bool(strtobool(x)),
+            default=DEFAULTS['solver_decomposition'],
+            choices=(True, False),
+            help="Whether to solve the assignment problem of the optimal solver separately for independent clusters of vehicles. The separate problems may resolve ties between equally good assignments differently than a single problem for all vehicles. Disable to reproduce results of versions without this option",
+        )
         group.add_argument(
             "--record-solver-traces",
             type=lambda x: bool(strtobool(x)),
@@ -452,6 +704,10 @@ class SpeedPosition(FormationAlgorithm):
         This includes mostly statistic recording.
         """
 
+        if self._solver_pool is not None:
+            self._solver_pool.shutdown()
+            self._solver_pool = None
+
         # write statistics
         if not self._owner._simulator._record_platoon_formation:
             return
@@ -539,126 +795,210 @@ class SpeedPosition(FormationAlgorithm):
         # perform a join maneuver with the candidate's platoon
         self._owner._join(best['pid'], best['lid'])
 
-    def _do_formation_centralized(self):
+    def _get_formation_vehicles(self) -> tuple:
         """
-        Run centralized greedy formation approach.
+        Return the vehicles considered by the centralized formation approaches.
 
-        This selects candidates and triggers join maneuvers.
+        The filters are applied to all vehicles at once by using the neighbor index of the simulator.
+        The formation iterations and the filter statistics of the searching vehicles are updated in bulk.
+
+        Returns
+        -------
+        list(PlatooningVehicle) : The searching vehicles (i.e., individual vehicles that are not in a maneuver)
+        list(PlatooningVehicle) : The vehicles available as (new) platoon leaders
         """
 
-        all_found_candidates = []
+        simulator = self._owner._simulator
+        index = simulator._get_neighbor_index()
+        columns = simulator._vehicle_state.columns
+
+        # filter vehicles that are technically not able to do platooning (i.e., not within the index)
+        slots = index.all_slots()
+        vehicles = [simulator._vehicles[vid] for vid in columns["vid"][slots].tolist()]
+
+        # filter vehicles which are not available to become a new leader
+        # we only have this information due to oracle knowledge in the centralized version
+        # we use this to replace management of neighbors and their advertisements
+        available = index.available(slots)
+        # filter vehicles which are already in a maneuver
+        # we only have this information due to oracle knowledge in the centralized version
+        in_maneuver = index.in_maneuver(slots)
+        # filter vehicles which are already in a platoon
+        searching = (columns["platoon_role"][slots] == PlatoonRole.NONE.value) & ~in_maneuver
+
+        # the filtered vehicles are the same for all searching vehicles
+        searching_slots = slots[searching]
+        filtered_follower = np.count_nonzero(~available)
+        filtered_maneuver = np.count_nonzero(available & in_maneuver)
+        columns["formation_iterations"][searching_slots] += 1
+        columns["candidates_filtered"][searching_slots] += filtered_follower + filtered_maneuver
+        columns["candidates_filtered_follower"][searching_slots] += filtered_follower
+        columns["candidates_filtered_maneuver"][searching_slots] += filtered_maneuver
+
+        return (
+            [vehicle for vehicle, selected in zip(vehicles, searching.tolist()) if selected],
+            [vehicle for vehicle, selected in zip(vehicles, (available & ~in_maneuver).tolist()) if selected],
+        )
 
-        from ..platooning_vehicle import PlatooningVehicle  # noqa 811
+    def _find_candidates(self, searching_vehicles: list, available_vehicles: list, self_cost: float = None) -> dict:
+        """
+        Return the applicable candidates of all searching vehicles at once.
 
-        # select all searching vehicles
-        for vehicle in self._owner._simulator._vehicles.values():
-            # filter vehicles that are technically not able to do platooning
-            if not isinstance(vehicle, PlatooningVehicle):
-                LOG.trace(f"{vehicle.vid} is not capable of platooning")
-                continue
-            # filter vehicles which are already in a platoon
-            if vehicle.platoon_role != PlatoonRole.NONE:
-                LOG.trace(f"{vehicle.vid} is already in a platoon")
-                continue
-            # filter vehicles which are already in a maneuver
-            if vehicle.in_maneuver:
-                LOG.trace(f"{vehicle.vid} is already in a maneuver")
-                continue
+        This is equivalent to applying ds, dp, the thresholds, and cost_speed_position to every pair of a searching vehicle and an available platoon.
+        Only platoons in front of a vehicle and within the position deviation threshold are considered (spatial pruning).
+        The candidate statistics of the searching vehicles are updated in bulk.
 
-            vehicle._formation_iterations += 1
-
-            # get all available platoons or platoon candidates
-            for other_vehicle in self._owner._simulator._vehicles.values():
-                # filter same car because we assume driving alone is worse than to do platooning
-                if other_vehicle is vehicle:
-                    continue
-                # filter vehicles that are technically not able to do platooning
-                if not isinstance(other_vehicle, PlatooningVehicle):
-                    LOG.trace(f"{other_vehicle.vid} is not capable of platooning")
-                    continue
-
-                # here, the logic similar to the distributed approach begins
-
-                # filter vehicles which are not available to become a new leader
-                # we only have this information due to oracle knowledge in the centralized version
-                # we use this to replace management of neighbors and their advertisements
-                if other_vehicle.platoon_role != PlatoonRole.NONE and other_vehicle.platoon_role != PlatoonRole.LEADER:
-                    # we can only join an existing platoon or built a new one
-                    LOG.trace(f"{other_vehicle.vid} is not available")
-                    vehicle._candidates_filtered += 1
-                    vehicle._candidates_filtered_follower += 1
-                    continue
-
-                # filter vehicles which are already in a maneuver
-                # we only have this information due to oracle knowledge in the centralized version
-                if other_vehicle.in_maneuver:
-                    LOG.trace(f"{other_vehicle.vid} is already in a maneuver")
-                    vehicle._candidates_filtered += 1
-                    vehicle._candidates_filtered_maneuver += 1
-                    continue
-
-                platoon = other_vehicle.platoon
-
-                # for one vehicle A we are looking at a different vehicle B to
-                # check whether it is useful that A joins B
-
-                # calculate deviation values
-                ds = self.ds(vehicle, platoon)
-                dp = self.dp(vehicle, platoon)
-
-                # FIXME HACK for skipping platoons behind us
-                if vehicle.position > platoon.rear_position:
-                    LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its absolute position")
-                    # we do not record stats here since this is different to the communication aspect filtering
-                    continue
-
-                # remove platoon if not in speed range
-                if ds > 1.0:
-                    # simply applying the threshold
-                    LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its speed difference")
-                    continue
-
-                # remove platoon if not in position range
-                if dp > 1.0:
-                    # simply applying the threshold
-                    LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its position difference")
-                    continue
-
-                # calculate deviation/cost
-                fx = self.cost_speed_position(ds, dp)
-
-                # NOTE: The distinction of vid and lid is superfluous, since we can only join either individual vehicles or platoon leaders.
-                # More specifically, only individual vehicles or platoon leader are able to "advertise" their platoon (see above)
-                assert other_vehicle.vid == platoon.leader.vid, f"We can only join individual vehicles or platoon leaders! {other_vehicle.vid}, {platoon.platoon_id}, {platoon.leader.vid}"
-                # add platoon to list
-                all_found_candidates.append({'vid': vehicle.vid, 'pid': platoon.platoon_id, 'lid': platoon.leader.vid, 'cost': fx})
-                LOG.trace(f"{vehicle.vid} found applicable platoon {platoon.platoon_id} (leader {platoon.leader.vid})")
-
-                # stats
-                vehicle._candidates_found += 1
-                if platoon.size > 1:
-                    vehicle._candidates_found_platoon += 1
-                else:
-                    vehicle._candidates_found_individual += 1
+        Parameters
+        ----------
+        searching_vehicles : list(PlatooningVehicle)
+            The vehicles searching for a platoon
+        available_vehicles : list(PlatooningVehicle)
+            The vehicles available as (new) platoon leaders
+        self_cost : float, optional
+            The cost for driving individually, which adds the assignment of every vehicle to its own platoon
+
+        Returns
+        -------
+        dict
+            The mapping from column name to array of all candidates (sorted by searching vehicle and available vehicle)
+            keys: [vehicle (index of the searching vehicle), leader (index of the available vehicle), vid, pid, lid, cost]
+        """
+
+        platoons = [vehicle.platoon for vehicle in available_vehicles]
+        # NOTE: The distinction of vid and lid is superfluous, since we can only join either individual vehicles or platoon leaders.
+        # More specifically, only individual vehicles or platoon leader are able to "advertise" their platoon
+        assert all(vehicle is platoon.leader for vehicle, platoon in zip(available_vehicles, platoons)), "We can only join individual vehicles or platoon leaders!"
+
+        vehicle_position = np.array([vehicle.position for vehicle in searching_vehicles], dtype=float)
+        vehicle_desired_speed = np.array([vehicle._desired_speed for vehicle in searching_vehicles], dtype=float)
+        platoon_position = np.array([platoon.position for platoon in platoons], dtype=float)
+        platoon_last_position = np.array([platoon.last.position for platoon in platoons], dtype=float)
+        platoon_rear_position = np.array([platoon.rear_position for platoon in platoons], dtype=float)
+        platoon_desired_speed = np.array([platoon.desired_speed for platoon in platoons], dtype=float)
+        platoon_size = np.array([platoon.size for platoon in platoons], dtype=int)
+        # the index of the own platoon of every searching vehicle
+        own = {vehicle.vid: index for index, vehicle in enumerate(available_vehicles)}
+        own_platoon = np.array([own.get(vehicle.vid, -1) for vehicle in searching_vehicles], dtype=int)
+
+        # spatial pruning
+        # a platoon in front of the vehicle has its last vehicle closest to the vehicle (see dp)
+        # use a slightly bigger window and apply the exact criteria afterwards to avoid rounding issues at the borders
+        order = np.argsort(platoon_last_position, kind='stable')
+        sorted_last_position = platoon_last_position[order]
+        margin = 1e-6 * (1 + self._position_deviation_threshold)
+        start = np.searchsorted(sorted_last_position, vehicle_position, side='left')
+        end = np.searchsorted(sorted_last_position, vehicle_position + self._position_deviation_threshold + margin, side='right')
+        counts = end - start
+        vehicle = np.repeat(np.arange(len(searching_vehicles)), counts)
+        offsets = np.arange(len(vehicle)) - np.repeat(np.cumsum(counts) - counts, counts)
+        leader = order[np.repeat(start, counts) + offsets]
+
+        # calculate deviation values (see ds and dp)
+        position = vehicle_position[vehicle]
+        desired_speed = vehicle_desired_speed[vehicle]
+        ds = np.abs(desired_speed - platoon_desired_speed[leader]) / (self._speed_deviation_threshold * desired_speed)
+        dp = np.minimum(
+            np.abs(position - platoon_position[leader]),  # vehicle is in front of platoon
+            np.abs(platoon_last_position[leader] - position),  # platoon is in front of vehicle
+        ) / self._position_deviation_threshold
+
+        applicable = (
+            # filter same car because we assume driving alone is worse than to do platooning
+            (leader != own_platoon[vehicle]) &
+            # FIXME HACK for skipping platoons behind us
+            # we do not record stats here since this is different to the communication aspect filtering
+            ~(position > platoon_rear_position[leader]) &
+            # remove platoon if not in speed range
+            ~(ds > 1.0) &
+            # remove platoon if not in position range
+            ~(dp > 1.0)
+        )
+        vehicle = vehicle[applicable]
+        leader = leader[applicable]
+        # calculate deviation/cost (see cost_speed_position)
+        cost = (self._alpha * ds[applicable]) + ((1.0 - self._alpha) * dp[applicable])
+        assert ((0.0 <= cost) & (cost <= 1.0)).all()
+        LOG.debug(f"{self._owner.iid} found {len(cost)} applicable candidates for {len(searching_vehicles)} searching vehicles")
+
+        # stats
+        slots = np.array([vehicle._slot for vehicle in searching_vehicles], dtype=int)
+        columns = self._owner._simulator._vehicle_state.columns
+        number_of_vehicles = len(searching_vehicles)
+        is_platoon = platoon_size[leader] > 1
+        columns["candidates_found"][slots] += np.bincount(vehicle, minlength=number_of_vehicles)
+        columns["candidates_found_platoon"][slots] += np.bincount(vehicle[is_platoon], minlength=number_of_vehicles)
+        columns["candidates_found_individual"][slots] += np.bincount(vehicle[~is_platoon], minlength=number_of_vehicles)
+
+        if self_cost is not None:
+            # the assignment to the own platoon (i.e., driving individually)
+            assert (own_platoon >= 0).all()
+            vehicle = np.concatenate([vehicle, np.arange(number_of_vehicles)])
+            leader = np.concatenate([leader, own_platoon])
+            cost = np.concatenate([cost, np.full(number_of_vehicles, self_cost, dtype=float)])
+
+        # sort by searching vehicle and available vehicle
+        order = np.lexsort((leader, vehicle))
+        vehicle = vehicle[order]
+        leader = leader[order]
+        vid = np.array([vehicle.vid for vehicle in searching_vehicles], dtype=int)
+        pid = np.array([platoon.platoon_id for platoon in platoons], dtype=int)
+        lid = np.array([platoon.leader.vid for platoon in platoons], dtype=int)
+        return {
+            'vehicle': vehicle,
+            'leader': leader,
+            'vid': vid[vehicle],
+            'pid': pid[leader],
+            'lid': lid[leader],
+            'cost': cost[order],
+        }
+
+    def _do_formation_centralized(self):
+        """
+        Run centralized greedy formation approach.
 
-            # end vehicle
+        This selects candidates and triggers join maneuvers.
+        """
 
-        # end all vehicles
+        searching_vehicles, available_vehicles = self._get_formation_vehicles()
+        candidates = self._find_candidates(searching_vehicles, available_vehicles)
 
-        if len(all_found_candidates) == 0:
+        if len(candidates['cost']) == 0:
             LOG.debug(f"{self._owner.iid} found no possible matches")
             return
 
+        vids = candidates['vid'].tolist()
+        pids = candidates['pid'].tolist()
+        lids = candidates['lid'].tolist()
+        costs = candidates['cost'].tolist()
+        # the candidates of a searching vehicle are a contiguous range within the list of possible matches
+        bounds = np.searchsorted(candidates['vehicle'], np.arange(len(searching_vehicles) + 1)).tolist()
+        ranges = {vehicle.vid: (bounds[index], bounds[index + 1]) for index, vehicle in enumerate(searching_vehicles)}
+
+        # vehicles that are not available anymore, neither as searching vehicle nor as leader
+        # this is exactly avoiding using candidates that became followers meanwhile or are at least within a maneuver
+        busy = set()
+
         # get unique list of searching vehicles from within the possible matches
-        uids = set(x['vid'] for x in all_found_candidates)
+        uids = set(vids)
 
         # TODO apply random to uids?
         # go through all searching vehicles (i.e., their ids)
         for v in uids:
             # get vehicle data and candidates
             vehicle = self._owner._simulator._vehicles[v]
+
+            if v in busy:
+                # this vehicle has no candidates (anymore)
+                LOG.trace(f"{vehicle.vid} has no candidates (anymore)")
+                continue
+
             # get all candidates that vehicle could join
-            found_candidates = [x for x in all_found_candidates if x['vid'] == v]
+            # the position within the list of possible matches breaks ties in the cost
+            found_candidates = [(costs[index], index) for index in range(*ranges[v])]
+            heapq.heapify(found_candidates)
+            # skip candidates whose leader is not available anymore
+            while found_candidates and lids[found_candidates[0][1]] in busy:
+                heapq.heappop(found_candidates)
 
             if len(found_candidates) == 0:
                 # this vehicle has no candidates (anymore)
@@ -667,32 +1007,17 @@ class SpeedPosition(FormationAlgorithm):
 
             # find best candidate to join
             # pick the platoon with the lowest deviation
-            best = min(found_candidates, key=lambda x: x['cost'])
-            LOG.trace(f"{v}'s best platoon is {best['pid']} (leader {best['lid']}) with cost {best['cost']}")
+            best = found_candidates[0][1]
+            LOG.trace(f"{v}'s best platoon is {pids[best]} (leader {lids[best]}) with cost {costs[best]}")
 
             # perform a join maneuver with the candidate's platoon
-            vehicle._join(best['pid'], best['lid'])
-
-            # remove all matches from the list of possible matches that would include the selected vehicle
-            # this is exactly avoiding using candidates that became followers meanwhile or are at least within a maneuver
-            def is_available(x: dict) -> bool:
-                """
-                Return whether an entry from the list of possible matches is (still) available.
+            vehicle._join(pids[best], lids[best])
 
-                Parameters
-                ----------
-                x : dict
-                    The entry from the list of possible matches
-                """
-
-                return (
-                    x['vid'] != best['vid'] and  # noqa 504 # this vehicle does not search anymore, since it just started a join maneuver
-                    x['lid'] != best['vid'] and  # noqa 504 # this vehicle will not be applicable as leader anymore, since it just started a join maneuver
-                    x['vid'] != best['lid'] and  # noqa 504 # the other vehicle is not searching anymore, since it will become a leader in the current join maneuver
-                    x['lid'] != best['lid']  # the other vehicle is not available as leader anymore, since it is busy with the current join maneuver
-                )
-
-            all_found_candidates = [x for x in all_found_candidates if is_available(x)]
+            # remove all matches from the list of possible matches that would include the selected vehicles
+            # this vehicle does not search anymore and will not be applicable as leader anymore, since it just started a join maneuver
+            busy.add(v)
+            # the other vehicle is not searching anymore and not available as leader anymore, since it is busy with the current join maneuver
+            busy.add(lids[best])
 
     def _do_formation_optimal(self):
         """
@@ -703,205 +1028,89 @@ class SpeedPosition(FormationAlgorithm):
 
         from ortools import __version__ as solver_version
         from ortools.linear_solver import pywraplp
-        solver = pywraplp.Solver(f"{self.name} solver (version {solver_version}) @ {self._owner.iid}", pywraplp.Solver.SCIP_MIXED_INTEGER_PROGRAMMING)
-        solver.SetNumThreads(1)
-        if self._solver_time_limit > 0:
-            # influences the quality of the solution
-            solver.set_time_limit(self._solver_time_limit * 1000)  # s --> ms
 
         # import sys
         # infinity = sys.float_info.max  # does work
         # infinity = solver.infinity() does work?
         individual = 1  # big magic number for the cost of driving individually
 
-        objective = solver.Objective()
-        objective.SetMinimization()
-
-        decision_variables = {}
-
-        from ..platooning_vehicle import PlatooningVehicle  # noqa 811
-
         LOG.debug(f"{self._owner.iid} is adding assignment variables for vehicles")
 
-        # select all searching vehicles
-        for vehicle in self._owner._simulator._vehicles.values():
+        searching_vehicles, available_vehicles = self._get_formation_vehicles()
+        # we assume driving alone is worse than to do platooning
+        candidates = self._find_candidates(searching_vehicles, available_vehicles, self_cost=individual)
+        vids = candidates['vid'].tolist()
+        pids = candidates['pid'].tolist()
+        lids = candidates['lid'].tolist()
+        costs = candidates['cost'].tolist()
 
-            # filter vehicles that are technically not able to do platooning
-            if not isinstance(vehicle, PlatooningVehicle):
-                LOG.trace(f"{vehicle.vid} is not capable of platooning")
-                continue
-            # filter vehicles which are already in a platoon
-            if vehicle.platoon_role != PlatoonRole.NONE:
-                LOG.trace(f"{vehicle.vid} is already in a platoon")
-                continue
-            # filter vehicles which are already in a maneuver
-            if vehicle.in_maneuver:
-                LOG.trace(f"{vehicle.vid} is already in a maneuver")
-                continue
-
-            vehicle._formation_iterations += 1
-
-            # allow a vehicle to be assigned to exactly one platoon
-            constraint_one_target_platoon = solver.RowConstraint(1, 1, f"only one platoon for {vehicle.vid}")
-
-            # get all available platoons or platoon candidates
-            for other_vehicle in self._owner._simulator._vehicles.values():
-                # NOTE: we do not filter same car because staying individual is possible here
-
-                # filter vehicles that are technically not able to do platooning
-                if not isinstance(other_vehicle, PlatooningVehicle):
-                    LOG.trace(f"{other_vehicle.vid} is not capable of platooning")
-                    continue
-
-                # here, the logic similar to the distributed approach begins
-
-                # filter vehicles which are not available to become a new leader
-                # we only have this information due to oracle knowledge in the centralized version
-                # we use this to replace management of neighbors and their advertisements
-                if other_vehicle.platoon_role != PlatoonRole.NONE and other_vehicle.platoon_role != PlatoonRole.LEADER:
-                    # we can only join an existing platoon or built a new one
-                    LOG.trace(f"{other_vehicle.vid} is not available")
-                    vehicle._candidates_filtered += 1
-                    vehicle._candidates_filtered_follower += 1
-                    continue
-
-                # filter vehicles which are already in a maneuver
-                # we only have this information due to oracle knowledge in the centralized version
-                if other_vehicle.in_maneuver:
-                    LOG.trace(f"{other_vehicle.vid} is already in a maneuver")
-                    vehicle._candidates_filtered += 1
-                    vehicle._candidates_filtered_maneuver += 1
-                    continue
-
-                platoon = other_vehicle.platoon
-
-                # for one vehicle A we are looking at a different vehicle B to
-                # check whether it is useful that A joins B
-
-                # we assume driving alone is worse than to do platooning
-                if platoon is vehicle.platoon:
-                    fx = individual
-                    LOG.trace(f"Considering driving individually for vehicle {vehicle.vid} (with cost {fx})")
-                elif vehicle.position > platoon.rear_position:
-                    # FIXME HACK for skipping platoons behind us
-                    # we do not record stats here since this is different to the communication aspect filtering
-                    LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its absolute position")
-                    continue
-                else:
-                    # calculate deviation values
-                    ds = self.ds(vehicle, platoon)
-                    dp = self.dp(vehicle, platoon)
-
-                    # remove platoon if not in speed range
-                    if ds > 1.0:
-                        # simply applying the threshold
-                        LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its speed difference ({ds})")
-                        continue
-
-                    # remove platoon if not in position range
-                    elif dp > 1.0:
-                        # simply applying the threshold
-                        LOG.trace(f"{vehicle.vid}'s platoon {platoon.platoon_id} (leader {platoon.leader.vid}) not applicable because of its position difference ({dp})")
-                        continue
-
-                    else:
-                        # calculate deviation/cost
-                        fx = self.cost_speed_position(ds, dp)
-                        LOG.trace(f"Considering platoon {platoon.platoon_id} (leader {platoon.leader.vid}) for vehicle {vehicle.vid} with cost {fx}")
-
-                        # stats
-                        vehicle._candidates_found += 1
-                        if platoon.size > 1:
-                            vehicle._candidates_found_platoon += 1
-                        else:
-                            vehicle._candidates_found_individual += 1
-
-                # NOTE: The distinction of vid and lid is superfluous, since we can only join either individual vehicles or platoon leaders.
-                # More specifically, only individual vehicles or platoon leader are able to "advertise" their platoon (see above)
-                assert other_vehicle.vid == platoon.leader.vid, f"We can only join individual vehicles or platoon leaders! {other_vehicle.vid}, {platoon.platoon_id}, {platoon.leader.vid}"
-
-                # define (0,1) decision variable for assignment of vehicle to platoon
-                variable = solver.IntVar(0, 1, f"{vehicle.vid} -> {platoon.platoon_id} ({platoon.leader.vid})")
-
-                # add variable to assignment matrix
-                decision_variables[variable.index()] = {
-                    'vid': vehicle.vid,
-                    'pid': platoon.platoon_id,
-                    'lid': platoon.leader.vid,
-                    'cost': fx,
-                    'var': variable.index(),
-                }
-
-                # add decision variable from vehicle to platoon to row sum
-                constraint_one_target_platoon.SetCoefficient(variable, 1)
-
-                # add decision variable from vehicle to platoon with corresponding cost to the row sum
-                objective.SetCoefficient(variable, fx)
-
-            # end vehicle
-
-        # end all vehicles
-
-        # print cost matrix
-        if LOG.getEffectiveLevel() <= logging.DEBUG:
-            print(' ', end=' ')
-            for lid in set([x['lid'] for x in decision_variables.values()]):
-                print(lid, ' ', end=' ')
-            print('(lid)')
-            for vid in set([x['vid'] for x in decision_variables.values()]):
-                print(vid, end=' ')
-                for lid in set([x['lid'] for x in decision_variables.values()]):
-                    variables = [x['var'] for x in decision_variables.values() if x['vid'] == vid and x['lid'] == lid]
-                    if variables:
-                        print(round(decision_variables[solver.variable(variables[0]).index()]['cost'], 1), end=' ')
-                    else:
-                        print(' - ', end=' ')
-                print()
-            print('(vid)')
-
-        # add more platoon constraints
-        # NOTE: We need to take the leader here, since the platoon id does not necessarily match the leader id (e.g., when the leader left already)
-        # Also, we want to compare the vehicle id to the leader id to make sure that only one assignment is done for this vehicle
-        LOG.debug(f"{self._owner.iid} is adding additional platoon constraints")
-
-        # get all platoons
-        for lid in set([x['lid'] for x in decision_variables.values()]):
-            # create constraint for this platoon
-            # assign only one (other) vehicle to this leader
-            constraint_one_member_per_platoon = solver.RowConstraint(0, 1, f"one other member for leader {lid}")
-            # assign a vehicle only if no other vehicles has been assigned to this vehicle
-            constraint_one_assignment_per_vehicle = solver.RowConstraint(0, 1, f"one assignment per vehicle {lid}")
-            # get all variables that assign a vehicle to this vehicle (as leader)
-            for var in [x['var'] for x in decision_variables.values() if x['lid'] == lid and x['vid'] != lid]:
-                # not a self-assignment
-                variable = solver.variable(var)
-                constraint_one_member_per_platoon.SetCoefficient(variable, 1)
-                constraint_one_assignment_per_vehicle.SetCoefficient(variable, 1)
-
-            # get all variables that assign this vehicle to someone else (as leader)
-            for var in [x['var'] for x in decision_variables.values() if x['vid'] == lid and x['lid'] != lid]:
-                # not a self-assignment
-                constraint_one_assignment_per_vehicle.SetCoefficient(solver.variable(var), 1)
-
-        if solver.NumConstraints() == 0:
+        if len(vids) == 0:
             LOG.info(f"{self._owner.iid} has no vehicles to run the solver for")
             return
 
-        # run the solver to calculate the optimal assignments
-        LOG.info(f"{self._owner.iid} is running the solver for {solver.NumVariables()} possible assignments, and {solver.NumConstraints()} constraints")
-
-        # solver debug output
-        if LOG.getEffectiveLevel() <= logging.DEBUG:
-            solver.EnableOutput()
+        if self._solver_decomposition:
+            # the assignment problem decomposes into independent problems for the connected components of the candidate graph
+            # NOTE: the candidates of a component stay grouped by searching vehicle
+            # NOTE: the independent problems may resolve ties between optimal assignments differently than a single problem
+            components = get_components(candidates['vid'], candidates['lid'])
+        else:
+            # a single problem for all vehicles
+            components = np.zeros(len(vids), dtype=int)
+        order = np.argsort(components, kind='stable')
+        bounds = np.searchsorted(components[order], np.arange(components.max() + 2)).tolist()
+        order = order.tolist()
+
+        problems = []
+        results = []
+        for component in range(len(bounds) - 1):
+            indices = order[bounds[component]:bounds[component + 1]]
+            if len(indices) == 1 and self._solver_decomposition:
+                # the vehicle has no other candidate than driving individually
+                # this is the trivial solution for 1 variable and 3 constraints (see solve_assignment_problem)
+                assert vids[indices[0]] == lids[indices[0]]
+                results.append((indices, {
+                    'result_status': pywraplp.Solver.OPTIMAL,
+                    'variables': 1,
+                    'constraints': 3,
+                    'run_time': 0.0,
+                    'solution_value': float(individual),
+                    'best_bound': float(individual),
+                    'assignments': [0],
+                }))
+                continue
+            problems.append(indices)
+
+        LOG.info(f"{self._owner.iid} is running the solver for {len(vids)} possible assignments in {len(problems)} independent problems")
+
+        arguments = [
+            (
+                f"{self.name} solver (version {solver_version}) @ {self._owner.iid} ({index})",
+                [vids[i] for i in indices],
+                [pids[i] for i in indices],
+                [lids[i] for i in indices],
+                [costs[i] for i in indices],
+                self._solver_time_limit,
+                LOG.getEffectiveLevel() <= logging.DEBUG,
+            )
+            for index, indices in enumerate(problems)
+        ]
+        if self._solver_workers > 1 and len(problems) > 1:
+            if self._solver_pool is None:
+                # the processes are re-used for all further formation iterations
+                self._solver_pool = ProcessPoolExecutor(max_workers=self._solver_workers)
+            results.extend(zip(problems, self._solver_pool.map(solve_assignment_problem, *zip(*arguments))))
+        else:
+            results.extend(zip(problems, (solve_assignment_problem(*args) for args in arguments)))
 
-        start_time = timer()
-        result_status = solver.Solve()
-        end_time = timer()
-        run_time = end_time - start_time
+        # combine the results of all problems
+        # the worst result status determines the overall result status
+        result_status = max(result['result_status'] for _, result in results)
+        run_time = sum(result['run_time'] for _, result in results)
+        solution_value = sum(result['solution_value'] for _, result in results)
+        best_bound = sum(result['best_bound'] for _, result in results)
+        solution_quality = best_bound / solution_value if solution_value else 0.0
 
         LOG.info(f"{self._owner.iid}'s solver ran for {run_time}s")
-        LOG.info(f"{self._owner.iid}'s solver ran for {solver.iterations()} iterations")  # broken?
-        solution_quality = objective.BestBound() / objective.Value()
 
         # record solver trace
         if self._record_solver_traces:
@@ -909,22 +1118,22 @@ class SpeedPosition(FormationAlgorithm):
                 basename=self._owner._simulator._result_base_filename,
                 step=self._owner._simulator.step,
                 iid=self._owner.iid,
-                variables=solver.NumVariables(),
-                constraints=solver.NumConstraints(),
+                variables=sum(result['variables'] for _, result in results),
+                constraints=sum(result['constraints'] for _, result in results),
                 run_time=run_time,
                 result_status=result_status,  # this is a simple int
-                solution_value=objective.Value(),
-                best_bound=objective.BestBound(),
+                solution_value=solution_value,
+                best_bound=best_bound,
                 solution_quality=solution_quality,
             )
 
         # TODO record mean runtime
 
-        if result_status == solver.OPTIMAL:  # 0
+        if result_status == pywraplp.Solver.OPTIMAL:  # 0
             LOG.info(f"{self._owner.iid}'s solution is optimal")
             self._assignments_solved += 1
             self._assignments_solved_optimal += 1
-        elif result_status == solver.FEASIBLE:  # 1
+        elif result_status == pywraplp.Solver.FEASIBLE:  # 1
             # from or-tools' documentation:
             # The solver had enough time to find some solution that satisfies all
             # constraints, but it did not prove optimality (which means it may or may
@@ -937,76 +1146,59 @@ class SpeedPosition(FormationAlgorithm):
             LOG.info(f"{self._owner.iid}'s solution is not optimal")
             self._assignments_solved += 1
             self._assignments_solved_feasible += 1
-            LOG.debug(f"{self._owner.iid}'s optimal objective value is {objective.Value()}")
-            LOG.debug(f"{self._owner.iid}'s best bound is {objective.BestBound()}")
+            LOG.debug(f"{self._owner.iid}'s optimal objective value is {solution_value}")
+            LOG.debug(f"{self._owner.iid}'s best bound is {best_bound}")
             LOG.info(f"{solution_quality} approximation of the optimal solution")
-        elif result_status >= solver.INFEASIBLE:  # 2
+        elif result_status >= pywraplp.Solver.INFEASIBLE:  # 2
             LOG.warning(f"{self._owner.iid}'s optimization problem was not solvable!")
             self._assignments_not_solved += 1
             return
 
-        if objective.Value() == 0:
+        if solution_value == 0:
             LOG.info(f"{self._owner.iid} made no assignment!")
             self._assignments_none += 1
             return
 
-        # print assingment matrix
-        if LOG.getEffectiveLevel() <= logging.DEBUG:
-            print(' ', end=' ')
-            for lid in set([x['lid'] for x in decision_variables.values()]):
-                print(lid, '', end=' ')
-            print('(lid)')
-            for vid in set([x['vid'] for x in decision_variables.values()]):
-                print(vid, end=' ')
-                for lid in set([x['lid'] for x in decision_variables.values()]):
-                    variables = [x['var'] for x in decision_variables.values() if x['vid'] == vid and x['lid'] == lid]
-                    if variables:
-                        print(int(solver.variable(variables[0]).solution_value()), '', end=' ')
-                    else:
-                        print('- ', end=' ')
-                print()
-            print('(vid)')
-
         LOG.debug("Applying solver solution...")
-        for variable in solver.variables():
-            if variable.solution_value() > 0:
-                mapping = decision_variables[variable.index()]
-                LOG.trace(f"{mapping['vid']} was assigned to leader {mapping['lid']} (platoon {mapping['pid']}) with cost {mapping['cost']}")
-                # get vehicle & platoon data
-                # HACK for oracle knowledge
-                leader = self._owner._simulator._vehicles[mapping['lid']]
-                vehicle = self._owner._simulator._vehicles[mapping['vid']]
-                target_platoon = leader.platoon
-                if mapping['vid'] == mapping['lid']:
-                    # self-assignment
-                    assert mapping['cost'] == individual
-                    LOG.trace(f"{vehicle.vid} keeps driving individually")
-                    self._assignments_self += 1
-                    self._assignments_successful += 1
-                    continue
-                if target_platoon.platoon_id != mapping['pid']:
-                    # meanwhile, the leader became a platoon member (during application of the solver's solution)
-                    # NOTE: this should never happen
-                    assert (leader.is_in_platoon() and leader.platoon_role == PlatoonRole.FOLLOWER)
-                    LOG.warning(f"{vehicle.vid}'s assigned leader {leader.vid} (platoon {mapping['pid']}) meanwhile joined another platoon {target_platoon.platoon_id}!")
-                    self._assignments_candidate_joined_already += 1
-                    sys.exit(f"ERROR [{__name__}]: This should never happen!")
-                    continue
-                else:
-                    assert not leader.in_maneuver
-                    assert (not leader.is_in_platoon() or leader.platoon_role == PlatoonRole.LEADER)
-                # let vehicle join platoon
-                if vehicle.is_in_platoon():
-                    # meanwhile, we became a platoon leader (during application of the solver's solution)
-                    # NOTE: this should never happen
-                    assert vehicle.platoon_role == PlatoonRole.LEADER
-                    LOG.warning(f"{vehicle.vid} meanwhile became the leader of platoon {vehicle.platoon.platoon_id}. Hence, no assignment is possible/necessary anymore")
-                    self._assingments_vehicle_became_leader += 1
-                    sys.exit(f"ERROR [{__name__}]: This should never happen!")
-                    continue
-                assert not vehicle.in_maneuver
+        # apply the assignments in the order of the candidates
+        for candidate in sorted(indices[assignment] for indices, result in results for assignment in result['assignments']):
+            mapping = {'vid': vids[candidate], 'pid': pids[candidate], 'lid': lids[candidate], 'cost': costs[candidate]}
+            LOG.trace(f"{mapping['vid']} was assigned to leader {mapping['lid']} (platoon {mapping['pid']}) with cost {mapping['cost']}")
+            # get vehicle & platoon data
+            # HACK for oracle knowledge
+            leader = self._owner._simulator._vehicles[mapping['lid']]
+            vehicle = self._owner._simulator._vehicles[mapping['vid']]
+            target_platoon = leader.platoon
+            if mapping['vid'] == mapping['lid']:
+                # self-assignment
+                assert mapping['cost'] == individual
+                LOG.trace(f"{vehicle.vid} keeps driving individually")
+                self._assignments_self += 1
+                self._assignments_successful += 1
+                continue
+            if target_platoon.platoon_id != mapping['pid']:
+                # meanwhile, the leader became a platoon member (during application of the solver's solution)
+                # NOTE: this should never happen
+                assert (leader.is_in_platoon() and leader.platoon_role == PlatoonRole.FOLLOWER)
+                LOG.warning(f"{vehicle.vid}'s assigned leader {leader.vid} (platoon {mapping['pid']}) meanwhile joined another platoon {target_platoon.platoon_id}!")
+                self._assignments_candidate_joined_already += 1
+                sys.exit(f"ERROR [{__name__}]: This should never happen!")
+                continue
+            else:
                 assert not leader.in_maneuver
+                assert (not leader.is_in_platoon() or leader.platoon_role == PlatoonRole.LEADER)
+            # let vehicle join platoon
+            if vehicle.is_in_platoon():
+                # meanwhile, we became a platoon leader (during application of the solver's solution)
+                # NOTE: this should never happen
+                assert vehicle.platoon_role == PlatoonRole.LEADER
+                LOG.warning(f"{vehicle.vid} meanwhile became the leader of platoon {vehicle.platoon.platoon_id}. Hence, no assignment is possible/necessary anymore")
+                self._assingments_vehicle_became_leader += 1
+                sys.exit(f"ERROR [{__name__}]: This should never happen!")
+                continue
+            assert not vehicle.in_maneuver
+            assert not leader.in_maneuver
 
-                # actual join
-                vehicle._join(target_platoon.platoon_id, target_platoon.leader.vid)
-                self._assignments_successful += 1
+            # actual join
+            vehicle._join(target_platoon.platoon_id, target_platoon.leader.vid)
+            self._assignments_successful += 1
@@ -28,6 +28,7 @@ from timeit import default_timer as timer
 
 from plafosim import CustomFormatter, __citation__, __description__, __version__
 from plafosim.algorithms import *  # noqa 401
+from plafosim.replications import Replications
 from plafosim.simulator import DEFAULTS, Simulator
 from plafosim.util import find_resource
 
@@ -87,10 +88,15 @@ def format_help(parser: argparse.ArgumentParser, groups=None) -> str:
 
 
 # TODO duplicated code with trace replay
-def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
+def parse_args(argv: list = None) -> (argparse.Namespace, argparse._ArgumentGroup):
     """
     Parse arguments given to this module.
 
+    Parameters
+    ----------
+    argv : list, optional
+        The arguments to parse. Defaults to the arguments of the command line.
+
     Returns
     -------
     args : argparse.Namespace
@@ -206,6 +212,19 @@ def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
         choices=(True, False),
         help="Whether to fill the road network with vehicles using random positions and given vehicle number/density before the simulation starts",
     )
+    g_road.add_argument(
+        "--pre-fill-cache",
+        type=str,
+        default=DEFAULTS['pre_fill_cache'],
+        metavar="DIR",
+        help="The directory of a cache for pre-filled roads, which is shared by all simulations with the same scenario parameters and random seed. Disabled by default",
+    )
+    g_road.add_argument(
+        "--pre-fill-cache-size",
+        type=int,
+        default=DEFAULTS['pre_fill_cache_size'],
+        help="The maximum size of the pre-fill cache in MiB. The least recently used entries are removed when it is exceeded",
+    )
 
     # vehicle properties
     g_vehicles = parser.add_argument_group("vehicle properties")
@@ -373,6 +392,13 @@ def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
         default=int(DEFAULTS['maximum_trip_length'] / 1000),  # m -> km
         help="The maximum trip length for a vehicle in km",
     )
+    g_trips.add_argument(
+        "--trip-file",
+        type=str,
+        default=DEFAULTS['trip_file'],
+        metavar="FILE",
+        help="The name of a trip file (CSV or .npy) to replay the vehicle demand from, which is read lazily in the order of the column depart. Optional columns are id, desiredSpeed, departRamp, departLane, departSpeed, arrivalPos, and vClass. Missing values are chosen according to the other trip properties. All trips of the file are replayed, thus it overrides the departure method, the departure flow, and the number of vehicles",
+    )
 
     # communication properties
     g_communication = parser.add_argument_group("communication properties")
@@ -532,12 +558,40 @@ def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
         choices=(True, False),
         help="Whether to enable checks for collision among vehicles",
     )
+    g_simulation.add_argument(
+        "--mobility-backend",
+        type=str,
+        default=DEFAULTS['mobility_backend'],
+        choices=["numpy", "pandas"],
+        help="The backend to use for the mobility computations (i.e., lane changes, speed, and position updates)",
+    )
+    g_simulation.add_argument(
+        "--rigid-platoons",
+        type=lambda x: bool(strtobool(x)),
+        default=DEFAULTS['rigid_platoons'],
+        choices=(True, False),
+        help="Whether to treat platoons as rigid units within the mobility computations (i.e., only the leader is considered in lane changes and neighbor computations). Requires the numpy mobility backend",
+    )
+    g_simulation.add_argument(
+        "--jit-kernels",
+        type=lambda x: bool(strtobool(x)),
+        default=DEFAULTS['jit_kernels'],
+        choices=(True, False),
+        help="Whether to use JIT compiled kernels for the elementwise mobility math (i.e., car following, gap safety, clamping). Requires the numpy mobility backend and the optional dependency numba, falls back to NumPy otherwise",
+    )
     g_simulation.add_argument(
         "--random-seed",
         type=int,
         default=DEFAULTS['random_seed'],
         help="The seed (>=0) for the random number generator. A value of -1 uses the current system time",
     )
+    g_simulation.add_argument(
+        "--replications",
+        type=int,
+        default=1,
+        metavar="R",
+        help="The number of replications to simulate side by side with consecutive random seeds starting at --random-seed. The random seed is appended to the result base filename of every replication",
+    )
     g_simulation.add_argument(
         "--progress",
         type=lambda x: bool(strtobool(x)),
@@ -772,8 +826,11 @@ def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
             help=f"show help message for {algorithm} formation algorithm and exit",
         )
 
+    if argv is None:
+        argv = sys.argv[1:]
+
     # print usage without any arguments
-    if len(sys.argv) < 2:
+    if not argv:
         # no argument has been passed
         print(
             parser.format_usage(),
@@ -785,7 +842,7 @@ def parse_args() -> (argparse.Namespace, argparse._ArgumentGroup):
         parser.exit()
 
     # parse the arguments
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # simple help
     misc_groups = parser._action_groups[:2]
@@ -916,6 +973,7 @@ def create_simulator(**kwargs: dict) -> Simulator:
     # prepare keyword arguments for simulator
     kwargs.pop('load_snapshot')
     kwargs.pop('save_snapshot')
+    kwargs.pop('replications')
     kwargs['log_level'] = logging.getLevelName(max(DEFAULTS['log_level'] - ((kwargs['verbosity'] - kwargs['quiet']) * 10), 5))
     kwargs['max_step'] = int(kwargs['max_step'])
 
@@ -923,6 +981,34 @@ def create_simulator(**kwargs: dict) -> Simulator:
     return Simulator(**kwargs)
 
 
+def create_replications(**kwargs: dict) -> Replications:
+    """
+    Create a batch of replications from given keyword arguments.
+
+    Parameters
+    ----------
+    kwargs : dict
+        The dictionary of keyword arguments to use for the creation
+
+    Returns
+    -------
+    Replications : The created batch of replications
+    """
+
+    assert kwargs
+
+    # prepare keyword arguments for simulators
+    number_of_replications = kwargs['replications']
+    kwargs.pop('load_snapshot')
+    kwargs.pop('save_snapshot')
+    kwargs.pop('replications')
+    kwargs['log_level'] = logging.getLevelName(max(DEFAULTS['log_level'] - ((kwargs['verbosity'] - kwargs['quiet']) * 10), 5))
+    kwargs['max_step'] = int(kwargs['max_step'])
+
+    # create new batch of replications
+    return Replications(number_of_replications, **kwargs)
+
+
 def main():
     """
     The main entry point of PlaFoSim.
@@ -938,6 +1024,11 @@ def main():
         print(f"Current configuration:\n{json.dumps(dict(sorted(vars(args).items())),indent=2)}")
         return
 
+    if args.replications < 1:
+        sys.exit(f"ERROR [{__name__}]: The number of replications needs to be at least 1!")
+    if args.replications > 1 and (args.load_snapshot or args.save_snapshot):
+        sys.exit(f"ERROR [{__name__}]: Snapshots are not supported with replications!")
+
     simulator = None
     if args.load_snapshot:
         # load snapshot
@@ -952,6 +1043,9 @@ def main():
             }
         )
         print(f"Loaded a snapshot of the simulation from {args.load_snapshot}. Running simulation with the loaded state...")
+    elif args.replications > 1:
+        # create new batch of replications
+        simulator = create_replications(**vars(args))
     else:
         # create new simulator
         simulator = create_simulator(**vars(args))
@@ -0,0 +1,342 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from timeit import default_timer as timer
+
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+
+from plafosim import CustomFormatter, __citation__, __description__, __version__
+from plafosim.cli.plafosim import create_replications, create_simulator
+from plafosim.cli.plafosim import parse_args as parse_simulation_args
+from plafosim.simulator import DEFAULTS
+
+LOG = logging.getLogger(__name__)
+
+# options that are set by the sweep for every run
+RESERVED_OPTIONS = ["--random-seed", "--result-base-filename", "--load-snapshot", "--save-snapshot", "--gui"]
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parse arguments given to this module.
+
+    Returns
+    -------
+    argparse.Namespace
+        The namespace of parsed arguments and corresponding values.
+    """
+
+    # parse some parameters
+    parser = argparse.ArgumentParser(
+        formatter_class=CustomFormatter,
+        allow_abbrev=False,
+        description=f"{__description__}\n\nA tool to run a sweep of simulations in parallel.",
+        epilog="""The sweep file is a JSON object with the following (optional) keys:
+  options      the options of all runs, e.g., {"--road-length": 10, "--time-limit": 0.5}
+  grid         lists of values per option, all combinations are simulated, e.g., {"--penetration": [0.5, 1.0]}
+  runs         a list of options per run, which is combined with every grid combination
+  repetitions  the number of repetitions (i.e., random seeds) of every combination
+""",
+    )
+
+    # miscellaneous
+    parser.add_argument(
+        "-C", "--citation",
+        action="version",
+        help="show the citation information (bibtex) and exit",
+        version=__citation__,
+    )
+    parser.add_argument(
+        "-V", "--version",
+        action="version",
+        version=f"plafosim {__version__}",
+    )
+    parser.add_argument(
+        "-n", "--dry-run",
+        action="store_true",
+        help="show the expanded runs and exit",
+    )
+    parser.add_argument(
+        "-q", "--quiet",
+        action="count",
+        default=0,
+        help=f"The amount of verbosity levels to be removed for printing the logs of the sweep (e.g., failed runs) to stdout. The starting level is {logging.getLevelName(DEFAULTS['log_level'])}. The logs of the simulations are configured by their options.",
+    )
+    parser.add_argument(
+        "-v", "--verbosity",
+        action="count",
+        default=0,
+        help=f"The amount of verbosity levels to be added for printing the logs of the sweep (e.g., finished runs) to stdout. The starting level is {logging.getLevelName(DEFAULTS['log_level'])}. The logs of the simulations are configured by their options.",
+    )
+    parser.add_argument(
+        "sweep",
+        type=str,
+        metavar="SWEEP",
+        help="The JSON file describing the sweep",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count(),
+        help="The number of worker processes to run simulations in parallel",
+    )
+    parser.add_argument(
+        "--random-seed",
+        type=int,
+        default=DEFAULTS['random_seed'],
+        help="The seed (>=0) of the first repetition, which is incremented for every further repetition. All combinations use the same seeds. A value of -1 uses the current system time",
+    )
+    parser.add_argument(
+        "--result-base-filename",
+        type=str,
+        default=DEFAULTS['result_base_filename'],
+        help="The base filename of the result files, which is extended by the index and the random seed of every run",
+    )
+
+    return parser.parse_args()
+
+
+def _option_arguments(options: dict) -> list:
+    """
+    Convert options into command line arguments.
+
+    Parameters
+    ----------
+    options : dict
+        The mapping from option to value (None for flags)
+
+    Returns
+    -------
+    list : The command line arguments
+    """
+
+    argv = []
+    for option, value in options.items():
+        if not option.startswith("--"):
+            sys.exit(f"ERROR [{__name__}]: Option {option} needs to start with --!")
+        if option in RESERVED_OPTIONS:
+            sys.exit(f"ERROR [{__name__}]: Option {option} is set by the sweep and cannot be used!")
+        argv.append(option)
+        if isinstance(value, bool):
+            argv.append(str(value).lower())
+        elif value is not None:
+            argv.append(str(value))
+    return argv
+
+
+def expand_sweep(sweep: dict, random_seed: int, result_base_filename: str) -> list:
+    """
+    Expand a sweep into individual runs.
+
+    Every combination of the runs and the grid is repeated with the same random seeds.
+
+    Parameters
+    ----------
+    sweep : dict
+        The description of the sweep
+        keys: [options, grid, runs, repetitions]
+    random_seed : int
+        The random seed of the first repetition
+    result_base_filename : str
+        The base filename of the result files
+
+    Returns
+    -------
+    list(dict)
+        The runs with their index, random seed, result base filename, options, and command line arguments
+    """
+
+    unknown = set(sweep) - {"options", "grid", "runs", "repetitions"}
+    if unknown:
+        sys.exit(f"ERROR [{__name__}]: Unknown keys {sorted(unknown)} in sweep!")
+    repetitions = sweep.get("repetitions", 1)
+    if repetitions < 1:
+        sys.exit(f"ERROR [{__name__}]: The number of repetitions needs to be at least 1!")
+    assert random_seed >= 0
+
+    grid = sweep.get("grid", {})
+    combinations = [
+        {**sweep.get("options", {}), **run, **dict(zip(grid, values))}
+        for run in sweep.get("runs", [{}])
+        for values in itertools.product(*grid.values())
+    ]
+
+    runs = []
+    for index, options in enumerate(combinations):
+        argv = _option_arguments(options)
+        for repetition in range(repetitions):
+            seed = random_seed + repetition
+            basename = f"{result_base_filename}_run{index}_seed{seed}"
+            runs.append(
+                {
+                    "index": index,
+                    "random_seed": seed,
+                    "result_base_filename": basename,
+                    "options": options,
+                    # disable the progress bar by default
+                    "argv": ["--progress", "false"] + argv + ["--random-seed", str(seed), "--result-base-filename", basename],
+                }
+            )
+    return runs
+
+
+def write_index(filename: str, runs: list):
+    """
+    Write an index of all runs.
+
+    Parameters
+    ----------
+    filename : str
+        The name of the index file
+    runs : list(dict)
+        The runs with their index, random seed, result base filename, and command line arguments
+    """
+
+    with open(filename, "w", newline="") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["run", "random_seed", "result_base_filename", "options"])
+        for run in runs:
+            writer.writerow([run['index'], run['random_seed'], run['result_base_filename'], " ".join(run['argv'])])
+
+
+def configure_logging(log_level: str):
+    """
+    Configure the logging of the sweep itself.
+
+    The root logger is not configured, since it is inherited by the worker processes and would thus override the log level of the simulations.
+
+    Parameters
+    ----------
+    log_level : str
+        The log level of the sweep
+    """
+
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(levelname)s [%(name)s]: %(message)s"))
+    LOG.addHandler(handler)
+    LOG.setLevel(log_level)
+    LOG.propagate = False
+
+
+def run_simulation(argv: list) -> tuple:
+    """
+    Run a single simulation with the given command line arguments.
+
+    The logging configuration of the process (e.g., from a previous simulation) is removed during the simulation, thus the simulation uses its own log level.
+
+    Parameters
+    ----------
+    argv : list
+        The command line arguments of the simulation
+
+    Returns
+    -------
+    tuple(int, float, str)
+        The number of simulated steps, the run time, and the error message (if any)
+    """
+
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    for handler in handlers:
+        root.removeHandler(handler)
+
+    start_time = timer()
+    try:
+        args, _ = parse_simulation_args(argv)
+        if args.replications > 1:
+            simulator = create_replications(**vars(args))
+        else:
+            simulator = create_simulator(**vars(args))
+        steps = simulator.run()
+    except (Exception, SystemExit) as e:
+        # do not tear down the worker (and the remaining runs)
+        return 0, timer() - start_time, f"{type(e).__name__}: {e}"
+    finally:
+        # restore the previous logging configuration
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        for handler in handlers:
+            root.addHandler(handler)
+        root.setLevel(level)
+    return steps, timer() - start_time, None
+
+
+def main():
+    """
+    The main entry point of PlaFoSim's sweep script.
+    """
+
+    args = parse_args()
+
+    configure_logging(logging.getLevelName(max(DEFAULTS['log_level'] - ((args.verbosity - args.quiet) * 10), 5)))
+
+    with open(args.sweep) as f:
+        sweep = json.load(f)
+
+    random_seed = args.random_seed
+    if random_seed < 0:
+        random_seed = random.randint(0, 10000)
+    runs = expand_sweep(sweep, random_seed, args.result_base_filename)
+
+    if args.dry_run:
+        for run in runs:
+            print(" ".join(["plafosim"] + run["argv"]))
+        return
+
+    if args.workers < 1:
+        sys.exit(f"ERROR [{__name__}]: The number of workers needs to be at least 1!")
+
+    # write an index of all runs
+    write_index(f"{args.result_base_filename}_sweep.csv", runs)
+
+    print(f"Running {len(runs)} simulations with {args.workers} workers...")
+
+    start_time = timer()
+    failed = []
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_simulation, run["argv"]): run for run in runs}
+        # print the logs without breaking the progress bar
+        with logging_redirect_tqdm(loggers=[LOG]):
+            for future in tqdm(as_completed(futures), desc='Sweep progress', total=len(runs), unit='run'):
+                run = futures[future]
+                steps, run_time, error = future.result()
+                if error:
+                    failed.append(run)
+                    LOG.error(f"Run {run['result_base_filename']} failed: {error}")
+                else:
+                    LOG.info(f"Run {run['result_base_filename']} took {run_time} seconds ({steps / run_time} step/s)")
+    end_time = timer()
+
+    print(f"The sweep took {end_time - start_time} seconds ({len(runs) / (end_time - start_time)} run/s)")
+    if failed:
+        sys.exit(f"ERROR [{__name__}]: {len(failed)} of {len(runs)} runs failed!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
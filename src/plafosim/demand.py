@@ -0,0 +1,500 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+
+def get_steps(max_step: int, step_length: float) -> np.ndarray:
+    """
+    Return all steps of a simulation.
+
+    The steps are accumulated in the same way as by the simulator.
+
+    Parameters
+    ----------
+    max_step : int
+        The maximum simulation step
+    step_length : float
+        The length of a simulation step
+
+    Returns
+    -------
+    numpy.ndarray : The steps
+    """
+
+    number_of_steps = int(np.ceil(max_step / step_length)) + 1
+    steps = np.concatenate([[0.0], np.cumsum(np.full(number_of_steps, step_length, dtype=float))])
+    return steps[steps < max_step]
+
+
+def get_schedule_counts(
+    steps: np.ndarray,
+    rng: np.random.Generator,
+    depart_method: str,
+    effective_depart_rate: float,
+    depart_probability: float,
+) -> np.ndarray:
+    """
+    Return the number of vehicles to schedule within every step according to the departure method.
+
+    Parameters
+    ----------
+    steps : numpy.ndarray
+        The steps of the simulation
+    rng : numpy.random.Generator
+        The random number generator to use
+    depart_method : str
+        The departure method to use
+    effective_depart_rate : float
+        The effective departure rate in vehicles per step (unused for the departure method probability)
+    depart_probability : float
+        The departure probability per step (only used for the departure method probability)
+
+    Returns
+    -------
+    numpy.ndarray : The number of vehicles to schedule within every step
+    """
+
+    if depart_method == "probability":
+        # spawn probability per time step, similar to SUMO's flow parameter probability
+        counts = (rng.random(len(steps)) <= depart_probability).astype(int)
+        # special case in step 0 to avoid not having any vehicles and thus stopping the simulation
+        counts[steps == 0] = 1
+        return counts
+
+    # estimate how many vehicles there need to be with the given effective departure rate
+    # and subtract all already scheduled vehicles
+    desired_number_vehicles = np.floor(steps * effective_depart_rate).astype(int) + 1
+    return np.diff(desired_number_vehicles, prepend=0)
+
+
+def get_desired_speed_np(
+    desired_speed: float,
+    rng: np.random.Generator,
+    speed_variation: float,
+    min_desired_speed: float,
+    max_desired_speed: float,
+    random_desired_speed: bool,
+    size: int,
+) -> np.ndarray:
+    """
+    Return (random) desired driving speeds (cf. spawning.get_desired_speed).
+
+    Parameters
+    ----------
+    desired_speed : float
+        The value to be used as is or as the mean for sampling from a normal distribution
+    rng : numpy.random.Generator
+        The random number generator to use
+    speed_variation : float
+        The value to be used as variation for sampling from a normal distribution
+    min_desired_speed : float
+        The minimum allowed value for the desired driving speed
+    max_desired_speed : float
+        The maximum allowed value for the desired driving speed
+    random_desired_speed : bool
+        Whether to choose random values from a normal distribution
+    size : int
+        The number of values
+
+    Returns
+    -------
+    numpy.ndarray : The values for the desired driving speed
+    """
+
+    if not random_desired_speed:
+        return np.full(size, desired_speed, dtype=float)
+    # normal distribution
+    speed = desired_speed * rng.normal(1.0, speed_variation, size)
+    # TODO new dice roll instead of cutting?
+    return np.clip(speed, min_desired_speed, max_desired_speed)
+
+
+def get_depart_speed_np(
+    desired_speed: np.ndarray,
+    rng: np.random.Generator,
+    depart_desired: bool,
+    random_depart_speed: bool,
+) -> np.ndarray:
+    """
+    Return (random) departure speeds (cf. spawning.get_depart_speed).
+
+    Parameters
+    ----------
+    desired_speed : numpy.ndarray
+        The desired speeds to consider
+    rng : numpy.random.Generator
+        The random number generator to use
+    depart_desired : bool
+        Whether to depart with the desired speed
+    random_depart_speed : bool
+        Whether to choose random values from a range
+
+    Returns
+    -------
+    numpy.ndarray : The values for the departure speed
+    """
+
+    if depart_desired:
+        return desired_speed.copy()
+    if random_depart_speed:
+        # make sure to also include the desired speed itself
+        return rng.integers(0, np.floor(desired_speed) + 1).astype(float)
+    return np.zeros(len(desired_speed))
+
+
+def generate_demand(
+    rng: np.random.Generator,
+    first_vid: int,
+    max_step: int,
+    step_length: float,
+    depart_method: str,
+    effective_depart_rate: float,
+    depart_probability: float,
+    depart_flow: bool,
+    number_of_vehicles: int,
+    desired_speed: float,
+    speed_variation: float,
+    min_desired_speed: float,
+    max_desired_speed: float,
+    random_desired_speed: bool,
+    depart_desired: bool,
+    random_depart_speed: bool,
+) -> dict:
+    """
+    Generate the trips of all vehicles departing within a simulation.
+
+    The vehicle ids are assigned when the trips are scheduled.
+
+    Parameters
+    ----------
+    rng : numpy.random.Generator
+        The random number generator to use
+    first_vid : int
+        The id of the first departing vehicle (i.e., the number of pre-filled vehicles)
+    max_step : int
+        The maximum simulation step
+    step_length : float
+        The length of a simulation step
+    depart_method : str
+        The departure method to use
+    effective_depart_rate : float
+        The effective departure rate in vehicles per step
+    depart_probability : float
+        The departure probability per step
+    depart_flow : bool
+        Whether to spawn vehicles in a continuous flow (instead of limiting the total number of vehicles)
+    number_of_vehicles : int
+        The total number of vehicles (including the pre-filled vehicles) without a departure flow
+    desired_speed : float
+        The (mean) desired driving speed
+    speed_variation : float
+        The deviation from the desired driving speed
+    min_desired_speed : float
+        The minimum desired driving speed
+    max_desired_speed : float
+        The maximum desired driving speed
+    random_desired_speed : bool
+        Whether to use random desired driving speeds
+    depart_desired : bool
+        Whether to depart with the desired driving speed
+    random_depart_speed : bool
+        Whether to use random departure speeds
+
+    Returns
+    -------
+    dict
+        The mapping from column name to array of all trips (sorted by schedule time)
+        keys: [schedule_time, desired_speed, depart_speed, arrival_quantile]
+    """
+
+    steps = get_steps(max_step, step_length)
+    counts = get_schedule_counts(steps, rng, depart_method, effective_depart_rate, depart_probability)
+    if not depart_flow:
+        # limit the spawn by a maximum number of total vehicles
+        # i.e., no vehicles are scheduled once the limit is reached
+        scheduled_before = first_vid + np.cumsum(counts) - counts
+        counts[scheduled_before >= number_of_vehicles] = 0
+
+    schedule_time = np.repeat(steps, counts)
+    number_of_trips = len(schedule_time)
+    desired_speeds = get_desired_speed_np(
+        desired_speed=desired_speed,
+        rng=rng,
+        speed_variation=speed_variation,
+        min_desired_speed=min_desired_speed,
+        max_desired_speed=max_desired_speed,
+        random_desired_speed=random_desired_speed,
+        size=number_of_trips,
+    )
+    return {
+        'schedule_time': schedule_time,
+        'desired_speed': desired_speeds,
+        'depart_speed': get_depart_speed_np(
+            desired_speed=desired_speeds,
+            rng=rng,
+            depart_desired=depart_desired,
+            random_depart_speed=random_depart_speed,
+        ),
+        # the arrival position depends on the departure position and is thus chosen during the departure
+        'arrival_quantile': rng.random(number_of_trips),
+    }
+
+
+class Demand:
+    """
+    A collection of trips that are scheduled in the order of their schedule time.
+    """
+
+    def __init__(self, trips: dict):
+        """
+        Initialize a demand.
+
+        Parameters
+        ----------
+        trips : dict
+            The mapping from column name to array of all trips (sorted by schedule time)
+        """
+
+        self._trips = trips  # the columns of all trips
+        self._next = 0  # the index of the next trip to schedule
+
+    def __len__(self) -> int:
+        """
+        Return the number of trips.
+        """
+
+        return len(self._trips['schedule_time'])
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """
+        Return the values of all trips for a column.
+        """
+
+        return self._trips[column]
+
+    @property
+    def exhausted(self) -> bool:
+        """Return whether all trips have been scheduled."""
+
+        return self._next >= len(self)
+
+    def pop(self, step: float) -> dict:
+        """
+        Return all trips that are scheduled until the given step and were not returned before.
+
+        Parameters
+        ----------
+        step : float
+            The current simulation step
+
+        Returns
+        -------
+        dict : The mapping from column name to array of the trips
+        """
+
+        first = self._next
+        self._next = int(np.searchsorted(self._trips['schedule_time'], step, side='right'))
+        return {column: values[first:self._next] for column, values in self._trips.items()}
+
+
+class TripFile:
+    """
+    A collection of trips that is read lazily from a trip file in the order of the schedule time.
+
+    A trip file is either a CSV file or a NumPy file (.npy) containing a structured array.
+    Only the column depart (the schedule time) is required, all other columns are optional.
+    Missing columns and missing values (i.e., empty cells or NaN) are chosen by the simulator.
+    The file is read in chunks, thus only a small part of the trips is kept in memory.
+    When pickled (e.g., for a snapshot), only the name of the file and the number of scheduled trips are stored.
+    """
+
+    # the mapping from column name in the trip file to column name of the demand
+    COLUMNS = {
+        'id': 'vid',
+        'depart': 'schedule_time',
+        'desiredSpeed': 'desired_speed',
+        'departRamp': 'depart_ramp',
+        'departLane': 'depart_lane',
+        'departSpeed': 'depart_speed',
+        'arrivalPos': 'arrival_position',
+        'vClass': 'platooning',
+    }
+    # the mapping from vehicle class to whether the vehicle is capable of platooning
+    VEHICLE_CLASSES = {
+        'Vehicle': 0.0,
+        'PlatooningVehicle': 1.0,
+    }
+
+    def __init__(self, filename: str, chunk_size: int = 100000):
+        """
+        Initialize a trip file.
+
+        Parameters
+        ----------
+        filename : str
+            The name of the trip file
+        chunk_size : int, optional
+            The number of trips to read at once
+        """
+
+        self._filename = filename  # the name of the trip file
+        self._chunk_size = chunk_size  # the number of trips to read at once
+        self._skipped = 0  # the number of trips before the current chunk
+        try:
+            if filename.endswith(".npy"):
+                # memory-mapped, thus only the accessed chunks are read
+                data = np.load(filename, mmap_mode='r')
+                if data.dtype.names is None:
+                    sys.exit(f"ERROR [{__name__}]: The trip file {filename} does not contain a structured array!")
+                names = data.dtype.names
+                chunks = (data[start:start + chunk_size] for start in range(0, len(data), chunk_size))
+            else:
+                chunks = pd.read_csv(filename, chunksize=chunk_size, usecols=lambda name: name in self.COLUMNS)
+                names = pd.read_csv(filename, nrows=0).columns
+        except (OSError, ValueError) as e:
+            sys.exit(f"ERROR [{__name__}]: Could not read the trip file {filename}: {e}")
+        if 'depart' not in names:
+            sys.exit(f"ERROR [{__name__}]: The trip file {filename} does not contain the column depart!")
+        self._chunks = chunks  # the iterator of the remaining chunks
+        self._buffer = None  # the columns of the current chunk
+        self._next = 0  # the index of the next trip to schedule within the current chunk
+        self._last_schedule_time = -np.inf  # the schedule time of the last trip read
+        self._last_vid = -1  # the id of the last trip read
+        self._read_chunk()
+
+    def _convert_chunk(self, chunk) -> dict:
+        """
+        Convert a chunk of the trip file to columns of the demand.
+
+        Parameters
+        ----------
+        chunk : pandas.DataFrame or numpy.ndarray
+            The chunk of the trip file
+
+        Returns
+        -------
+        dict : The mapping from column name to array of the trips
+        """
+
+        names = chunk.dtype.names if isinstance(chunk, np.ndarray) else chunk.columns
+        trips = {}
+        for name, column in self.COLUMNS.items():
+            if name not in names:
+                trips[column] = np.full(len(chunk), np.nan)
+            elif name == 'vClass':
+                values = np.asarray(chunk[name])
+                if values.dtype.kind == 'S':
+                    values = np.char.decode(values)
+                values = pd.Series(values, dtype=object)
+                platooning = values.map(self.VEHICLE_CLASSES)
+                unknown = values.notna() & (values != "") & platooning.isna()
+                if unknown.any():
+                    sys.exit(f"ERROR [{__name__}]: Unknown vehicle class {values[unknown].iloc[0]} in the trip file {self._filename}!")
+                trips[column] = platooning.to_numpy(dtype=float)
+            else:
+                trips[column] = np.asarray(chunk[name], dtype=float)
+
+        schedule_time = trips['schedule_time']
+        if np.isnan(schedule_time).any():
+            sys.exit(f"ERROR [{__name__}]: The trip file {self._filename} contains trips without a departure time!")
+        if (np.diff(schedule_time, prepend=self._last_schedule_time) < 0).any():
+            sys.exit(f"ERROR [{__name__}]: The trips in the trip file {self._filename} are not sorted by departure time!")
+        vid = trips['vid'][~np.isnan(trips['vid'])]
+        if (np.diff(vid, prepend=self._last_vid) <= 0).any():
+            sys.exit(f"ERROR [{__name__}]: The ids in the trip file {self._filename} are not increasing!")
+        if len(schedule_time):
+            self._last_schedule_time = schedule_time[-1]
+        if len(vid):
+            self._last_vid = vid[-1]
+        return trips
+
+    def _read_chunk(self):
+        """
+        Read the next (non-empty) chunk of the trip file into the buffer.
+        """
+
+        if self._buffer is not None:
+            self._skipped += len(self._buffer['schedule_time'])
+        self._buffer = None
+        self._next = 0
+        for chunk in self._chunks:
+            if len(chunk):
+                self._buffer = self._convert_chunk(chunk)
+                return
+
+    def __getstate__(self) -> dict:
+        """
+        Return the state for pickling without the content of the file.
+        """
+
+        return {
+            'filename': self._filename,
+            'chunk_size': self._chunk_size,
+            'scheduled': self._skipped + self._next,
+        }
+
+    def __setstate__(self, state: dict):
+        """
+        Re-open the file and continue after the already scheduled trips.
+        """
+
+        self.__init__(state['filename'], state['chunk_size'])
+        # skip all trips that have been scheduled already
+        scheduled = state['scheduled']
+        while self._buffer is not None and scheduled >= len(self._buffer['schedule_time']):
+            scheduled -= len(self._buffer['schedule_time'])
+            self._read_chunk()
+        self._next = scheduled
+
+    @property
+    def exhausted(self) -> bool:
+        """Return whether all trips have been scheduled."""
+
+        return self._buffer is None
+
+    def pop(self, step: float) -> dict:
+        """
+        Return all trips that are scheduled until the given step and were not returned before.
+
+        Parameters
+        ----------
+        step : float
+            The current simulation step
+
+        Returns
+        -------
+        dict : The mapping from column name to array of the trips
+        """
+
+        parts = []
+        while self._buffer is not None:
+            first = self._next
+            self._next = int(np.searchsorted(self._buffer['schedule_time'], step, side='right'))
+            parts.append({column: values[first:self._next] for column, values in self._buffer.items()})
+            if self._next < len(self._buffer['schedule_time']):
+                break
+            # the trips of the next chunk might be scheduled until this step as well
+            self._read_chunk()
+        if not parts:
+            return {column: np.empty(0) for column in self.COLUMNS.values()}
+        return {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
@@ -19,6 +19,13 @@
 
 from enum import Enum
 
+import numpy as np
+
+from plafosim.platoon_role import PlatoonRole
+
+# the emitted pollutants (in the order of the emission traces)
+POLLUTANTS = ["CO", "CO2", "HC", "NOx", "PMx", "fuel"]
+
 # emission factors of the HBEFA3 model
 # see https://sumo.dlr.de/docs/Models/Emissions/HBEFA3-based.html
 # CO - the total carbon monoxide (CO) emission in mg
@@ -60,6 +67,36 @@ class EmissionClass(Enum):
 
         return EMISSION_FACTORS[self.name]
 
+    @property
+    def emission_factor_matrix(self) -> np.ndarray:
+        """
+        Return the emission factors of the emission class as matrix.
+
+        Returns
+        -------
+        numpy.ndarray : The emission factors of all pollutants
+            shape: (pollutants, factors)
+        """
+
+        return np.array([self.emission_factors[pollutant] for pollutant in POLLUTANTS])
+
+    @property
+    def emission_scales(self) -> np.ndarray:
+        """
+        Return the scales normalizing the emissions of the emission class to mg/s (and ml/s for fuel).
+
+        As the functions are defining emissions in g/hour, the results are normed by 3.6 (seconds in an hour/1000).
+        For fuel, the result is additionally normed by the density of the fuel.
+
+        Returns
+        -------
+        numpy.ndarray : The scales of all pollutants
+        """
+
+        scale = 3.6
+        fuel_scale = scale * (836.0 if self.is_diesel else 742.0)
+        return np.array([fuel_scale if pollutant == "fuel" else scale for pollutant in POLLUTANTS])
+
     @property
     def is_diesel(self) -> bool:
         """
@@ -73,3 +110,93 @@ class EmissionClass(Enum):
         split = self.name.split("_")
         assert len(split) == 3
         return split[1] == "D"
+
+
+def air_drag_change_np(platoon_role: np.ndarray, is_last: np.ndarray) -> np.ndarray:
+    """
+    Return the change of the air drag due to platooning, NumPy variant.
+
+    The values are based on
+    Charles-Henri Bruneau, Khodor Khadra and Iraj Mortazavi,
+    "Flow analysis of square-back simplified vehicles in platoon,"
+    International Journal of Heat and Fluid Flow, vol. 66, pp. 43–59,
+    August 2017. Table 5: d = L, vehicle length = 5m, distance = 5m
+
+    Parameters
+    ----------
+    platoon_role : numpy.ndarray
+        The platoon roles of the vehicles (codes of PlatoonRole)
+    is_last : numpy.ndarray
+        Whether the vehicles are the last vehicles of their platoons
+
+    Returns
+    -------
+    numpy.ndarray : The relative changes of the air drag
+    """
+
+    air_drag_change = np.zeros(len(platoon_role))
+    # savings by followers
+    air_drag_change[platoon_role == PlatoonRole.LEADER.value] = 0.12
+    # savings by leader/front vehicles
+    follower = platoon_role == PlatoonRole.FOLLOWER.value
+    air_drag_change[follower & is_last] = 0.23  # last vehicle
+    air_drag_change[follower & ~is_last] = 0.27  # in between
+    return air_drag_change
+
+
+def compute_emissions_np(
+    acceleration: np.ndarray,
+    speed: np.ndarray,
+    emission_class: np.ndarray,
+    emission_factor: np.ndarray,
+    step_length: float,
+) -> np.ndarray:
+    """
+    Calculate the emitted pollutant amount using the given speed and acceleration based on the HBEFA3 model, NumPy variant.
+
+    All pollutants of all vehicles of an emission class are computed at once.
+    The resulting amounts are given in mg (and ml for fuel) within the step.
+    Negative acceleration results directly in zero emission.
+
+    Parameters
+    ----------
+    acceleration : numpy.ndarray
+        The current accelerations of the vehicles
+    speed : numpy.ndarray
+        The current speeds of the vehicles
+    emission_class : numpy.ndarray
+        The emission classes of the vehicles (codes of EmissionClass)
+    emission_factor : numpy.ndarray
+        The factors applied to the emissions of the vehicles (e.g., due to reduced air drag)
+    step_length : float
+        The length of a simulation step
+
+    Returns
+    -------
+    numpy.ndarray : The emitted amounts of all pollutants
+        shape: (vehicles, pollutants)
+    """
+
+    emissions = np.zeros((len(speed), len(POLLUTANTS)))
+    for ec in EmissionClass:
+        mask = emission_class == ec.value
+        if not mask.any():
+            continue
+        f = ec.emission_factor_matrix.T
+        a = acceleration[mask, np.newaxis]
+        v = speed[mask, np.newaxis]
+        emission = np.maximum(
+            (
+                f[0]
+                + f[1] * a * v
+                + f[2] * a * a * v
+                + f[3] * v
+                + f[4] * v * v
+                + f[5] * v * v * v
+            )
+            / ec.emission_scales,
+            0.0,
+        )
+        emission[a[:, 0] < 0] = 0.0
+        emissions[mask] = emission * emission_factor[mask, np.newaxis] * step_length
+    return emissions
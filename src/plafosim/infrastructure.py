@@ -22,7 +22,6 @@ import sys
 from typing import TYPE_CHECKING
 
 from plafosim.algorithms import *  # noqa 401
-from plafosim.platooning_vehicle import PlatooningVehicle
 
 if TYPE_CHECKING:
     from plafosim.simulator import Simulator  # noqa 401
@@ -128,23 +127,28 @@ class Infrastructure:
                 self._formation_algorithm.do_formation()
                 self._last_formation_step = step
 
-    # TODO currently not used --> remove?
-    def _get_neighbors(self):
-        neighbors = []
-        for vehicle in self._simulator._vehicles.values():
-
-            # filter vehicles that are technically not able to do platooning
-            if not isinstance(vehicle, PlatooningVehicle):
-                continue
+    def _next_action_step(self) -> float:
+        """
+        Return the step at which the next action of the infrastructure is due.
 
-            # filter based on communication range
-            communication_range = self._simulator.road_length
-            if abs(vehicle.position - self.position) > communication_range:
-                continue
+        Returns
+        -------
+        float : The step of the next action or None if there is no action to trigger
+        """
 
-            neighbors.append(vehicle)
+        if self._formation_algorithm:
+            return self._last_formation_step + self._execution_interval
+        return None
 
-        return neighbors
+    # TODO currently not used --> remove?
+    def _get_neighbors(self):
+        index = self._simulator._get_neighbor_index()
+        # filter vehicles that are technically not able to do platooning (i.e., not within the index)
+        # filter based on communication range
+        communication_range = self._simulator.road_length
+        slots = index.within(self.position, communication_range)
+        vids = self._simulator._vehicle_state.columns["vid"][slots]
+        return [self._simulator._vehicles[vid] for vid in vids.tolist()]
 
     def finish(self):
         """
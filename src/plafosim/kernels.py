@@ -0,0 +1,217 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import logging
+from collections import namedtuple
+
+import numpy as np
+
+LOG = logging.getLogger(__name__)
+
+# numba is optional and only used for the jit compiled kernels
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# The elementwise math of the mobility model.
+#
+# Every kernel is written for scalars, which also works for NumPy arrays.
+# With NumPy, every arithmetic sub-expression allocates a temporary array.
+# With numba, every kernel is compiled into a single fused loop (ufunc) instead.
+# Both variants perform the same floating point operations in the same order and thus yield bit-identical results.
+
+Kernels = namedtuple(
+    "Kernels",
+    [
+        "name",
+        "safe_speed",
+        "acc_speed",
+        "clamp_speed",
+        "gap_safe",
+        "clip_position",
+    ],
+)
+
+
+def _safe_speed(
+    predecessor_speed: float,
+    speed: float,
+    max_deceleration: float,
+    predecessor_gap: float,
+    desired_gap: float,
+    desired_headway_time: float,
+) -> float:
+    """
+    Compute the safe speed according to the Krauss model.
+
+    See mobility.safe_speed_df for details.
+    """
+
+    # average breaking time
+    b = max_deceleration
+    tau_b = ((predecessor_speed + speed) / 2) / b
+    # assumed reaction time
+    tau = desired_headway_time
+
+    return predecessor_speed + (
+        (predecessor_gap - desired_gap)
+        / (tau_b + tau)
+    )
+
+
+def _acc_speed(
+    predecessor_speed: float,
+    speed: float,
+    acc_lambda: float,
+    predecessor_gap: float,
+    desired_gap: float,
+    desired_headway_time: float,
+    step_length: float,
+) -> float:
+    """
+    Compute the new speed for ACC vehicles.
+
+    See mobility.speed_acc_df for details.
+    """
+
+    acceleration = (
+        predecessor_speed
+        - speed
+        - acc_lambda * (desired_gap - predecessor_gap)
+    ) / desired_headway_time
+
+    return speed + acceleration * step_length
+
+
+def _clamp_speed(new_speed: float, lower: float, upper: float) -> float:
+    """
+    Clamp (two-way limit) a new speed value to the given bounds.
+
+    See mobility.clamp_speed for details.
+    """
+
+    return np.maximum(np.minimum(new_speed, upper), lower)
+
+
+def _gap_safe(
+    front_position: float,
+    front_speed: float,
+    front_max_deceleration: float,
+    front_length: float,
+    back_position: float,
+    back_speed: float,
+    back_max_acceleration: float,
+    back_min_gap: float,
+    step_length: float,
+) -> bool:
+    """
+    Return whether the gap between the front and back vehicle is safe.
+
+    See mobility.is_gap_safe for details.
+    """
+
+    next_front_position = (
+        front_position
+        + (front_speed - front_max_deceleration * step_length) * step_length
+    )
+    next_back_position = (
+        back_position
+        + (back_speed + back_max_acceleration * step_length) * step_length
+    )
+    return (next_front_position - front_length) > next_back_position + back_min_gap
+
+
+def _clip_position(position: float, arrival_position: float) -> float:
+    """
+    Clip a position to the road (i.e., by arrival position).
+
+    See mobility.clip_position for details.
+    """
+
+    # same as np.clip(position, 0, arrival_position)
+    return np.minimum(np.maximum(position, 0), arrival_position)
+
+
+NUMPY_KERNELS = Kernels(
+    name="numpy",
+    safe_speed=_safe_speed,
+    acc_speed=_acc_speed,
+    clamp_speed=_clamp_speed,
+    gap_safe=_gap_safe,
+    clip_position=_clip_position,
+)
+
+
+def _jit(function):
+    """
+    Compile a scalar kernel into a (lazily typed) NumPy ufunc.
+    """
+
+    return numba.vectorize(nopython=True, cache=True)(function)
+
+
+_NUMBA_KERNELS = None
+
+
+def jit_available() -> bool:
+    """
+    Return whether jit compiled kernels are available (i.e., numba is installed).
+    """
+
+    return numba is not None
+
+
+def get_kernels(name: str) -> Kernels:
+    """
+    Return the kernels of the given kind.
+
+    The numba kernels are compiled on first use (and cached on disk).
+    If numba is not available, the NumPy kernels are returned instead.
+
+    Parameters
+    ----------
+    name : str
+        The kind of kernels (i.e., numpy or numba)
+
+    Returns
+    -------
+    Kernels : The kernels to use for the mobility computations
+    """
+
+    global _NUMBA_KERNELS
+
+    assert name in ("numpy", "numba")
+
+    if name == "numpy":
+        return NUMPY_KERNELS
+    if not jit_available():
+        LOG.warning("numba is not installed, falling back to NumPy kernels!")
+        return NUMPY_KERNELS
+    if _NUMBA_KERNELS is None:
+        LOG.debug(f"Compiling mobility kernels with numba {numba.__version__}")
+        _NUMBA_KERNELS = Kernels(
+            name="numba",
+            safe_speed=_jit(_safe_speed),
+            acc_speed=_jit(_acc_speed),
+            clamp_speed=_jit(_clamp_speed),
+            gap_safe=_jit(_gap_safe),
+            clip_position=_jit(_clip_position),
+        )
+    return _NUMBA_KERNELS
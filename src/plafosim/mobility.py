@@ -23,6 +23,7 @@ from enum import Enum
 import numpy as np
 import pandas as pd
 
+from plafosim.kernels import NUMPY_KERNELS, Kernels
 from plafosim.util import assert_index_equal
 
 # misc constants
@@ -34,6 +35,8 @@ DUMMY_PREDECESSOR = pd.Series(
 DUMMY_SUCCESSOR = pd.Series(
     {"speed": 0, "position": -HIGHVAL, "desired_headway_time": 0}, name=-1
 )
+# lane change reasons of the NumPy variant, indexed by reason code
+LC_REASONS = (np.nan, "speedGain", "keepRight")
 
 
 class CF_Model(Enum):
@@ -117,6 +120,40 @@ def is_gap_safe(
     return (next_front_position - front_length) > next_back_position + back_min_gap
 
 
+def is_gap_safe_np(
+    front_position: np.ndarray,
+    front_speed: np.ndarray,
+    front_max_deceleration: np.ndarray,
+    front_length: np.ndarray,
+    back_position: np.ndarray,
+    back_speed: np.ndarray,
+    back_max_acceleration: np.ndarray,
+    back_min_gap: np.ndarray,
+    step_length: float,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> np.ndarray:
+    """
+    Return whether the gaps between the front and back vehicles are safe, NumPy variant.
+
+    See is_gap_safe for details.
+    All parameters may be arrays of any (broadcastable) shape.
+    """
+
+    assert step_length > 0
+
+    return kernels.gap_safe(
+        front_position,
+        front_speed,
+        front_max_deceleration,
+        front_length,
+        back_position,
+        back_speed,
+        back_max_acceleration,
+        back_min_gap,
+        step_length,
+    )
+
+
 # speed update components
 
 
@@ -282,15 +319,10 @@ def lane_predecessors(vdf: pd.DataFrame, max_lane: int) -> pd.DataFrame:
     assert max_lane >= 0
 
     vdf = vdf.reset_index()
+    predecessors = lane_predecessors_np(vdf.lane.values, max_lane)
     return pd.DataFrame(
-        {
-            lane_nr: vdf.vid.where(vdf.lane == lane_nr)
-            .ffill()
-            .shift()
-            .fillna(-1)
-            .astype(int)
-            for lane_nr in range(max_lane + 1)
-        },
+        np.where(predecessors >= 0, vdf.vid.values[predecessors], -1),
+        columns=range(max_lane + 1),
     ).set_index(vdf.vid)
 
 
@@ -318,15 +350,10 @@ def lane_successors(vdf: pd.DataFrame, max_lane: int) -> pd.DataFrame:
     assert max_lane >= 0
 
     vdf = vdf.reset_index()
+    successors = lane_successors_np(vdf.lane.values, max_lane)
     return pd.DataFrame(
-        {
-            lane_nr: vdf.vid.where(vdf.lane == lane_nr)
-            .bfill()
-            .shift(-1)
-            .fillna(-1)
-            .astype(int)
-            for lane_nr in range(max_lane + 1)
-        },
+        np.where(successors >= 0, vdf.vid.values[successors], -1),
+        columns=range(max_lane + 1),
     ).set_index(vdf.vid)
 
 
@@ -647,6 +674,728 @@ def compute_lane_changes(
     return vdf_tmp[['lane', 'reason']]
 
 
+# NumPy variants
+#
+# The following functions work on plain NumPy arrays instead of pandas objects.
+# Vehicles are given as a dict of equally long arrays (i.e., columns) whose rows
+# are sorted by position and lane (descending).
+# Other vehicles (e.g., predecessors, successors, leaders) are referenced by
+# their row, a row of -1 means there is no such vehicle.
+# Vehicles of independent simulations (i.e., replications) can be stacked into one dict
+# by adding a replication column, in which case the rows are sorted by replication first.
+# Vehicles never see vehicles of other replications as neighbors.
+
+
+def _take(values: np.ndarray, rows: np.ndarray, default: float) -> np.ndarray:
+    """
+    Return the values of the given rows, using a default value for rows of -1.
+    """
+
+    return np.where(rows >= 0, values[rows], default)
+
+
+def safe_speed_np(
+    predecessor_speed: np.ndarray,
+    speed: np.ndarray,
+    max_deceleration: np.ndarray,
+    predecessor_gap: np.ndarray,
+    desired_gap: np.ndarray,
+    desired_headway_time: np.ndarray,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> np.ndarray:
+    """
+    Compute the safe speed according to the Krauss model, NumPy variant.
+
+    See safe_speed_df for details.
+    """
+
+    assert (predecessor_speed >= 0).all()
+    assert (speed >= 0).all()
+    assert (max_deceleration >= 0).all()
+    assert (desired_gap > 0).all()
+    assert (desired_headway_time >= 0).all()
+
+    return kernels.safe_speed(
+        predecessor_speed,
+        speed,
+        max_deceleration,
+        predecessor_gap,
+        desired_gap,
+        desired_headway_time,
+    )
+
+
+def speed_acc_np(
+    predecessor_speed: np.ndarray,
+    speed: np.ndarray,
+    acc_lambda: np.ndarray,
+    predecessor_gap: np.ndarray,
+    desired_gap: np.ndarray,
+    desired_headway_time: np.ndarray,
+    step_length: float,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> np.ndarray:
+    """
+    Compute new speed for ACC vehicles, NumPy variant.
+
+    See speed_acc_df for details.
+    """
+
+    assert (predecessor_speed >= 0).all()
+    assert (speed >= 0).all()
+    assert (desired_gap > 0).all()
+    assert (desired_headway_time >= 0).all()
+    assert step_length > 0
+
+    return kernels.acc_speed(
+        predecessor_speed,
+        speed,
+        acc_lambda,
+        predecessor_gap,
+        desired_gap,
+        desired_headway_time,
+        step_length,
+    )
+
+
+def speed_bounds_np(vehicles: dict, step_length: float) -> tuple:
+    """
+    Return the bounds for clamping (two-way limiting) new speed values to vehicle's maximum, NumPy variant.
+
+    The bounds only depend on the vehicles themselves and can thus be shared by all candidate speeds.
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        The lower and the upper bounds
+    """
+
+    speed = vehicles["speed"]
+    assert (vehicles["max_speed"] > 0).all()
+    assert (speed >= 0).all()
+    assert (vehicles["max_acceleration"] >= 0).all()
+    assert (vehicles["max_deceleration"] >= 0).all()
+    assert step_length > 0
+
+    upper = np.minimum(vehicles["max_speed"], speed + vehicles["max_acceleration"] * step_length)
+    # do not drive backwards
+    lower = np.maximum(speed - vehicles["max_deceleration"] * step_length, 0)
+    return lower, upper
+
+
+def sort_order_np(
+    position: np.ndarray,
+    lane: np.ndarray,
+    tiebreak: np.ndarray,
+) -> np.ndarray:
+    """
+    Return the permutation sorting the rows by position and lane (descending), NumPy variant.
+
+    Rows with equal position and lane are sorted by the tiebreak (ascending).
+    The (stable) sort runs in close to linear time if the rows are already (nearly) sorted,
+    e.g., when they keep the order of the previous simulation step.
+
+    Parameters
+    ----------
+    position : numpy.ndarray
+        The positions of the vehicles
+    lane : numpy.ndarray
+        The lanes of the vehicles
+    tiebreak : numpy.ndarray
+        The unique keys to resolve rows with equal position and lane
+
+    Returns
+    -------
+    numpy.ndarray
+        The permutation of the rows
+    """
+
+    if (position[:-1] > position[1:]).all():
+        # the order did not change
+        return np.arange(len(position))
+
+    order = np.argsort(-position, kind="stable")
+    sorted_position = position[order]
+    if (sorted_position[:-1] == sorted_position[1:]).any():
+        # resolve equal positions by lane and tiebreak
+        order = np.lexsort((tiebreak, -lane, -position))
+    return order
+
+
+def _lanes_to_update(
+    lane: np.ndarray,
+    max_lane: int,
+    previous: np.ndarray,
+    previous_lane: np.ndarray,
+) -> np.ndarray:
+    """
+    Return the lanes whose neighbor map entries are affected by lane changes.
+    """
+
+    if previous is None:
+        return np.arange(max_lane + 1)
+    assert len(previous_lane) == len(lane)
+    changed = lane != previous_lane
+    return np.union1d(lane[changed], previous_lane[changed])
+
+
+def _on_lanes(lane: np.ndarray, lanes: np.ndarray, other: int) -> np.ndarray:
+    """
+    Return a (lanes, vehicles) matrix containing the row of each vehicle for its lane and the other value elsewhere.
+
+    The lanes are the first axis to keep the subsequent accumulation along the vehicles contiguous in memory.
+    """
+
+    rows = np.arange(len(lane), dtype=np.int32)
+    return np.where(lane[np.newaxis, :] == lanes[:, np.newaxis], rows[np.newaxis, :], np.int32(other))
+
+
+def _separate_groups(neighbors: np.ndarray, lanes: np.ndarray, group: np.ndarray):
+    """
+    Remove neighbors of other groups (e.g., replications) from the given lanes of a neighbor map (in place).
+
+    Since the rows are sorted by group first, a neighbor of another group means that there is no neighbor within the own group.
+    """
+
+    found = neighbors[:, lanes]
+    other = (found >= 0) & (group[found] != group[:, np.newaxis])
+    neighbors[:, lanes] = np.where(other, np.int32(-1), found)
+
+
+def lane_predecessors_np(
+    lane: np.ndarray,
+    max_lane: int,
+    previous: np.ndarray = None,
+    previous_lane: np.ndarray = None,
+    group: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Find the current (potential) predecessor for each lane and each vehicle, NumPy variant.
+
+    All lanes are computed in a single pass by accumulating the last row seen on each lane.
+    If the map for the previous lanes of the same rows is given,
+    only the entries for lanes affected by lane changes are re-computed.
+
+    Preconditions:
+    - rows are sorted by group (if given), and position and lane (descending)
+
+    Parameters
+    ----------
+    lane : numpy.ndarray
+        The lanes of the vehicles
+    max_lane : int
+        The largest lane id
+    previous : numpy.ndarray, optional
+        The map of predecessors for the previous lanes
+    previous_lane : numpy.ndarray, optional
+        The previous lanes of the vehicles
+    group : numpy.ndarray, optional
+        The groups (e.g., replications) of the vehicles, which do not see each other
+
+    Returns
+    -------
+    numpy.ndarray
+        The rows of the predecessors (-1 for none)
+        shape: (vehicles, lanes)
+    """
+
+    assert max_lane >= 0
+
+    lanes = _lanes_to_update(lane, max_lane, previous, previous_lane)
+    if previous is None:
+        predecessors = np.empty((max_lane + 1, len(lane)), dtype=np.int32).T
+    elif len(lanes) == 0:
+        return previous
+    else:
+        predecessors = previous.copy(order="K")
+
+    if len(lane) > 0:
+        # the last row on each lane up to (and including) each row
+        last_seen = np.maximum.accumulate(_on_lanes(lane, lanes, -1), axis=1).T
+        predecessors[0, lanes] = -1
+        predecessors[1:, lanes] = last_seen[:-1]
+        if group is not None:
+            _separate_groups(predecessors, lanes, group)
+    return predecessors
+
+
+def lane_successors_np(
+    lane: np.ndarray,
+    max_lane: int,
+    previous: np.ndarray = None,
+    previous_lane: np.ndarray = None,
+    group: np.ndarray = None,
+) -> np.ndarray:
+    """
+    Find the current (potential) successor for each lane and each vehicle, NumPy variant.
+
+    All lanes are computed in a single pass by accumulating the next row seen on each lane.
+    If the map for the previous lanes of the same rows is given,
+    only the entries for lanes affected by lane changes are re-computed.
+
+    Preconditions:
+    - rows are sorted by group (if given), and position and lane (descending)
+
+    Parameters
+    ----------
+    lane : numpy.ndarray
+        The lanes of the vehicles
+    max_lane : int
+        The largest lane id
+    previous : numpy.ndarray, optional
+        The map of successors for the previous lanes
+    previous_lane : numpy.ndarray, optional
+        The previous lanes of the vehicles
+    group : numpy.ndarray, optional
+        The groups (e.g., replications) of the vehicles, which do not see each other
+
+    Returns
+    -------
+    numpy.ndarray
+        The rows of the successors (-1 for none)
+        shape: (vehicles, lanes)
+    """
+
+    assert max_lane >= 0
+
+    lanes = _lanes_to_update(lane, max_lane, previous, previous_lane)
+    if previous is None:
+        successors = np.empty((max_lane + 1, len(lane)), dtype=np.int32).T
+    elif len(lanes) == 0:
+        return previous
+    else:
+        successors = previous.copy(order="K")
+
+    if len(lane) > 0:
+        # the next row on each lane from (and including) each row
+        next_seen = np.minimum.accumulate(_on_lanes(lane, lanes, len(lane))[:, ::-1], axis=1)[:, ::-1].T
+        next_seen = np.where(next_seen == len(lane), np.int32(-1), next_seen)
+        successors[:-1, lanes] = next_seen[1:]
+        successors[-1, lanes] = -1
+        if group is not None:
+            _separate_groups(successors, lanes, group)
+    return successors
+
+
+def _model_speeds_np(
+    vehicles: dict,
+    rows: np.ndarray,
+    predecessor: np.ndarray,
+    desired_gap: np.ndarray,
+    step_length: float,
+    kernels: Kernels,
+) -> np.ndarray:
+    """
+    Compute the (unclamped) speeds of the cf models for the given rows and (potential) predecessors.
+
+    Rows of CACC vehicles keep their current speed, since they depend on their leader's speed.
+    Rows and predecessors may be of any (but the same) shape, e.g., one set of predecessors per candidate lane.
+    """
+
+    cf_model = vehicles["cf_model"][rows]
+    speed = vehicles["speed"][rows]
+    predecessor_speed = _take(vehicles["speed"], predecessor, HIGHVAL)
+    predecessor_gap = _take(vehicles["rear_position"], predecessor, HIGHVAL) - vehicles["position"][rows]
+    desired_gap = desired_gap[rows]
+    desired_headway_time = vehicles["desired_headway_time"][rows]
+    # HIGHVAL
+    assert (predecessor_gap[predecessor == -1] > 0).all()
+
+    m_human = cf_model == CF_Model.HUMAN.value
+    m_acc = cf_model == CF_Model.ACC.value
+
+    # apply models
+    new_speed = speed.copy()
+    new_speed[m_human] = safe_speed_np(
+        predecessor_speed=predecessor_speed[m_human],
+        speed=speed[m_human],
+        max_deceleration=vehicles["max_deceleration"][rows][m_human],
+        predecessor_gap=predecessor_gap[m_human],
+        desired_gap=desired_gap[m_human],
+        desired_headway_time=desired_headway_time[m_human],
+        kernels=kernels,
+    )
+    new_speed[m_acc] = speed_acc_np(
+        predecessor_speed=predecessor_speed[m_acc],
+        speed=speed[m_acc],
+        acc_lambda=vehicles["acc_lambda"][rows][m_acc],
+        predecessor_gap=predecessor_gap[m_acc],
+        desired_gap=desired_gap[m_acc],
+        desired_headway_time=desired_headway_time[m_acc],
+        step_length=step_length,
+        kernels=kernels,
+    )
+    return new_speed
+
+
+def _final_speeds_np(
+    model_speed: np.ndarray,
+    vehicles: dict,
+    bounds: tuple,
+    kernels: Kernels,
+) -> np.ndarray:
+    """
+    Derive the speeds of CACC vehicles from their leaders and clamp all speeds.
+
+    The model speeds contain one row of speeds for all vehicles per candidate (last axis: vehicles).
+    """
+
+    m_cacc = vehicles["cf_model"] == CF_Model.CACC.value
+    new_speed = model_speed.copy()
+    # TODO: apply clamping only to human and ACC vehicles (not CACC)
+    new_speed[..., m_cacc] = model_speed[..., vehicles["leader_row"][m_cacc]]
+
+    # clamp speed by common constraints
+    lower, upper = bounds
+    new_speed = kernels.clamp_speed(new_speed, lower, upper)
+
+    assert not np.isnan(new_speed).any()
+    assert not (new_speed > HIGHRESULT).any()
+    assert not (new_speed < 0).any()
+
+    return new_speed
+
+
+def _desired_gap_np(vehicles: dict) -> np.ndarray:
+    """
+    Return the desired gap of the vehicles to their predecessors.
+    """
+
+    # using own speed instead of predecessor speed (like Krauss) here
+    return np.maximum(vehicles["min_gap"], vehicles["desired_headway_time"] * vehicles["speed"])
+
+
+def compute_new_speeds_np(
+    vehicles: dict,
+    predecessor: np.ndarray,
+    step_length: float,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> np.ndarray:
+    """
+    Compute the new speed for all vehicles in the simulation, NumPy variant.
+
+    See compute_new_speeds for details.
+
+    Parameters
+    ----------
+    vehicles : dict
+        The mapping from column name to array
+        keys: [position, speed, leader_row, ..]
+    predecessor : numpy.ndarray
+        The rows of the (potential) predecessors (-1 for none).
+        Multiple candidates can be computed at once by stacking them, i.e., shape (candidates, vehicles).
+    step_length : float
+        The length of a simulation step
+    kernels : Kernels, optional
+        The kernels to use for the elementwise math
+
+    Returns
+    -------
+    numpy.ndarray
+        The new speeds (in the shape of the predecessors)
+    """
+
+    assert step_length > 0
+
+    rows = np.broadcast_to(np.arange(len(vehicles["speed"])), predecessor.shape)
+    model_speed = _model_speeds_np(vehicles, rows, predecessor, _desired_gap_np(vehicles), step_length, kernels)
+    return _final_speeds_np(model_speed, vehicles, speed_bounds_np(vehicles, step_length), kernels)
+
+
+def compute_lane_changes_and_speeds_np(
+    vehicles: dict,
+    max_lane: int,
+    step_length: float,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> tuple:
+    """
+    Find desired and safe lane changes and compute the resulting new speeds, NumPy variant.
+
+    See compute_lane_changes for details on the lane changes.
+
+    This fuses the speed predictions for all candidate lanes and the final speed update:
+    Desired gaps and clamping bounds are computed only once,
+    the candidate speeds for the current, left, and right lanes are computed in one sweep,
+    and speeds are only re-computed for vehicles whose predecessor differs from all evaluated candidates.
+
+    Parameters
+    ----------
+    vehicles : dict
+        The mapping from column name to array
+        keys: [position, speed, lane, leader_row, ..]
+    max_lane : int
+        The largest lane id
+    step_length : float
+        The length of a simulation step
+    kernels : Kernels, optional
+        The kernels to use for the elementwise math
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        The new lanes, the lane change reasons (codes of LC_REASONS), and the new speeds
+    """
+
+    assert max_lane >= 0
+    assert step_length > 0
+
+    bounds = speed_bounds_np(vehicles, step_length)
+    lane, reason, model_speed = _lane_changes_and_model_speeds_np(vehicles, max_lane, step_length, bounds, kernels)
+    return lane, reason, _final_speeds_np(model_speed, vehicles, bounds, kernels)
+
+
+def compute_lane_changes_and_speeds_platoons_np(
+    vehicles: dict,
+    max_lane: int,
+    step_length: float,
+    kernels: Kernels = NUMPY_KERNELS,
+) -> tuple:
+    """
+    Find desired and safe lane changes and compute the resulting new speeds while treating platoons as rigid units, NumPy variant.
+
+    Platoon followers (CACC) are not considered individually but collapsed into their leader.
+    The leader thus represents the entire platoon (from its front position to the (effective) rear position of the platoon)
+    in the neighbor and gap computations, which uses the platoon's limits anyway.
+    The resulting lanes and speeds are expanded back to all members of a platoon.
+
+    In contrast to compute_lane_changes_and_speeds_np, other vehicles thus only see the platoon as a whole,
+    e.g., they do not consider gaps in between platoon members for lane changes.
+
+    Parameters
+    ----------
+    vehicles : dict
+        The mapping from column name to array
+        keys: [position, speed, lane, leader_row, ..]
+    max_lane : int
+        The largest lane id
+    step_length : float
+        The length of a simulation step
+    kernels : Kernels, optional
+        The kernels to use for the elementwise math
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        The new lanes, the lane change reasons (codes of LC_REASONS), and the new speeds
+    """
+
+    assert max_lane >= 0
+    assert step_length > 0
+
+    m_cacc = vehicles["cf_model"] == CF_Model.CACC.value
+    if not m_cacc.any():
+        return compute_lane_changes_and_speeds_np(vehicles, max_lane, step_length, kernels)
+
+    # collapse platoons into their leaders (which keeps the order of the vehicles)
+    units = np.flatnonzero(~m_cacc)
+    composite = {key: value[units] for key, value in vehicles.items()}
+    composite["leader_row"] = np.full(len(units), -1)
+    # the row of the unit (within the composite vehicles) for every vehicle
+    unit = np.cumsum(~m_cacc) - 1
+    unit[m_cacc] = unit[vehicles["leader_row"][m_cacc]]
+    assert (units[unit[m_cacc]] == vehicles["leader_row"][m_cacc]).all()
+
+    lane, reason, model_speed = _lane_changes_and_model_speeds_np(
+        composite,
+        max_lane,
+        step_length,
+        speed_bounds_np(composite, step_length),
+        kernels,
+    )
+
+    # expand the units to all vehicles (using the individual limits)
+    return lane[unit], reason[unit], _final_speeds_np(model_speed[unit], vehicles, speed_bounds_np(vehicles, step_length), kernels)
+
+
+def _lane_changes_and_model_speeds_np(
+    vehicles: dict,
+    max_lane: int,
+    step_length: float,
+    bounds: tuple,
+    kernels: Kernels,
+) -> tuple:
+    """
+    Find desired and safe lane changes and compute the resulting (unclamped) model speeds.
+
+    See compute_lane_changes_and_speeds_np for details.
+    """
+
+    assert max_lane >= 0
+    assert step_length > 0
+
+    rows = np.arange(len(vehicles["lane"]))
+    lane = vehicles["lane"].copy()
+    reason = np.zeros(len(lane), dtype=np.int64)
+    position = vehicles["position"]
+    speed = vehicles["speed"]
+    desired_headway_time = vehicles["desired_headway_time"]
+    rear_position = vehicles["rear_position"]
+    m_cacc = vehicles["cf_model"] == CF_Model.CACC.value
+    leader_cacc = vehicles["leader_row"][m_cacc]
+    assert (leader_cacc >= 0).all()
+    # the replications of stacked vehicles (if any)
+    group = vehicles.get("replication")
+
+    # common data for all candidates
+    desired_gap = _desired_gap_np(vehicles)
+    # the front of the desired gap to a predecessor
+    front = position + desired_headway_time * speed
+
+    def back_gap(successor: np.ndarray) -> np.ndarray:
+        return (
+            _take(position, successor, -HIGHVAL)
+            + _take(desired_headway_time, successor, 0) * _take(speed, successor, 0)
+            < rear_position
+        )
+
+    def model_speeds(predecessor: np.ndarray, candidates: list) -> np.ndarray:
+        # re-use the model speeds of already evaluated candidates with the same predecessor
+        model_speed = np.empty(len(rows))
+        missing = np.ones(len(rows), dtype=bool)
+        for candidate_predecessor, candidate_speed in candidates:
+            hit = missing & (predecessor == candidate_predecessor)
+            model_speed[hit] = candidate_speed[hit]
+            missing &= ~hit
+        if missing.any():
+            model_speed[missing] = _model_speeds_np(vehicles, rows[missing], predecessor[missing], desired_gap, step_length, kernels)
+        return model_speed
+
+    ## SPEED GAIN
+
+    # derive map of predecessors and successors
+    predecessor_map = lane_predecessors_np(lane, max_lane, group=group)
+    successor_map = lane_successors_np(lane, max_lane, group=group)
+
+    # derive lanes
+    left_lane = np.minimum(lane + 1, max_lane)
+    right_lane = np.maximum(lane - 1, 0)
+
+    # extract predecessor data for potential maneuvers
+    predecessor_current = predecessor_map[rows, lane]
+    predecessor_left = predecessor_map[rows, left_lane]
+    # the predecessor on the right lane might still change due to speed gain maneuvers
+    predecessor_right = predecessor_map[rows, right_lane]
+    assert len(np.unique(predecessor_current[predecessor_current != -1])) == np.count_nonzero(predecessor_current != -1)
+
+    # predict speed for potential maneuvers (all candidates at once)
+    predecessors = np.stack([predecessor_current, predecessor_left, predecessor_right])
+    model_speed = _model_speeds_np(
+        vehicles,
+        np.broadcast_to(rows, predecessors.shape),
+        predecessors,
+        desired_gap,
+        step_length,
+        kernels,
+    )
+    speed_current, speed_left = _final_speeds_np(model_speed[:2], vehicles, bounds, kernels)
+    candidates = list(zip(predecessors, model_speed))
+
+    # compute forwards and backwards gaps in other lanes
+    front_gap_left = front < _take(rear_position, predecessor_left, HIGHVAL)
+    back_gap_left = back_gap(successor_map[rows, left_lane])
+
+    # decide on maneuvers (speedGain first!)
+    speed_gain = (
+        (lane < max_lane)
+        & (speed_left > speed_current)
+        & back_gap_left
+        & front_gap_left
+        & ~m_cacc
+    )
+
+    # apply speed gain maneuver
+    lane[speed_gain] = left_lane[speed_gain]
+    reason[speed_gain] = LC_REASONS.index("speedGain")
+    # apply leader decisions
+    lane[m_cacc] = lane[leader_cacc]
+    reason[m_cacc] = reason[leader_cacc]
+
+    ## KEEP RIGHT
+
+    # update map of predecessors and successors (only for lanes with changes)
+    predecessor_map = lane_predecessors_np(lane, max_lane, predecessor_map, vehicles["lane"], group)
+    successor_map = lane_successors_np(lane, max_lane, successor_map, vehicles["lane"], group)
+    speed_gain_lane = lane.copy()
+
+    # derive lanes
+    right_lane = np.maximum(lane - 1, 0)
+
+    # extract predecessor data for potential maneuvers
+    predecessor_right = predecessor_map[rows, right_lane]
+    # NOTE: for improved performance, we take the old speed_current values (see compute_lane_changes)
+
+    # predict speed for potential maneuvers
+    model_speed_right = model_speeds(predecessor_right, candidates)
+    speed_right = _final_speeds_np(model_speed_right, vehicles, bounds, kernels)
+    candidates.append((predecessor_right, model_speed_right))
+
+    # compute forwards and backwards gaps in other lanes
+    front_gap_right = front < _take(rear_position, predecessor_right, HIGHVAL)
+    back_gap_right = back_gap(successor_map[rows, right_lane])
+
+    # decide on maneuvers (speedGain first!)
+    keep_right = (
+        (lane > 0)
+        & (speed_right >= speed_current)
+        & back_gap_right
+        & front_gap_right
+        & ~speed_gain
+        & ~m_cacc
+    )
+
+    # apply keep right maneuver
+    lane[keep_right] = right_lane[keep_right]
+    reason[keep_right] = LC_REASONS.index("keepRight")
+    # apply leader decisions
+    lane[m_cacc] = lane[leader_cacc]
+    reason[m_cacc] = reason[leader_cacc]
+
+    # vehicles are only allowed to perform one lane change
+    assert not (speed_gain & keep_right).any()
+
+    ## SPEED UPDATE
+
+    # update map of predecessors (only for lanes with changes)
+    predecessor_map = lane_predecessors_np(lane, max_lane, predecessor_map, speed_gain_lane, group)
+    predecessor = predecessor_map[rows, lane]
+    assert len(np.unique(predecessor[predecessor != -1])) == np.count_nonzero(predecessor != -1)
+
+    # compute the final speed (mostly re-using the candidates)
+    return lane, reason, model_speeds(predecessor, candidates)
+
+
+def stack_replications_np(replications: list) -> tuple:
+    """
+    Stack the vehicles of independent simulations (i.e., replications) into a single set of vehicles, NumPy variant.
+
+    The vehicles of every replication keep their order and get the index of their replication as additional column.
+    References to other vehicles (i.e., leader_row) are shifted accordingly.
+
+    Parameters
+    ----------
+    replications : list
+        The vehicles of every replication as mapping from column name to array
+        keys: [position, speed, lane, leader_row, ..]
+
+    Returns
+    -------
+    tuple(dict, numpy.ndarray)
+        The stacked vehicles and the first row of every replication within them
+    """
+
+    assert replications
+
+    sizes = np.array([len(vehicles["lane"]) for vehicles in replications])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]])
+    stacked = {key: np.concatenate([vehicles[key] for vehicles in replications]) for key in replications[0]}
+    stacked["leader_row"] = np.concatenate([
+        np.where(vehicles["leader_row"] >= 0, vehicles["leader_row"] + offset, -1)
+        for vehicles, offset in zip(replications, offsets)
+    ])
+    stacked["replication"] = np.repeat(np.arange(len(replications)), sizes)
+    return stacked, offsets
+
+
 # Stuff to remove
 #
 # Just temporary helpers for migration to fully vectorized code.
@@ -779,6 +1528,35 @@ def update_position(vdf: pd.DataFrame, step_length: float) -> pd.DataFrame:
     return vdf
 
 
+def update_position_np(vehicles: dict, step_length: float, kernels: Kernels = NUMPY_KERNELS) -> np.ndarray:
+    """
+    Compute the updated position of vehicles, NumPy variant.
+
+    See update_position for details.
+
+    Parameters
+    ----------
+    vehicles : dict
+        The mapping from column name to array
+        keys: [position, speed, arrival_position, ..]
+    step_length : float
+        The length of the simulated step
+    kernels : Kernels, optional
+        The kernels to use for the elementwise math
+
+    Returns
+    -------
+    numpy.ndarray
+        The new positions
+    """
+
+    assert step_length > 0
+
+    position = vehicles["position"] + (vehicles["speed"] * step_length)
+    # do not move further than arrival position
+    return kernels.clip_position(position, vehicles["arrival_position"])
+
+
 def get_crashed_vehicles(vdf: pd.DataFrame) -> list:
     """
     Return the list of crashed vehicles' ids.
@@ -832,3 +1610,57 @@ def get_crashed_vehicles(vdf: pd.DataFrame) -> list:
     crash = crash_in_back | crash_in_front
 
     return list(sorted(crash[crash].index.values))
+
+
+def get_crashed_vehicles_np(
+    position: np.ndarray,
+    rear_position: np.ndarray,
+    lane: np.ndarray,
+    max_lane: int,
+) -> np.ndarray:
+    """
+    Return which vehicles crashed, NumPy variant.
+
+    A vehicle crashed if it touches the rear of its predecessor on the same lane or its successor touches its rear.
+    In contrast to get_crashed_vehicles, the vehicles are neither re-sorted nor grouped by lane
+    but compared to their predecessors from a single pass over the given order.
+    Only if vehicles passed each other within a lane (e.g., after moving them), the rows are re-sorted.
+
+    Preconditions:
+    - rows are (mostly) sorted by position and lane (descending), e.g., in the order of the current step
+
+    Parameters
+    ----------
+    position : numpy.ndarray
+        The positions of the vehicles
+    rear_position : numpy.ndarray
+        The rear positions of the vehicles
+    lane : numpy.ndarray
+        The lanes of the vehicles
+    max_lane : int
+        The largest lane id
+
+    Returns
+    -------
+    numpy.ndarray
+        Whether each vehicle crashed
+    """
+
+    crashed = np.zeros(len(lane), dtype=bool)
+    if len(lane) < 2:
+        return crashed
+
+    predecessor = lane_predecessors_np(lane, max_lane)[np.arange(len(lane)), lane]
+    rows = np.flatnonzero(predecessor >= 0)
+    if (position[predecessor[rows]] < position[rows]).any():
+        # vehicles passed each other within a lane, restore the order
+        order = np.argsort(-position, kind="stable")
+        crashed[order] = get_crashed_vehicles_np(position[order], rear_position[order], lane[order], max_lane)
+        return crashed
+
+    # I touch the back of the vehicle in front of me
+    crash_in_front = position[rows] >= rear_position[predecessor[rows]]
+    crashed[rows[crash_in_front]] = True
+    # the vehicle behind me touches my back
+    crashed[predecessor[rows[crash_in_front]]] = True
+    return crashed
@@ -32,6 +32,15 @@ class Platoon:
     A collection of parameters for a specific platoon.
     """
 
+    __slots__ = (
+        "_platoon_id",
+        "_formation",
+        "_desired_speed",
+        "_max_speed",
+        "_max_acceleration",
+        "_max_deceleration",
+    )
+
     def __init__(
         self,
         platoon_id: int,
@@ -281,6 +290,7 @@ class Platoon:
         old_desired_speed = self._desired_speed
         self._desired_speed = min(mean([v._desired_speed for v in self._formation]), self.max_speed)
         LOG.debug(f"Updated platoon {self.platoon_id}'s desired speed to {self.desired_speed} (from {old_desired_speed})")
+        self.update_member_state()
 
     def update_limits(self):
         """
@@ -290,6 +300,34 @@ class Platoon:
         self.update_max_speed()
         self.update_max_acceleration()
         self.update_max_deceleration()
+        self.update_member_state()
+
+    def update_member_state(self, member: 'PlatooningVehicle' = None):
+        """
+        Update the platoon data within the state of the platoon's members.
+
+        Only members that currently use this platoon are updated.
+
+        Parameters
+        ----------
+        member : PlatooningVehicle, optional
+            The only member to update
+        """
+
+        leader_slot = self.leader._slot
+        last_slot = self.last._slot
+        for vehicle in ([member] if member else self._formation):
+            if vehicle._platoon is not self:
+                continue
+            columns = vehicle._state.columns
+            slot = vehicle._slot
+            columns["platoon_id"][slot] = self._platoon_id
+            columns["leader_slot"][slot] = leader_slot
+            columns["last_slot"][slot] = last_slot
+            columns["platoon_desired_speed"][slot] = self._desired_speed
+            columns["platoon_max_speed"][slot] = self._max_speed
+            columns["platoon_max_acceleration"][slot] = self._max_acceleration
+            columns["platoon_max_deceleration"][slot] = self._max_deceleration
 
     def update_cf_target_speed(self):
         """
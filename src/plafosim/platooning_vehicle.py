@@ -22,22 +22,23 @@ import math
 import sys
 from typing import TYPE_CHECKING
 
+import numpy as np
+
 from plafosim.algorithms import *  # noqa 401
 from plafosim.gui import change_gui_vehicle_color
 from plafosim.mobility import CF_Model, is_gap_safe
 from plafosim.platoon import Platoon
 from plafosim.platoon_role import PlatoonRole
 from plafosim.statistics import (
-    record_platoon_formation,
     record_platoon_trace,
     record_platoon_trip,
     record_vehicle_change,
-    record_vehicle_platoon_maneuvers,
     record_vehicle_platoon_trace,
     record_vehicle_teleport,
 )
-from plafosim.util import round_to_next_base
+from plafosim.util import round_to_next_base, slots2dict
 from plafosim.vehicle import Vehicle
+from plafosim.vehicle_state import StateField, VehicleState, state_fields
 from plafosim.vehicle_type import VehicleType
 
 if TYPE_CHECKING:
@@ -51,6 +52,75 @@ class PlatooningVehicle(Vehicle):
     A vehicle that has platooning functionality.
     """
 
+    # state stored within the vehicle state store
+    _acc_headway_time = StateField("acc_headway_time")
+    _acc_lambda = StateField("acc_lambda")
+    _platoon_role = StateField("platoon_role", PlatoonRole)
+    _in_maneuver = StateField("in_maneuver")
+    # maneuver statistics
+    _joins_attempted = StateField("joins_attempted")
+    _joins_succesful = StateField("joins_succesful")
+    _joins_aborted = StateField("joins_aborted")
+    _joins_aborted_front = StateField("joins_aborted_front")
+    _joins_aborted_arbitrary = StateField("joins_aborted_arbitrary")
+    _joins_aborted_road_begin = StateField("joins_aborted_road_begin")
+    _joins_aborted_trip_begin = StateField("joins_aborted_trip_begin")
+    _joins_aborted_road_end = StateField("joins_aborted_road_end")
+    _joins_aborted_trip_end = StateField("joins_aborted_trip_end")
+    _joins_aborted_leader_maneuver = StateField("joins_aborted_leader_maneuver")
+    _joins_aborted_max_speed = StateField("joins_aborted_max_speed")
+    _joins_aborted_teleport_threshold = StateField("joins_aborted_teleport_threshold")
+    _joins_aborted_approaching = StateField("joins_aborted_approaching")
+    _joins_aborted_no_space = StateField("joins_aborted_no_space")
+    _joins_aborted_leave_other = StateField("joins_aborted_leave_other")
+    _joins_front = StateField("joins_front")
+    _joins_arbitrary = StateField("joins_arbitrary")
+    _joins_back = StateField("joins_back")
+    _joins_teleport_position = StateField("joins_teleport_position")
+    _joins_teleport_lane = StateField("joins_teleport_lane")
+    _joins_teleport_speed = StateField("joins_teleport_speed")
+    _joins_correct_position = StateField("joins_correct_position")
+    _leaves_attempted = StateField("leaves_attempted")
+    _leaves_successful = StateField("leaves_successful")
+    _leaves_aborted = StateField("leaves_aborted")
+    _leaves_front = StateField("leaves_front")
+    _leaves_arbitrary = StateField("leaves_arbitrary")
+    _leaves_back = StateField("leaves_back")
+    # formation statistics
+    _formation_iterations = StateField("formation_iterations")
+    _candidates_found = StateField("candidates_found")
+    _candidates_found_individual = StateField("candidates_found_individual")
+    _candidates_found_platoon = StateField("candidates_found_platoon")
+    _candidates_filtered = StateField("candidates_filtered")
+    _candidates_filtered_follower = StateField("candidates_filtered_follower")
+    _candidates_filtered_maneuver = StateField("candidates_filtered_maneuver")
+
+    # attributes stored within the vehicle object
+    __slots__ = (
+        "_cacc_spacing",
+        "_platoon_object",
+        # for a JOINER
+        "_join_approach_step",
+        "_join_data_leader",
+        "_join_data_last",
+        "_join_data_new_position",
+        # for a LEADER
+        "_joiner",
+        # formation
+        "_formation_algorithm",
+        "_execution_interval",
+        "_last_formation_step",
+        "_last_advertisement_step",
+        # platoon statistics
+        "_first_platoon_join_time",
+        "_last_platoon_join_time",
+        "_time_in_platoon",
+        "_first_platoon_join_position",
+        "_last_platoon_join_position",
+        "_distance_in_platoon",
+        "_number_platoons",
+    )
+
     def __init__(
             self,
             simulator: 'Simulator',
@@ -171,45 +241,7 @@ class PlatooningVehicle(Vehicle):
         self._distance_in_platoon = 0
         self._number_platoons = 0
 
-        # maneuver statistics
-        self._joins_attempted = 0
-        self._joins_succesful = 0
-        self._joins_aborted = 0
-        self._joins_aborted_front = 0
-        self._joins_aborted_arbitrary = 0
-        self._joins_aborted_road_begin = 0
-        self._joins_aborted_trip_begin = 0
-        self._joins_aborted_road_end = 0
-        self._joins_aborted_trip_end = 0
-        self._joins_aborted_leader_maneuver = 0
-        self._joins_aborted_max_speed = 0
-        self._joins_aborted_teleport_threshold = 0
-        self._joins_aborted_approaching = 0
-        self._joins_aborted_no_space = 0
-        self._joins_aborted_leave_other = 0
-
-        self._joins_front = 0
-        self._joins_arbitrary = 0
-        self._joins_back = 0
-        self._joins_teleport_position = 0
-        self._joins_teleport_lane = 0
-        self._joins_teleport_speed = 0
-        self._joins_correct_position = 0
-        self._leaves_attempted = 0
-        self._leaves_successful = 0
-        self._leaves_aborted = 0
-        self._leaves_front = 0
-        self._leaves_arbitrary = 0
-        self._leaves_back = 0
-
-        # formation statistics
-        self._formation_iterations = 0
-        self._candidates_found = 0
-        self._candidates_found_individual = 0
-        self._candidates_found_platoon = 0
-        self._candidates_filtered = 0
-        self._candidates_filtered_follower = 0
-        self._candidates_filtered_maneuver = 0
+        # maneuver and formation statistics are counted within the vehicle state store
 
     @property
     def acc_headway_time(self) -> float:
@@ -270,6 +302,44 @@ class PlatooningVehicle(Vehicle):
 
         return self._platoon
 
+    @property
+    def _platoon(self) -> Platoon:
+        """
+        Return the platoon of the vehicle.
+        """
+
+        return self._platoon_object
+
+    @_platoon.setter
+    def _platoon(self, platoon: Platoon):
+        """
+        Set the platoon of the vehicle.
+
+        This also updates the platoon data within the vehicle's state.
+
+        Parameters
+        ----------
+        platoon : Platoon
+            The new platoon of the vehicle
+        """
+
+        self._platoon_object = platoon
+        platoon.update_member_state(self)
+
+    def _attach_state(self, state: VehicleState):
+        """
+        Move the state of the vehicle into the given state store.
+
+        Parameters
+        ----------
+        state : VehicleState
+            The state store to use from now on
+        """
+
+        super()._attach_state(state)
+        # the references to other members depend on the store
+        self._platoon.update_member_state()
+
     def is_in_platoon(self) -> bool:
         """
         Return whether the vehicle currently is in a platoon.
@@ -344,56 +414,6 @@ class PlatooningVehicle(Vehicle):
 
         return self._platoon.leader._color if self.is_in_platoon() else self._color
 
-    def _calculate_emission(self, a: float, v: float, f: list, scale: float) -> float:
-        """
-        Calculate the emitted pollutant amount using the given speed and acceleration.
-
-        Parameters
-        ----------
-        a : float
-            The current acceleration
-        v : float
-            The current speed
-        f : list
-            The emission factors to use for current emission variable to be calculated
-        scale : float
-            The scale to normalize the calculated value
-
-        Returns
-        -------
-        float : The calculcated emission in ml/mg per s
-        """
-
-        # calculate impact of platooning on air drag based on
-        # Charles-Henri Bruneau, Khodor Khadra and Iraj Mortazavi,
-        # "Flow analysis of square-back simplified vehicles in platoon,"
-        # International Journal of Heat and Fluid Flow, vol. 66, pp. 43–59,
-        # August 2017. Table 5: d = L, vehicle length = 5m, distance = 5m
-        air_drag_change = 0.0
-        if self._platoon_role == PlatoonRole.LEADER:
-            # savings by followers
-            assert self._platoon.size > 1
-            air_drag_change = 0.12
-        elif self._platoon_role == PlatoonRole.FOLLOWER:
-            # savings by leader/front vehicles
-            if self is self._platoon.last:
-                # last vehicle
-                air_drag_change = 0.23
-            else:
-                # in between
-                air_drag_change = 0.27
-
-        # calculate impact of air drag on emissions based on
-        # Gino Sovran, "Tractive-Energy-Based Formulae for the Impact of
-        # Aerodynamics on Fuel Economy Over the EPA Driving Schedules,"
-        # SAE International, Technical Paper, 830304, February 1983.
-        if self._simulator._reduced_air_drag:
-            emission_change = air_drag_change * 0.46
-        else:
-            emission_change = 0.0
-
-        return super()._calculate_emission(a, v, f, scale) * (1.0 - emission_change)
-
     def finish(self):
         """
         Clean up the instance of the PlatooningVehicle.
@@ -428,27 +448,6 @@ class PlatooningVehicle(Vehicle):
             LOG.debug(f"Not recording statistics for pre-filled vehicle {self._vid}")
             return
 
-        candidates_found_avg = (
-            self._candidates_found / self._formation_iterations
-            if self._formation_iterations > 0
-            else 0
-        )
-        candidates_filtered_avg = (
-            self._candidates_filtered / self._formation_iterations
-            if self._formation_iterations > 0
-            else 0
-        )
-        candidates_found_individual_avg = (
-            self._candidates_found_individual / self._formation_iterations
-            if self._formation_iterations > 0
-            else 0
-        )
-        candidates_found_platoon_avg = (
-            self._candidates_found_platoon / self._formation_iterations
-            if self._formation_iterations > 0
-            else 0
-        )
-
         assert platoon_time_ratio >= 0
         assert platoon_distance_ratio >= 0
 
@@ -476,18 +475,7 @@ class PlatooningVehicle(Vehicle):
                 distance_until_first_platoon=distance_until_first_platoon,
             )
 
-        if self._simulator._record_platoon_maneuvers:
-            record_vehicle_platoon_maneuvers(basename=self._simulator._result_base_filename, vehicle=self)
-
-        if self._simulator._record_platoon_formation:
-            record_platoon_formation(
-                basename=self._simulator._result_base_filename,
-                vehicle=self,
-                candidates_found_avg=candidates_found_avg,
-                candidates_found_individual_avg=candidates_found_individual_avg,
-                candidates_found_platoon_avg=candidates_found_platoon_avg,
-                candidates_filtered_avg=candidates_filtered_avg,
-            )
+        # the maneuver and formation statistics are recorded by the simulator for all arrived vehicles at once
 
     def _action(self, step: float):
         """
@@ -521,6 +509,24 @@ class PlatooningVehicle(Vehicle):
                 self._formation_algorithm.do_formation()
                 self._last_formation_step = step
 
+    def _next_action_step(self) -> float:
+        """
+        Return the step at which the next action of the PlatooningVehicle is due.
+
+        Returns
+        -------
+        float : The step of the next action or None if there is no action to trigger
+        """
+
+        steps = []
+        if self._join_approach_step:
+            # continue join maneuver
+            steps.append(self._join_approach_step)
+        if self._formation_algorithm:
+            # execute formation algorithm at every execution interval
+            steps.append(self._last_formation_step + self._execution_interval)
+        return min(steps, default=None)
+
     def info(self) -> str:
         """
         Return information about the PlatooningVehicle.
@@ -533,7 +539,8 @@ class PlatooningVehicle(Vehicle):
         Return the str representation of the platooning vehicle.
         """
 
-        self_dict = self.__dict__.copy()
+        self_dict = slots2dict(self)
+        self_dict.update({name: getattr(self, name) for name in state_fields(type(self))})
         self_dict.update({'_vehicle_type': str(self._vehicle_type)})  # use str representation of vehicle type
         self_dict.update({'_platoon': str(self._platoon)})  # use str representation of platoon
         return str(self_dict)
@@ -580,45 +587,36 @@ class PlatooningVehicle(Vehicle):
         list(PlatooninVehicle) : The list of available platoons
         """
 
-        # HACK FOR AVOIDING MAINTAINING A NEIGHBOR TABLE (for now)
-        platoons = []
-        for vehicle in self._simulator._vehicles.values():
-
-            # filter own vehicle
-            if vehicle is self:
-                continue
-
-            # filter non-available vehicles which are technically not able to do platooning
-            if not isinstance(vehicle, PlatooningVehicle):
-                continue
-
-            # filter non-available vehicles based on communication range
-            if abs(vehicle.position - self._position) > self._communication_range:
-                LOG.trace(f"{self._vid}'s neighbor {vehicle.vid} is out of communication range ({self._communication_range}m)")
-                continue
-
-            # filter non-platoons
-            # this mimics advertisements that are only done by platoon leaders or individual vehicles
-            # this does not include outdated information, e.g., due to an individual vehicle not available anymore
-            # disabling this increases the number of false positives, thereby increasing the number of failed join maneuvers
-            if self._simulator._distributed_platoon_knowledge:
-                if vehicle.platoon_role != PlatoonRole.LEADER and vehicle.platoon_role != PlatoonRole.NONE:
-                    self._candidates_filtered += 1
-                    self._candidates_filtered_follower += 1
-                    continue
-
-            # filter vehicles which are already in a maneuver
-            # disabling this increases the number of false positives, thereby increasing the number of failed join maneuvers
-            if self._simulator._distributed_maneuver_knowledge:
-                if vehicle.in_maneuver:
-                    LOG.trace(f"{vehicle.vid} is already in a maneuver")
-                    self._candidates_filtered += 1
-                    self._candidates_filtered_maneuver += 1
-                    continue
-
-            platoons.append(vehicle.platoon)
-
-        return platoons
+        index = self._simulator._get_neighbor_index()
+        columns = self._simulator._vehicle_state.columns
+
+        # filter non-available vehicles which are technically not able to do platooning (i.e., not within the index)
+        # filter non-available vehicles based on communication range
+        slots = index.within(self._position, self._communication_range)
+        # filter own vehicle
+        slots = slots[columns["vid"][slots] != self._vid]
+
+        # filter non-platoons
+        # this mimics advertisements that are only done by platoon leaders or individual vehicles
+        # this does not include outdated information, e.g., due to an individual vehicle not available anymore
+        # disabling this increases the number of false positives, thereby increasing the number of failed join maneuvers
+        if self._simulator._distributed_platoon_knowledge:
+            available = index.available(slots)
+            filtered = np.count_nonzero(~available)
+            self._candidates_filtered += filtered
+            self._candidates_filtered_follower += filtered
+            slots = slots[available]
+
+        # filter vehicles which are already in a maneuver
+        # disabling this increases the number of false positives, thereby increasing the number of failed join maneuvers
+        if self._simulator._distributed_maneuver_knowledge:
+            in_maneuver = index.in_maneuver(slots)
+            filtered = np.count_nonzero(in_maneuver)
+            self._candidates_filtered += filtered
+            self._candidates_filtered_maneuver += filtered
+            slots = slots[~in_maneuver]
+
+        return [self._simulator._vehicles[vid].platoon for vid in columns["vid"][slots].tolist()]
 
     def _join(self, platoon_id: int, leader_id: int):
         """
@@ -808,6 +806,7 @@ class PlatooningVehicle(Vehicle):
             self._join_data_last = last
             self._join_data_new_position = new_position
             leader._joiner = self
+            self._simulator._schedule_vehicle_action(self, self._join_approach_step)
             LOG.trace(f"Scheduled the teleport of vehicle {self._vid} to step {self._join_approach_step} (new position: {new_position})")
         else:
             # perform the teleport now
@@ -1098,6 +1097,7 @@ class PlatooningVehicle(Vehicle):
         current_position = self._position
         if current_position != new_position:
             self._position = new_position
+            self._simulator._invalidate_neighbor_index()
             LOG.trace(f"{self._vid} teleported to {self._position} (from {current_position}, {self._position - current_position}m)")
             self._joins_teleport_position += 1
         current_lane = self._lane
@@ -0,0 +1,207 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+import pickle
+import tempfile
+
+from plafosim import __version__
+
+LOG = logging.getLogger(__name__)
+
+# the version of the format of cache entries, which is part of the key
+CACHE_FORMAT = 2
+# the file extension of cache entries
+CACHE_EXTENSION = ".prefill"
+# parameters that do not influence the pre-filled vehicles
+IGNORED_PARAMETERS = [
+    'max_step',
+    'trip_file',
+    'log_level',
+    'progress',
+    'gui',
+    'gui_delay',
+    'gui_track_vehicle',
+    'sumo_config',
+    'gui_play',
+    'gui_start',
+    'draw_ramps',
+    'draw_ramp_labels',
+    'draw_road_end',
+    'draw_road_end_label',
+    'draw_infrastructures',
+    'draw_infrastructure_labels',
+    'screenshot_filename',
+    'result_base_filename',
+    'pre_fill_cache',
+    'pre_fill_cache_size',
+]
+
+
+class _StatePickler(pickle.Pickler):
+    """
+    Pickler that stores references to the simulator instead of the simulator itself.
+    """
+
+    def __init__(self, file, simulator):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self._simulator = simulator
+
+    def persistent_id(self, obj):
+        return "simulator" if obj is self._simulator else None
+
+
+class _StateUnpickler(pickle.Unpickler):
+    """
+    Unpickler that replaces references to the simulator by the given simulator.
+    """
+
+    def __init__(self, file, simulator):
+        super().__init__(file)
+        self._simulator = simulator
+
+    def persistent_load(self, pid):
+        assert pid == "simulator"
+        return self._simulator
+
+
+def get_cache_key(parameters: dict) -> str:
+    """
+    Return the key of a pre-filled road for the given simulator parameters.
+
+    All parameters except the ones that do not influence the pre-filled vehicles (e.g., result recording) are considered.
+
+    Parameters
+    ----------
+    parameters : dict
+        The parameters of the simulator
+
+    Returns
+    -------
+    str : The key of the pre-filled road
+    """
+
+    relevant = {
+        name: value
+        for name, value in parameters.items()
+        if name not in IGNORED_PARAMETERS and not (name.startswith('record_') and name != 'record_prefilled')
+    }
+    content = json.dumps([__version__, CACHE_FORMAT, relevant], sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def load_state(directory: str, key: str, simulator) -> dict:
+    """
+    Load the state of a pre-filled road from the cache.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the cache
+    key : str
+        The key of the pre-filled road
+    simulator : Simulator
+        The simulator the state belongs to
+
+    Returns
+    -------
+    dict
+        The mapping from attribute name to value or None if the key is not cached
+    """
+
+    filename = os.path.join(directory, key + CACHE_EXTENSION)
+    try:
+        with gzip.open(filename, "rb") as f:
+            state = _StateUnpickler(f, simulator).load()
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        LOG.warning(f"Could not load the pre-filled road {key} from the cache: {e}")
+        return None
+    # remember the last usage for evicting old entries
+    os.utime(filename)
+    LOG.info(f"Loaded the pre-filled road {key} from the cache")
+    return state
+
+
+def store_state(directory: str, key: str, simulator, state: dict, max_size: int):
+    """
+    Store the state of a pre-filled road in the cache.
+
+    The entry is compressed and written atomically, thus multiple simulations can share the same cache.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the cache
+    key : str
+        The key of the pre-filled road
+    simulator : Simulator
+        The simulator the state belongs to
+    state : dict
+        The mapping from attribute name to value
+    max_size : int
+        The maximum size of the cache in bytes
+    """
+
+    buffer = io.BytesIO()
+    _StatePickler(buffer, simulator).dump(state)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=directory, suffix=".tmp", delete=False) as f:
+        f.write(gzip.compress(buffer.getvalue(), compresslevel=6))
+    os.replace(f.name, os.path.join(directory, key + CACHE_EXTENSION))
+    LOG.info(f"Stored the pre-filled road {key} in the cache")
+
+    evict_entries(directory, max_size)
+
+
+def evict_entries(directory: str, max_size: int):
+    """
+    Remove the least recently used entries until the cache does not exceed its maximum size.
+
+    Parameters
+    ----------
+    directory : str
+        The directory of the cache
+    max_size : int
+        The maximum size of the cache in bytes
+    """
+
+    entries = []
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(CACHE_EXTENSION):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total_size = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total_size <= max_size:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # removed by another simulation
+            pass
+        total_size -= size
+        LOG.debug(f"Evicted {path} from the pre-fill cache")
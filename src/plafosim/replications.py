@@ -0,0 +1,206 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import logging
+import random
+import sys
+from timeit import default_timer as timer
+
+from tqdm import tqdm
+
+from plafosim.mobility import stack_replications_np
+from plafosim.simulator import DEFAULTS, Simulator
+
+LOG = logging.getLogger(__name__)
+
+
+class Replications:
+    """
+    A batch of independent replications (i.e., random seeds) of the same scenario.
+
+    Every replication is a regular simulator with its own random number generator, vehicles, and result files.
+    All replications are advanced in lockstep and the vehicles of all replications are moved by a single mobility computation per step.
+    """
+
+    def __init__(
+            self,
+            number_of_replications: int,
+            *,
+            random_seed: int = DEFAULTS['random_seed'],
+            result_base_filename: str = DEFAULTS['result_base_filename'],
+            progress: bool = DEFAULTS['progress'],
+            **kwargs: dict,
+    ):
+        """
+        Initialize a batch of replications.
+
+        Parameters
+        ----------
+        number_of_replications : int
+            The number of replications to simulate
+        random_seed : int, optional
+            The random seed of the first replication, which is incremented for every further replication.
+            A value of -1 uses a random seed for the first replication.
+        result_base_filename : str, optional
+            The base filename of the result files, which is extended by the random seed of every replication
+        progress : bool, optional
+            Whether to enable the (simulation) progress bar
+        **kwargs : dict
+            The remaining keyword arguments of the simulators
+        """
+
+        if number_of_replications < 1:
+            sys.exit(f"ERROR [{__name__}]: The number of replications needs to be at least 1!")
+        if kwargs.get('gui', DEFAULTS['gui']):
+            sys.exit(f"ERROR [{__name__}]: Replications are not supported with the GUI!")
+        if random_seed < 0:
+            random_seed = random.randint(0, 10000)
+
+        self._random_seeds = [random_seed + replication for replication in range(number_of_replications)]
+        self._progress = progress  # whether to enable the (simulation) progress bar
+        self._running = False  # whether the replications are currently running
+        self._simulators = []
+        for seed in self._random_seeds:
+            LOG.info(f"Creating replication with random seed {seed}...")
+            self._simulators.append(
+                Simulator(
+                    random_seed=seed,
+                    result_base_filename=f"{result_base_filename}_seed{seed}",
+                    progress=False,
+                    **kwargs,
+                )
+            )
+
+    @property
+    def simulators(self) -> list:
+        """
+        Return the simulators of all replications.
+        """
+
+        return self._simulators
+
+    @property
+    def random_seeds(self) -> list:
+        """
+        Return the random seeds of all replications.
+        """
+
+        return self._random_seeds
+
+    def run(self) -> int:
+        """
+        Run all replications until they are stopped.
+
+        Returns
+        -------
+        int : The last step of the longest replication
+        """
+
+        self._running = True
+        for simulator in self._simulators:
+            simulator._start()
+        running = list(self._simulators)
+
+        first = self._simulators[0]
+        progress_bar = tqdm(desc='Simulation progress', total=first._max_step, unit='step', disable=not self._progress)
+        while self._running and running:
+            start_time = timer()
+
+            begun = []
+            for simulator in running:
+                counts = simulator._begin_step()
+                if counts is not None:
+                    begun.append((simulator, counts))
+            moving = [simulator for simulator, _ in begun if simulator._vehicles]
+            moved = self._move_vehicles(moving)
+
+            end_time = timer()
+
+            # the run time of a step is shared by all replications
+            for simulator, counts in begun:
+                arrived_vehicles, average_vehicle_speed, vehicles_braking_rough = moved.get(simulator, ([], 0, 0))
+                simulator._end_step(
+                    *counts,
+                    arrived_vehicles=arrived_vehicles,
+                    average_vehicle_speed=average_vehicle_speed,
+                    vehicles_braking_rough=vehicles_braking_rough,
+                    runtime=end_time - start_time,
+                )
+            if begun:
+                progress_bar.update(first._step_length)
+
+            for simulator in running:
+                if not simulator._running:
+                    simulator._finish()
+            running = [simulator for simulator in running if simulator._running]
+
+        # stopped from outside
+        for simulator in running:
+            simulator.stop("Stopped replications")
+            simulator._finish()
+        self._running = False
+
+        return max(simulator.step for simulator in self._simulators)
+
+    def _move_vehicles(self, simulators: list) -> dict:
+        """
+        Move the vehicles of the given replications within one simulation step.
+
+        With the numpy mobility backend, the vehicles of all replications are stacked and moved at once.
+
+        Parameters
+        ----------
+        simulators : list
+            The simulators of the replications to move
+
+        Returns
+        -------
+        dict
+            The mapping from simulator to its arrived vehicles, average vehicle speed, and number of vehicles braking rough
+        """
+
+        if not simulators:
+            return {}
+        if simulators[0]._mobility_backend != "numpy":
+            return {simulator: simulator._move_vehicles_df() for simulator in simulators}
+
+        vehicles = [simulator._get_mobility_arrays() for simulator in simulators]
+        stacked, offsets = stack_replications_np(vehicles)
+        # all replications share the same scenario and thus the same mobility parameters
+        lane, lc_reason, new_speed = simulators[0]._compute_mobility_np(stacked)
+
+        moved = {}
+        for simulator, replication, offset in zip(simulators, vehicles, offsets):
+            rows = slice(offset, offset + len(replication["lane"]))
+            moved[simulator] = simulator._apply_mobility_np(replication, lane[rows], lc_reason[rows], new_speed[rows])
+        return moved
+
+    def stop(self, msg: str):
+        """
+        Stop all replications with the given message.
+
+        Parameters
+        ----------
+        msg : str
+            The message to show after stopping the replications
+        """
+
+        self._running = False
+        if self._progress:
+            print(f"\n{msg}")
@@ -17,6 +17,8 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import bisect
+import heapq
 import logging
 import random
 import sys
@@ -27,7 +29,19 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-from plafosim.emissions import EmissionClass
+from plafosim.demand import (
+    Demand,
+    TripFile,
+    generate_demand,
+    get_depart_speed_np,
+    get_desired_speed_np,
+)
+from plafosim.emissions import (
+    POLLUTANTS,
+    EmissionClass,
+    air_drag_change_np,
+    compute_emissions_np,
+)
 from plafosim.gui import (
     add_gui_vehicle,
     check_and_prepare_gui,
@@ -43,20 +57,35 @@ from plafosim.gui import (
     start_gui,
 )
 from plafosim.infrastructure import Infrastructure
+from plafosim.kernels import get_kernels, jit_available
 from plafosim.mobility import (
     HIGHVAL,
+    LC_REASONS,
     CF_Model,
     compute_lane_changes,
+    compute_lane_changes_and_speeds_np,
+    compute_lane_changes_and_speeds_platoons_np,
     compute_new_speeds,
     get_crashed_vehicles,
+    get_crashed_vehicles_np,
     get_predecessors,
     is_gap_safe,
+    is_gap_safe_np,
     lane_predecessors,
+    sort_order_np,
     update_position,
+    update_position_np,
 )
 from plafosim.platoon_role import PlatoonRole
 from plafosim.platooning_vehicle import PlatooningVehicle
-from plafosim.spawning import get_arrival_position, get_depart_speed, get_desired_speed
+from plafosim.pre_fill_cache import get_cache_key, load_state, store_state
+from plafosim.spawning import (
+    SpawnQueue,
+    get_arrival_position,
+    get_depart_speed,
+    get_desired_speed,
+    get_free_intervals_np,
+)
 from plafosim.statistics import (
     initialize_emission_traces,
     initialize_platoon_changes,
@@ -72,16 +101,26 @@ from plafosim.statistics import (
     initialize_vehicle_teleports,
     initialize_vehicle_traces,
     initialize_vehicle_trips,
+    record_emission_traces,
     record_general_data_begin,
     record_general_data_end,
     record_platoon_change,
+    record_platoon_formation,
     record_simulation_trace,
     record_vehicle_change,
     record_vehicle_platoon_change,
+    record_vehicle_platoon_maneuvers,
     record_vehicle_trace,
 )
 from plafosim.util import assert_index_equal
 from plafosim.vehicle import Vehicle
+from plafosim.vehicle_state import (
+    COUNTERS,
+    FORMATION_COUNTERS,
+    MANEUVER_COUNTERS,
+    NeighborIndex,
+    VehicleState,
+)
 from plafosim.vehicle_type import VehicleType
 
 LOG = logging.getLogger(__name__)
@@ -115,6 +154,12 @@ vtype = VehicleType(
     _emission_class,
 )  # TODO support multiple vtypes
 
+# the number of random positions to try for a pre-filled vehicle before sampling from the free intervals
+MAX_PREFILL_ATTEMPTS = 1000
+
+# the attributes of the simulator that are changed by pre-filling the road (besides the random number generator)
+PRE_FILL_STATE = ['_vehicles', '_vehicle_state', '_vehicle_sequence', '_next_vehicle_sequence', '_vehicle_action_queue']
+
 # vehicle data fram type collections
 # TODO: extract to module or class later
 CFModelDtype = pd.CategoricalDtype(list(CF_Model), ordered=True)
@@ -127,6 +172,8 @@ DEFAULTS = {
     'lanes': 3,
     'ramp_interval': 5 * 1000,  # km -> m
     'pre_fill': False,
+    'pre_fill_cache': None,
+    'pre_fill_cache_size': 1024,  # MiB
     'vehicles': 100,
     'vehicle_density': -1,
     'max_speed': vtype.max_speed,  # TODO not used currently
@@ -150,6 +197,7 @@ DEFAULTS = {
     'random_arrival_position': False,
     'minimum_trip_length': 0,
     'maximum_trip_length': -1 * 1000,  # km -> m
+    'trip_file': None,
     'communication_range': 500,  # m
     # TODO apply also to infrastructure-based approaches
     'distributed_platoon_knowledge': True,
@@ -169,6 +217,9 @@ DEFAULTS = {
     'max_step': 1 * 3600,  # h -> s
     'actions': True,
     'collisions': True,
+    'mobility_backend': 'numpy',
+    'rigid_platoons': False,
+    'jit_kernels': False,
     'random_seed': -1,
     'log_level': logging.WARNING,
     'progress': True,
@@ -286,12 +337,27 @@ def check_collisions(vdf: pd.DataFrame) -> bool:
 
     crashed_vehicles = get_crashed_vehicles(vdf)
     if crashed_vehicles:
-        for v in crashed_vehicles:
-            print(f"{v}: {vdf.at[v, 'position']}-{vdf.at[v, 'position']-vdf.at[v, 'length']},{vdf.at[v, 'lane']}")
+        report_collisions(vdf.loc[crashed_vehicles])
         return True
     return False
 
 
+def report_collisions(vdf: pd.DataFrame):
+    """
+    Print the crashed vehicles.
+
+    Parameters
+    ----------
+    vdf : pandas.DataFrame
+        The Dataframe containing the crashed vehicles as rows
+        index: vid
+        columns: [position, length, lane, ..]
+    """
+
+    for v in vdf.index:
+        print(f"{v}: {vdf.at[v, 'position']}-{vdf.at[v, 'position']-vdf.at[v, 'length']},{vdf.at[v, 'lane']}")
+
+
 def has_collision(
     position1: float,
     rear_position1: float,
@@ -404,6 +470,8 @@ class Simulator:
             number_of_lanes: int = DEFAULTS['lanes'],
             ramp_interval: int = DEFAULTS['ramp_interval'],
             pre_fill: bool = DEFAULTS['pre_fill'],
+            pre_fill_cache: str = DEFAULTS['pre_fill_cache'],
+            pre_fill_cache_size: int = DEFAULTS['pre_fill_cache_size'],
             number_of_vehicles: int = DEFAULTS['vehicles'],
             vehicle_density: float = DEFAULTS['vehicle_density'],
             max_speed: float = DEFAULTS['max_speed'],
@@ -427,6 +495,7 @@ class Simulator:
             random_arrival_position: bool = DEFAULTS['random_arrival_position'],
             minimum_trip_length: int = DEFAULTS['minimum_trip_length'],
             maximum_trip_length: int = DEFAULTS['maximum_trip_length'],
+            trip_file: str = DEFAULTS['trip_file'],
             communication_range: int = DEFAULTS['communication_range'],
             distributed_platoon_knowledge: bool = DEFAULTS['distributed_platoon_knowledge'],
             distributed_maneuver_knowledge: bool = DEFAULTS['distributed_maneuver_knowledge'],
@@ -444,6 +513,9 @@ class Simulator:
             max_step: int = DEFAULTS['max_step'],
             actions: bool = DEFAULTS['actions'],
             collisions: bool = DEFAULTS['collisions'],
+            mobility_backend: str = DEFAULTS['mobility_backend'],
+            rigid_platoons: bool = DEFAULTS['rigid_platoons'],
+            jit_kernels: bool = DEFAULTS['jit_kernels'],
             random_seed: int = DEFAULTS['random_seed'],
             log_level: int = DEFAULTS['log_level'],
             progress: bool = DEFAULTS['progress'],
@@ -483,6 +555,10 @@ class Simulator:
         Initialize a simulator instance.
         """
 
+        # the parameters of this instance (e.g., for the pre-fill cache)
+        parameters = dict(locals())
+        parameters.pop('self')
+
         # set up logging
         # TODO add custom filter that prepends the log entry with the step time
         logging.basicConfig(level=log_level, stream=sys.stdout, format="%(levelname)s [%(name)s]: %(message)s")
@@ -497,9 +573,15 @@ class Simulator:
 
         # vehicle properties
         self._vehicles = {}  # the list (dict) of vehicles in the simulation
+        self._vehicle_state = VehicleState()  # the (columnar) state of all vehicles in the simulation
+        self._vehicle_order = np.empty(0, dtype=np.int64)  # the slots of all vehicles sorted by position and lane (descending)
+        self._neighbor_index = None  # the index of all platooning vehicles sorted by position (built on demand)
         self._last_vehicle_id = -1  # the id of the last vehicle generated
+        self._vehicle_sequence = {}  # the sequence numbers of all vehicles (i.e., the order in which they were added)
+        self._next_vehicle_sequence = 0  # the sequence number of the next vehicle added
+        self._vehicle_action_queue = []  # the (heap) queue of due steps of vehicle actions: (step, sequence, vid)
         # set up queue for vehicles to be spawned
-        self._vehicle_spawn_queue = []
+        self._vehicle_spawn_queue = SpawnQueue()
         # the maximum number of vehicles
         if vehicle_density > 0:
             # override vehicles
@@ -589,6 +671,9 @@ class Simulator:
                 if not random_arrival_position:
                     sys.exit(f"ERROR [{__name__}]: Static trip length is only possible in conjunction with random-arrival-position!")
             self._maximum_trip_length = maximum_trip_length  # the maximum trip length
+        self._trip_file = trip_file  # the trip file to replay the demand from
+        if trip_file and start_as_platoon:
+            sys.exit(f"ERROR [{__name__}]: A trip file cannot be used when all starting as one platoon!")
 
         # communication properties
         if communication_range == -1:
@@ -645,6 +730,7 @@ class Simulator:
 
         # infrastructure properties
         self._infrastructures = {}  # the list (dict) of infrastructures in the simulation
+        self._infrastructure_action_queue = []  # the (heap) queue of due steps of infrastructure actions: (step, iid)
 
         # simulation properties
         self._step = 0  # the current simulation step in s
@@ -664,8 +750,20 @@ class Simulator:
         self._running = False  # whether the simulation is running
         self._actions = actions  # whether to enable actions
         self._collisions = collisions  # whether to check for collisions
+        if mobility_backend not in ("numpy", "pandas"):
+            sys.exit(f"ERROR [{__name__}]: Unknown mobility backend {mobility_backend}!")
+        self._mobility_backend = mobility_backend  # the backend to use for the mobility computations
+        if rigid_platoons and mobility_backend != "numpy":
+            sys.exit(f"ERROR [{__name__}]: Rigid platoons are only supported by the numpy mobility backend!")
+        self._rigid_platoons = rigid_platoons  # whether to treat platoons as rigid units within the mobility computations
+        if jit_kernels and mobility_backend != "numpy":
+            sys.exit(f"ERROR [{__name__}]: JIT compiled kernels are only supported by the numpy mobility backend!")
+        if jit_kernels and not jit_available():
+            LOG.warning("JIT compiled kernels require numba, which is not installed! Falling back to NumPy kernels.")
+        self._mobility_kernels = "numba" if jit_kernels and jit_available() else "numpy"  # the kernels to use for the elementwise mobility math
         if random_seed < 0:
             random_seed = random.randint(0, 10000)
+        parameters['random_seed'] = random_seed
         LOG.debug(f"Using random seed {random_seed}.")
         self._rng = random.Random(random_seed)
         self._progress = progress  # whether to enable the (simulation) progress bar
@@ -742,15 +840,34 @@ class Simulator:
         # average number of vehicles braking rough
         self._avg_number_vehicles_braking_rough = 0
         self._values_in_avg_number_vehicles_braking_rough = 0
+        # total maneuver and formation counters of arrived vehicles
+        self._arrived_counter_totals = np.zeros(len(COUNTERS), dtype=np.int64)
 
         # TODO log generation parameters
+        self._pre_fill_cache = pre_fill_cache  # the directory of the pre-fill cache
+        if pre_fill_cache_size <= 0:
+            sys.exit(f"ERROR [{__name__}]: The size of the pre-fill cache needs to be greater than 0!")
+        self._pre_fill_cache_size = pre_fill_cache_size  # the maximum size of the pre-fill cache
         if pre_fill:
-            self._generate_vehicles()
+            if pre_fill_cache:
+                self._generate_vehicles_cached(get_cache_key(parameters))
+            else:
+                self._generate_vehicles()
             self._last_vehicle_id = list(self._vehicles.keys())[-1]
             self._number_of_prefilled_vehicles = len(self._vehicles)
         else:
             self._number_of_prefilled_vehicles = 0
 
+        # the random number generator of the demand
+        self._demand_rng = np.random.default_rng(random_seed)
+        # the trips of all vehicles departing within the simulation (sorted by schedule time)
+        if trip_file:
+            self._demand = TripFile(trip_file)
+            LOG.info(f"Replaying the trips from {trip_file}")
+        else:
+            self._demand = Demand(self._generate_demand())
+            LOG.debug(f"Generated {len(self._demand)} trips")
+
         self._generate_infrastructures(number_of_infrastructures)
 
     @property
@@ -785,21 +902,144 @@ class Simulator:
 
         return self._step
 
+    def _schedule_vehicle_action(self, vehicle: Vehicle, step: float = None):
+        """
+        Schedule the next action of a vehicle.
+
+        Parameters
+        ----------
+        vehicle : Vehicle
+            The vehicle to schedule
+        step : float, optional
+            The step at which the action is due.
+            Defaults to the next action step of the vehicle.
+        """
+
+        if step is None:
+            step = vehicle._next_action_step()
+            if step is None:
+                # the vehicle has nothing to do
+                return
+        heapq.heappush(self._vehicle_action_queue, (step, self._vehicle_sequence[vehicle._vid], vehicle._vid))
+
+    def _pop_due_actions(self, queue: list) -> set:
+        """
+        Remove all due entries from an action queue.
+
+        Parameters
+        ----------
+        queue : list
+            The (heap) queue of actions with the due step as first element and the id as last element
+
+        Returns
+        -------
+        set : The ids of all entities that are due
+        """
+
+        due = set()
+        while queue and queue[0][0] <= self._step:
+            due.add(heapq.heappop(queue)[-1])
+        return due
+
     def _call_vehicle_actions(self):
         """
-        Triggers actions on all vehicles in the simulation.
+        Triggers actions on all vehicles in the simulation that are due.
+
+        The vehicles register the step of their next action (e.g., the next execution of the formation algorithm or a delayed teleport) in a queue.
+        Thus, only due vehicles are triggered, in the order in which they were added to the simulation.
+        Periodic statistics, however, are recorded for all vehicles.
         """
 
-        for vehicle in self._vehicles.values():
-            vehicle.action(self._step)
+        due = self._pop_due_actions(self._vehicle_action_queue)
+
+        if LOG.getEffectiveLevel() <= logging.TRACE or self._record_vehicle_traces or self._record_platoon_traces or self._record_vehicle_platoon_traces:
+            # record periodic statistics for all vehicles in between the actions
+            vehicles = self._vehicles.values()
+        else:
+            vehicles = sorted((self._vehicles[vid] for vid in due if vid in self._vehicles), key=lambda v: self._vehicle_sequence[v._vid])
+
+        for vehicle in vehicles:
+            # log status information
+            if LOG.getEffectiveLevel() <= logging.TRACE:
+                LOG.trace(vehicle.info())
+
+            # record periodic statistics
+            vehicle._statistics()
+
+            if vehicle._vid in due:
+                vehicle.action(self._step)
+                if self._actions:
+                    self._schedule_vehicle_action(vehicle)
+
+    def _account_statistics(self, slots: np.ndarray = None):
+        """
+        Account the time loss and the emissions of vehicles within the current step.
+
+        This is done for all given vehicles at once based on their current speed, acceleration, and platoon role.
+        Vehicles without statistics recording (i.e., pre-filled vehicles) are ignored.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray, optional
+            The slots of the vehicles within the vehicle state store.
+            Defaults to all vehicles in the order of the simulation.
+        """
+
+        columns = self._vehicle_state.columns
+        if slots is None:
+            if self._record_emission_traces:
+                # keep the order of the vehicles for the traces
+                slots = np.array([vehicle._slot for vehicle in self._vehicles.values()], dtype=int)
+            else:
+                slots = self._vehicle_state.active_slots()
+        slots = slots[columns["record_statistics"][slots]]
+
+        # calculate time loss
+        # SUMO: "The time lost due to driving below the ideal speed."
+        # can also use higher layer desired speed
+        speed = columns["speed"][slots]
+        loss = speed < columns["cf_target_speed"][slots]
+        columns["time_loss"][slots[loss]] += self._step_length
+
+        # calculate impact of air drag on emissions based on
+        # Gino Sovran, "Tractive-Energy-Based Formulae for the Impact of
+        # Aerodynamics on Fuel Economy Over the EPA Driving Schedules,"
+        # SAE International, Technical Paper, 830304, February 1983.
+        if self._reduced_air_drag:
+            emission_change = air_drag_change_np(columns["platoon_role"][slots], columns["last_slot"][slots] == slots) * 0.46
+        else:
+            emission_change = np.zeros(len(slots))
+
+        emissions = compute_emissions_np(
+            acceleration=columns["acceleration"][slots],
+            speed=speed,
+            emission_class=columns["emission_class"][slots],
+            emission_factor=1.0 - emission_change,
+            step_length=self._step_length,
+        )
+        for index, pollutant in enumerate(POLLUTANTS):
+            columns[f"emissions_{pollutant}"][slots] += emissions[:, index]
+
+        if self._record_emission_traces:
+            record_emission_traces(
+                basename=self._result_base_filename,
+                step=self._step,
+                vids=columns["vid"][slots],
+                emissions=emissions,
+            )
 
     def _call_infrastructure_actions(self):
         """
         Triggers actions on all infrastructures in the simulation.
         """
 
-        for infrastructure in self._infrastructures.values():
+        for iid in sorted(self._pop_due_actions(self._infrastructure_action_queue)):
+            infrastructure = self._infrastructures[iid]
             infrastructure.action(self._step)
+            if self._actions:
+                step = infrastructure._next_action_step()
+                if step is not None:
+                    heapq.heappush(self._infrastructure_action_queue, (step, iid))
 
     def _get_predecessor(self, vehicle: Vehicle, lane: int = -1) -> Vehicle:
         """
@@ -913,8 +1153,82 @@ class Simulator:
             # remove arrived vehicle from the GUI
             if self._gui and self._step >= self._gui_start:
                 remove_gui_vehicle(vid)
+
+        # record the maneuver and formation statistics of all arrived platooning vehicles at once
+        columns = self._vehicle_state.columns
+        slots = np.array(
+            [self._vehicles[vid]._slot for vid in arrived_vehicles if isinstance(self._vehicles[vid], PlatooningVehicle)],
+            dtype=int,
+        )
+        # we do not record statistics for pre-filled vehicles
+        self._record_counters(slots[columns["record_statistics"][slots]])
+
+        for vid in arrived_vehicles:
             # remove from vehicles
+            self._vehicles[vid]._detach_state()
             del self._vehicles[vid]
+            del self._vehicle_sequence[vid]
+        self._invalidate_neighbor_index()
+
+    def _record_counters(self, slots: np.ndarray):
+        """
+        Record the maneuver and formation statistics of arrived vehicles.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray
+            The slots of the arrived vehicles within the vehicle state store
+        """
+
+        if len(slots) == 0:
+            return
+
+        columns = self._vehicle_state.columns
+        self._arrived_counter_totals += [columns[counter][slots].sum() for counter in COUNTERS]
+        vids = columns["vid"][slots].tolist()
+
+        if self._record_platoon_maneuvers:
+            record_vehicle_platoon_maneuvers(
+                basename=self._result_base_filename,
+                vids=vids,
+                maneuvers=np.column_stack([columns[counter][slots] for counter in MANEUVER_COUNTERS]).tolist(),
+            )
+
+        if self._record_platoon_formation:
+            counters = {counter: columns[counter][slots] for counter in FORMATION_COUNTERS}
+            iterations = counters["formation_iterations"]
+            executed = (iterations > 0).tolist()
+
+            def average(counter: str) -> list:
+                # the average per formation iteration (0 without any iteration)
+                values = (counters[counter] / np.maximum(iterations, 1)).tolist()
+                return [value if valid else 0 for value, valid in zip(values, executed)]
+
+            record_platoon_formation(
+                basename=self._result_base_filename,
+                vids=vids,
+                **{counter: values.tolist() for counter, values in counters.items()},
+                candidates_found_avg=average("candidates_found"),
+                candidates_found_individual_avg=average("candidates_found_individual"),
+                candidates_found_platoon_avg=average("candidates_found_platoon"),
+                candidates_filtered_avg=average("candidates_filtered"),
+            )
+
+    @property
+    def counter_totals(self) -> dict:
+        """
+        Return the simulation-wide totals of the maneuver and formation counters.
+
+        This includes all vehicles for which statistics are recorded, i.e., arrived vehicles and vehicles still in the simulation.
+        """
+
+        columns = self._vehicle_state.columns
+        slots = self._vehicle_state.active_slots()
+        slots = slots[columns["record_statistics"][slots]]
+        return {
+            counter: int(total + columns[counter][slots].sum())
+            for counter, total in zip(COUNTERS, self._arrived_counter_totals)
+        }
 
     def _generate_vehicles(self):
         """
@@ -926,6 +1240,15 @@ class Simulator:
         assert not self._vehicles
         assert self._last_vehicle_id == -1
 
+        if not self._start_as_platoon:
+            # vehicles cannot be closer to each other than their length and minimum gap
+            max_number_of_vehicles = self._number_of_lanes * (int((self._road_length - 1 - vtype.length) / (vtype.length + vtype.min_gap)) + 1)
+            if self._number_of_vehicles > max_number_of_vehicles:
+                sys.exit(f"ERROR [{__name__}]: At most {max_number_of_vehicles} vehicles fit on the road for pre-filling! Reduce the number of vehicles (or the density).")
+
+        # the positions and vehicles of every lane (sorted by position)
+        occupancy = [([], []) for _ in range(self._number_of_lanes)]
+
         for vid in tqdm(range(0, self._number_of_vehicles), desc="Generated vehicles", disable=not self._progress):
 
             desired_speed = get_desired_speed(
@@ -962,82 +1285,27 @@ class Simulator:
                 # always use desired speed for pre-fill vehicles
                 depart_speed = desired_speed
 
-                # assume we have a collision to check at least once
-                collision = True
-                while collision:
-                    collision = False
-                    # actual calculation of position and lane
-                    # always use random position for pre-filled vehicle
-                    # we do not consider departure interval here since this is supposed to be a snapshot from an earlier point of simulation
-                    # make sure to also include the end of the road itself
-                    # consider length, equal to departPos="base" in SUMO
-                    # we assume that a vehicle has to drive at least 1m
-                    depart_position = self._rng.uniform(vtype._length, self._road_length - 1)
-                    # always use random lane for pre-filled vehicle
-                    depart_lane = self._rng.randrange(0, self._number_of_lanes, 1)
+                # try random positions first and fall back to the free intervals of all lanes
+                for attempt in range(2 * MAX_PREFILL_ATTEMPTS):
+                    if attempt < MAX_PREFILL_ATTEMPTS:
+                        # actual calculation of position and lane
+                        # always use random position for pre-filled vehicle
+                        # we do not consider departure interval here since this is supposed to be a snapshot from an earlier point of simulation
+                        # make sure to also include the end of the road itself
+                        # consider length, equal to departPos="base" in SUMO
+                        # we assume that a vehicle has to drive at least 1m
+                        depart_position = self._rng.uniform(vtype._length, self._road_length - 1)
+                        # always use random lane for pre-filled vehicle
+                        depart_lane = self._rng.randrange(0, self._number_of_lanes, 1)
+                    else:
+                        depart_position, depart_lane = self._sample_free_prefill_position(occupancy, depart_speed)
 
                     LOG.trace(f"Generated random departure position for vehicle {vid}: {depart_position}-{vtype.length},{depart_lane}")
 
-                    if not self._vehicles:
-                        continue
-
-                    # avoid a collision with an existing vehicle
-                    for other_vehicle in self._vehicles.values():
-                        if other_vehicle._lane != depart_lane:
-                            # we do not care about other lanes
-                            continue
-                        if other_vehicle.position - other_vehicle.length > depart_position + 100 or other_vehicle.position < depart_position - vtype.length - 100:
-                            # we do not care about vehicles that are too far away
-                            continue
-
-                        # do we have a collision?
-                        # avoid being inserted in between two platoon members by also considering the min gap
-
-                        if has_collision(
-                            position1=depart_position + vtype._min_gap,  # front collider
-                            rear_position1=depart_position - vtype._length,  # rear collider
-                            lane1=depart_lane,
-                            position2=other_vehicle.position + other_vehicle.min_gap,  # front collider
-                            rear_position2=other_vehicle.rear_position,  # rear collider
-                            lane2=other_vehicle.lane,
-                        ):
-                            collision = True
-                            LOG.trace(f"Collision between {vid} and {other_vehicle.vid}")
-                            break
-
-                        # do we have a "collision" in the next step?
-                        # TODO use corresponding vtype
-                        if not is_insert_safe(
-                            depart_position=depart_position,
-                            depart_speed=depart_speed,
-                            vtype=vtype,
-                            other_vehicle=other_vehicle,
-                            step_length=self._step_length,
-                        ):
-                            collision = True
-                            LOG.trace(f"Unsafe insert between {vid} and {other_vehicle.vid}")
-                            break
-
-                        # use desired headway time and current speed to avoid harsh braking
-                        if other_vehicle._position <= depart_position:
-                            # the other vehicle is behind the current vehicle
-                            gap = depart_position - vtype.length - other_vehicle.position
-                            gap_desired = gap >= max(
-                                other_vehicle.desired_headway_time * other_vehicle.speed * self._step_length,
-                                other_vehicle.min_gap,
-                            )
-                        else:
-                            # the current vehicle is behind the other vehicle
-                            gap = other_vehicle.position - other_vehicle.length - depart_position
-                            gap_desired = gap >= max(
-                                vtype.headway_time * depart_speed * self._step_length,  # TODO use corresponding vtype
-                                vtype.min_gap,
-                            )
-                        if not gap_desired:
-                            collision = True
-                            LOG.trace(f"No desired gap between {vid} and {other_vehicle.vid} ({gap}m)")
-                            break
-                        assert gap >= vtype.min_gap, f"{vid}, {other_vehicle.vid}, {gap, vtype.min_gap}"
+                    if self._is_prefill_position_free(vid, depart_position, depart_lane, depart_speed, occupancy[depart_lane]):
+                        break
+                else:
+                    sys.exit(f"ERROR [{__name__}]: Could not find a free position for pre-filled vehicle {vid}! Reduce the number of vehicles (or the density).")
 
             arrival_position = get_arrival_position(
                 depart_position=depart_position,
@@ -1050,7 +1318,7 @@ class Simulator:
                 pre_fill=True,
             )
 
-            self._add_vehicle(
+            vehicle = self._add_vehicle(
                 vid=vid,
                 vtype=vtype,
                 depart_position=depart_position,
@@ -1061,102 +1329,314 @@ class Simulator:
                 depart_time=depart_time,
                 pre_filled=True,
             )
+            # keep the vehicles of every lane sorted by position
+            positions, vehicles = occupancy[depart_lane]
+            index = bisect.bisect_right(positions, depart_position)
+            positions.insert(index, depart_position)
+            vehicles.insert(index, vehicle)
 
             LOG.trace(f"Generated vehicle {vid} at {depart_position}-{depart_position - vtype._length},{depart_lane} with {depart_speed}")
 
         if self._start_as_platoon:
             self._initialize_prefilled_platoon()
 
-    def _vehicles_to_be_scheduled(self) -> int:
+    def _generate_vehicles_cached(self, key: str):
         """
-        Calculate how many vehicles should be spawned according to the departure method.
+        Add pre-filled vehicles to the simulation using the pre-fill cache.
+
+        The vehicles are loaded from the cache if available and generated (and stored in the cache) otherwise.
+
+        Parameters
+        ----------
+        key : str
+            The key of the pre-filled road within the cache
+        """
+
+        state = load_state(self._pre_fill_cache, key, self)
+        if state is None:
+            self._generate_vehicles()
+            state = {name: getattr(self, name) for name in PRE_FILL_STATE}
+            state['_rng'] = self._rng.getstate()
+            store_state(self._pre_fill_cache, key, self, state, max_size=self._pre_fill_cache_size * 1024 * 1024)
+            return
+
+        assert not self._vehicles
+        self._rng.setstate(state.pop('_rng'))
+        self.__dict__.update(state)
+
+    def _is_prefill_position_free(
+        self,
+        vid: int,
+        depart_position: float,
+        depart_lane: int,
+        depart_speed: float,
+        occupancy: tuple,
+    ) -> bool:
+        """
+        Check whether a pre-filled vehicle can be inserted at a given position.
+
+        Only the vehicles close to the position are checked, which are found by binary search.
+
+        Parameters
+        ----------
+        vid : int
+            The id of the vehicle to insert
+        depart_position : float
+            The planned departure position of the vehicle
+        depart_lane : int
+            The planned departure lane of the vehicle
+        depart_speed : float
+            The planned departure speed of the vehicle
+        occupancy : tuple(list, list)
+            The positions and vehicles of the lane (sorted by position)
 
         Returns
         -------
-        int : The number of vehicles to be spawned within this time step
+        bool : Whether the vehicle can be inserted
         """
 
-        vehicles_to_be_scheduled = -1
-        if not self._depart_flow and self._last_vehicle_id >= self._number_of_vehicles - 1:
-            # limit the spawn by a maximum number of total vehicles
-            LOG.debug(f"All {self._number_of_vehicles} vehicles have been spawned already")
-            # clear scheduled vehicles
-            vehicles_to_be_scheduled = 0
-        else:
-            # 1) number of new vehicles
-            if self._depart_method == "probability":
-                # spawn probability per time step, similar to SUMO's flow parameter probability
-                if self._step == 0:
-                    # special case in step 0 to avoid not having any vehicles and thus stopping the simulation
-                    vehicles_to_be_scheduled = 1
-                else:
-                    # interpret comparison result as vehicle spawn
-                    vehicles_to_be_scheduled = int(self._rng.random() <= self._depart_probability)
+        positions, vehicles = occupancy
+        # we do not care about vehicles that are too far away
+        first = bisect.bisect_left(positions, depart_position - vtype.length - 100)
+        # all pre-filled vehicles use the same vehicle type
+        last = bisect.bisect_right(positions, depart_position + 100 + vtype.length)
+        for other_vehicle in vehicles[first:last]:
+            assert other_vehicle._lane == depart_lane
+            if other_vehicle.position - other_vehicle.length > depart_position + 100 or other_vehicle.position < depart_position - vtype.length - 100:
+                # we do not care about vehicles that are too far away
+                continue
+
+            # do we have a collision?
+            # avoid being inserted in between two platoon members by also considering the min gap
+
+            if has_collision(
+                position1=depart_position + vtype._min_gap,  # front collider
+                rear_position1=depart_position - vtype._length,  # rear collider
+                lane1=depart_lane,
+                position2=other_vehicle.position + other_vehicle.min_gap,  # front collider
+                rear_position2=other_vehicle.rear_position,  # rear collider
+                lane2=other_vehicle.lane,
+            ):
+                LOG.trace(f"Collision between {vid} and {other_vehicle.vid}")
+                return False
+
+            # do we have a "collision" in the next step?
+            # TODO use corresponding vtype
+            if not is_insert_safe(
+                depart_position=depart_position,
+                depart_speed=depart_speed,
+                vtype=vtype,
+                other_vehicle=other_vehicle,
+                step_length=self._step_length,
+            ):
+                LOG.trace(f"Unsafe insert between {vid} and {other_vehicle.vid}")
+                return False
+
+            # use desired headway time and current speed to avoid harsh braking
+            if other_vehicle._position <= depart_position:
+                # the other vehicle is behind the current vehicle
+                gap = depart_position - vtype.length - other_vehicle.position
+                gap_desired = gap >= max(
+                    other_vehicle.desired_headway_time * other_vehicle.speed * self._step_length,
+                    other_vehicle.min_gap,
+                )
             else:
-                # 1) estimate how many vehicles their need to be with the given effective departure rate
-                # 2) subtract all already generated (i.e., finished, spawned, queued)
-                # and all pre-filled vehicles
-                desired_number_vehicles = int(self._step * self._effective_depart_rate) + 1
-                # without pre-filled vehicles
-                total_number_scheduled_vehicles = self._last_vehicle_id + 1 - self._number_of_prefilled_vehicles
-                vehicles_to_be_scheduled = desired_number_vehicles - total_number_scheduled_vehicles
-        return vehicles_to_be_scheduled
+                # the current vehicle is behind the other vehicle
+                gap = other_vehicle.position - other_vehicle.length - depart_position
+                gap_desired = gap >= max(
+                    vtype.headway_time * depart_speed * self._step_length,  # TODO use corresponding vtype
+                    vtype.min_gap,
+                )
+            if not gap_desired:
+                LOG.trace(f"No desired gap between {vid} and {other_vehicle.vid} ({gap}m)")
+                return False
+            assert gap >= vtype.min_gap, f"{vid}, {other_vehicle.vid}, {gap, vtype.min_gap}"
+        return True
 
-    def _spawn_vehicles(self, vdf: pd.DataFrame):
+    def _sample_free_prefill_position(self, occupancy: list, depart_speed: float) -> tuple:
         """
-        Spawns vehicles within the current step.
+        Sample a random position and lane from the free intervals of all lanes.
+
+        Parameters
+        ----------
+        occupancy : list(tuple(list, list))
+            The positions and vehicles of every lane (sorted by position)
+        depart_speed : float
+            The planned departure speed of the vehicle
+
+        Returns
+        -------
+        tuple(float, int)
+            The departure position and departure lane
+        """
+
+        starts, ends, lanes = [], [], []
+        for lane, (_, vehicles) in enumerate(occupancy):
+            start, end = get_free_intervals_np(
+                position=np.array([v.position for v in vehicles], dtype=float),
+                length=np.array([v.length for v in vehicles], dtype=float),
+                min_gap=np.array([v.min_gap for v in vehicles], dtype=float),
+                speed=np.array([v.speed for v in vehicles], dtype=float),
+                max_acceleration=np.array([v.max_acceleration for v in vehicles], dtype=float),
+                max_deceleration=np.array([v.max_deceleration for v in vehicles], dtype=float),
+                desired_headway_time=np.array([v.desired_headway_time for v in vehicles], dtype=float),
+                depart_speed=depart_speed,
+                vtype=vtype,
+                road_length=self._road_length,
+                step_length=self._step_length,
+            )
+            starts.append(start)
+            ends.append(end)
+            lanes.append(np.full(len(start), lane))
+        start, end, lane = np.concatenate(starts), np.concatenate(ends), np.concatenate(lanes)
+        if len(start) == 0:
+            sys.exit(f"ERROR [{__name__}]: There is no free position left for pre-filling! Reduce the number of vehicles (or the density).")
+
+        # sample uniformly from all free intervals
+        cumulative_length = np.cumsum(end - start)
+        offset = self._rng.uniform(0, cumulative_length[-1])
+        interval = min(int(np.searchsorted(cumulative_length, offset)), len(start) - 1)
+        return float(end[interval] - (cumulative_length[interval] - offset)), int(lane[interval])
+
+    def _generate_demand(self) -> dict:
+        """
+        Generate the trips of all vehicles departing within the simulation.
 
-        1) Calculate how many vehicles should be spawned according to the departure method
-        2) Calculate properties for these vehicles (e.g., desired speed)
-        3) Add vehicles to spawn queue
-        4) Spawn as many vehicles as possible from the queue (sorted by waiting time)
-        5) Update queue
+        Returns
+        -------
+        dict : The mapping from column name to array of all trips (sorted by schedule time)
         """
 
-        # 1) how many vehicles
-        vehicles_to_be_scheduled = self._vehicles_to_be_scheduled()
-        assert vehicles_to_be_scheduled >= 0
-        LOG.trace(f"I need to schedule {vehicles_to_be_scheduled} new vehicles in this step ({self._step}).")
+        return generate_demand(
+            rng=self._demand_rng,
+            first_vid=self._last_vehicle_id + 1,
+            max_step=self._max_step,
+            step_length=self._step_length,
+            depart_method=self._depart_method,
+            effective_depart_rate=self._effective_depart_rate,
+            depart_probability=self._depart_probability,
+            depart_flow=self._depart_flow,
+            number_of_vehicles=self._number_of_vehicles,
+            desired_speed=self._desired_speed,
+            speed_variation=self._speed_variation,
+            min_desired_speed=self._min_desired_speed,
+            max_desired_speed=self._max_desired_speed,
+            random_desired_speed=self._random_desired_speed,
+            depart_desired=self._depart_desired,
+            random_depart_speed=self._random_depart_speed,
+        )
 
-        # 2) vehicle properties
-        new_vehicles = []
-        for vid in range(vehicles_to_be_scheduled):
-            vid += self._last_vehicle_id + 1
-            desired_speed = get_desired_speed(
+    def _complete_trips(self, trips: dict):
+        """
+        Check the trips read from the trip file and choose their missing values.
+
+        Missing desired speeds, departure speeds, and arrival positions are chosen in the same way as for generated trips.
+
+        Parameters
+        ----------
+        trips : dict
+            The mapping from column name to array of the trips
+            keys: [schedule_time, vid, desired_speed, depart_ramp, depart_lane, depart_speed, arrival_position, platooning]
+        """
+
+        depart_ramp = trips['depart_ramp']
+        fixed_ramp = depart_ramp[~np.isnan(depart_ramp)]
+        if ((fixed_ramp % self._ramp_interval != 0) | (fixed_ramp < 0) | (fixed_ramp >= self._road_length)).any():
+            sys.exit(f"ERROR [{__name__}]: The departure ramps in the trip file have to be positions of on-ramps!")
+        depart_lane = trips['depart_lane']
+        fixed_lane = depart_lane[~np.isnan(depart_lane)]
+        if ((fixed_lane % 1 != 0) | (fixed_lane < 0) | (fixed_lane >= self._number_of_lanes)).any():
+            sys.exit(f"ERROR [{__name__}]: The departure lanes in the trip file have to be valid lanes!")
+        arrival_position = trips['arrival_position']
+        fixed_arrival = ~np.isnan(arrival_position)
+        earliest_arrival = np.nan_to_num(depart_ramp, nan=0) + vtype.length
+        if ((arrival_position[fixed_arrival] > self._road_length) | (arrival_position[fixed_arrival] <= earliest_arrival[fixed_arrival])).any():
+            sys.exit(f"ERROR [{__name__}]: The arrival positions in the trip file have to be on the road and after the departure positions!")
+
+        desired_speed = trips['desired_speed']
+        missing = np.isnan(desired_speed)
+        if missing.any():
+            desired_speed[missing] = get_desired_speed_np(
                 desired_speed=self._desired_speed,
-                rng=self._rng,
+                rng=self._demand_rng,
                 speed_variation=self._speed_variation,
                 min_desired_speed=self._min_desired_speed,
                 max_desired_speed=self._max_desired_speed,
                 random_desired_speed=self._random_desired_speed,
+                size=np.count_nonzero(missing),
             )
-            new_vehicles.append(
-                {
-                    'vid': vid,
-                    'desired_speed': desired_speed,
-                    'depart_speed': get_depart_speed(
-                        desired_speed=desired_speed,
-                        rng=self._rng,
-                        depart_desired=self._depart_desired,
-                        random_depart_speed=self._random_depart_speed,
-                    ),
-                    'schedule_time': self._step,
-                    'min_trip_length': self._minimum_trip_length,
-                    'max_trip_length': self._maximum_trip_length,
-                }
+        depart_speed = trips['depart_speed']
+        missing = np.isnan(depart_speed)
+        if missing.any():
+            depart_speed[missing] = get_depart_speed_np(
+                desired_speed=desired_speed[missing],
+                rng=self._demand_rng,
+                depart_desired=self._depart_desired,
+                random_depart_speed=self._random_depart_speed,
             )
+        trips['arrival_quantile'] = self._demand_rng.random(len(desired_speed))
+
+    def _spawn_vehicles(self, vdf: dict):
+        """
+        Spawns vehicles within the current step.
+
+        1) Take the vehicles scheduled for this step from the demand
+        2) Add vehicles to spawn queue
+        3) Spawn as many vehicles as possible from the queue (sorted by waiting time)
+        4) Remove spawned vehicles from the queue
 
-        # 3) enqueue
+        Parameters
+        ----------
+        vdf : dict
+            The mapping from column name to array of the vehicles in the simulation
+            keys: [position, length, lane, ..]
+        """
+
+        # 1) vehicles scheduled for this step
+        trips = self._demand.pop(self._step)
+        columns = ['desired_speed', 'depart_speed', 'arrival_quantile']
+        if self._trip_file:
+            # all trips of the trip file are replayed, regardless of the number of vehicles and the departure flow
+            self._complete_trips(trips)
+            columns += ['vid', 'depart_ramp', 'depart_lane', 'arrival_position', 'platooning']
+        elif not self._depart_flow and self._last_vehicle_id >= self._number_of_vehicles - 1:
+            # limit the spawn by a maximum number of total vehicles (including vehicles added otherwise)
+            LOG.debug(f"All {self._number_of_vehicles} vehicles have been spawned already")
+            trips = {column: values[:0] for column, values in trips.items()}
+        LOG.trace(f"I need to schedule {len(trips['schedule_time'])} new vehicles in this step ({self._step}).")
+        new_vehicles = []
+        vid = self._last_vehicle_id
+        for values in zip(*(trips[column].tolist() for column in columns)):
+            vehicle = dict(zip(columns, values))
+            if np.isnan(vehicle.get('vid', np.nan)):
+                vid += 1
+            elif vehicle['vid'] > vid:
+                vid = int(vehicle['vid'])
+            else:
+                sys.exit(f"ERROR [{__name__}]: The id {int(vehicle['vid'])} from the trip file is already used!")
+            vehicle['vid'] = vid
+            vehicle['schedule_time'] = self._step
+            if np.isnan(vehicle.get('arrival_position', np.nan)):
+                vehicle['min_trip_length'] = self._minimum_trip_length
+                vehicle['max_trip_length'] = self._maximum_trip_length
+            else:
+                # the trip length is given by the trip file
+                vehicle['min_trip_length'] = 0
+                vehicle['max_trip_length'] = self._road_length
+            new_vehicles.append(vehicle)
+
+        # 2) enqueue
         LOG.trace(f"Adding {len(new_vehicles)} vehicles to the spawn queue.")
         if new_vehicles:
             self._last_vehicle_id = new_vehicles[-1]["vid"]
-            self._vehicle_spawn_queue.extend(new_vehicles)
+            for vehicle in new_vehicles:
+                self._vehicle_spawn_queue.push(vehicle)
 
-        # 4) spawn
+        # 3) spawn
         LOG.trace(f"Trying to spawn {len(self._vehicle_spawn_queue)} new vehicles")
-        # sort by waiting/schedule time (and vid) for fairness
+        # ordered by waiting/schedule time (and vid) for fairness
         spawned_vehicles_df, not_spawned_vehicles = compute_vehicle_spawns(
-            vehicles=sorted(self._vehicle_spawn_queue, key=lambda d: (d['schedule_time'], d['vid'])),
+            vehicles=list(self._vehicle_spawn_queue),
             vdf=vdf,
             ramp_positions=self._ramp_positions,
             number_of_lanes=self._number_of_lanes,
@@ -1175,14 +1655,15 @@ class Simulator:
             assert row.depart_position < self._road_length
             assert row.arrival_position <= self._road_length
             assert row.arrival_position > row.depart_position
-            assert row.arrival_position - row.depart_position <= self._maximum_trip_length
+            assert row.arrival_position - row.depart_position <= row.max_trip_length
             # TODO duplicate
-            assert row.arrival_position <= row.depart_position + self._maximum_trip_length
-            assert row.depart_position - vtype.length <= self._road_length - self._minimum_trip_length
+            assert row.arrival_position <= row.depart_position + row.max_trip_length
+            assert row.depart_position - vtype.length <= self._road_length - row.min_trip_length
             # TODO duplicate
-            assert row.arrival_position >= row.depart_position + self._minimum_trip_length - vtype.length
+            assert row.arrival_position >= row.depart_position + row.min_trip_length - vtype.length
 
             # TODO: add to global vdf once it is available
+            self._vehicle_spawn_queue.remove(row.vid)
             vehicle = self._add_vehicle(
                 vid=row.vid,
                 vtype=vtype,
@@ -1193,6 +1674,7 @@ class Simulator:
                 depart_speed=row.depart_speed,
                 depart_time=row.depart_time,
                 depart_delay=row.depart_delay,
+                platooning=None if np.isnan(row.platooning) else bool(row.platooning),
             )
             if self._gui and self._step >= self._gui_start:
                 add_gui_vehicle(
@@ -1209,11 +1691,10 @@ class Simulator:
                 )
             LOG.trace(f"Spawned vehicle {vehicle.vid} ({vehicle.depart_position}-{vehicle.rear_position},{vehicle.depart_lane}).")
 
-        # 5) enqueue remaining
+        # 4) remaining vehicles stay in the queue
         if not_spawned_vehicles:
-            LOG.warning(f"Could not spawn a total of {len(not_spawned_vehicles)} vehicles within this step, putting them back into the queue!")
-        self._vehicle_spawn_queue = not_spawned_vehicles
-        assert len({v['vid'] for v in self._vehicle_spawn_queue}) == len(self._vehicle_spawn_queue)
+            LOG.warning(f"Could not spawn a total of {len(not_spawned_vehicles)} vehicles within this step, keeping them in the queue!")
+        assert len(self._vehicle_spawn_queue) == len(not_spawned_vehicles)
 
         return len(spawned_vehicles_df)
 
@@ -1230,6 +1711,7 @@ class Simulator:
         depart_delay: float = 0,
         communication_range: int = DEFAULTS['communication_range'],
         pre_filled: bool = False,
+        platooning: bool = None,
     ) -> Vehicle:
         """
         Add a vehicle to the simulation based on the given parameters.
@@ -1260,6 +1742,8 @@ class Simulator:
             The maximum communication range of the vehicle
         pre_filled : bool, optional
             Whether this vehicle was pre-filled
+        platooning : bool, optional
+            Whether the vehicle is capable of platooning (instead of depending on the penetration rate)
 
         Returns
         -------
@@ -1268,7 +1752,9 @@ class Simulator:
         """
 
         # choose vehicle "type" depending on the penetration rate
-        if self._rng.random() <= self._penetration_rate:
+        if platooning is None:
+            platooning = self._rng.random() <= self._penetration_rate
+        if platooning:
             vehicle = PlatooningVehicle(
                 simulator=self,
                 vid=vid,
@@ -1305,7 +1791,20 @@ class Simulator:
             )
 
         # add instance
+        if vid in self._vehicles:
+            # replace the existing vehicle
+            self._vehicles[vid]._detach_state()
+        else:
+            self._vehicle_sequence[vid] = self._next_vehicle_sequence
+            self._next_vehicle_sequence += 1
+        vehicle._attach_state(self._vehicle_state)
+        self._vehicle_state.columns["sequence"][vehicle._slot] = self._vehicle_sequence[vid]
+        self._invalidate_neighbor_index()
+        # we do not record statistics for pre-filled vehicles
+        self._vehicle_state.columns["record_statistics"][vehicle._slot] = self._record_prefilled or depart_time != -1
         self._vehicles[vid] = vehicle
+        # start the vehicle with its first action
+        self._schedule_vehicle_action(vehicle, self._step)
 
         return vehicle
 
@@ -1336,6 +1835,7 @@ class Simulator:
                 **self._kwargs,
             )
             self._infrastructures[iid] = infrastructure
+            heapq.heappush(self._infrastructure_action_queue, (self._step, iid))
 
             LOG.info(f"Generated infrastructure {infrastructure.iid} at {position}")
 
@@ -1507,6 +2007,54 @@ class Simulator:
         move();
         """
 
+        self._start()
+
+        progress_bar = tqdm(desc='Simulation progress', total=self._max_step, unit='step', disable=not self._progress)
+        # let the simulator run
+        while self._running:
+            start_time = timer()
+
+            counts = self._begin_step()
+            if counts is None:
+                continue
+
+            if self._vehicles:
+                # move vehicles (lane change, speed, position) and remove arrived vehicles
+                if self._mobility_backend == "numpy":
+                    arrived_vehicles, average_vehicle_speed, vehicles_braking_rough = self._move_vehicles_np()
+                else:
+                    arrived_vehicles, average_vehicle_speed, vehicles_braking_rough = self._move_vehicles_df()
+            else:
+                # statistics
+                arrived_vehicles = []
+                average_vehicle_speed = 0
+                vehicles_braking_rough = 0
+
+            end_time = timer()
+
+            self._end_step(
+                *counts,
+                arrived_vehicles=arrived_vehicles,
+                average_vehicle_speed=average_vehicle_speed,
+                vehicles_braking_rough=vehicles_braking_rough,
+                runtime=end_time - start_time,
+            )
+            progress_bar.update(self._step_length)
+            if self._gui and self._step > self._gui_start:
+                gui_step(target_step=self._step, screenshot_filename=self._screenshot_file)
+
+        # We reach this point only by setting self._running to False
+        # which is only done by calling self.stop()
+
+        self._finish()
+
+        return self._step
+
+    def _start(self):
+        """
+        Start the simulation (i.e., mark it as running and initialize the result recording).
+        """
+
         if not self._running:
             self._running = True
         else:
@@ -1514,155 +2062,459 @@ class Simulator:
 
         self._initialize_result_recording()
 
-        progress_bar = tqdm(desc='Simulation progress', total=self._max_step, unit='step', disable=not self._progress)
-        # let the simulator run
-        while self._running:
-            start_time = timer()
+    def _begin_step(self) -> tuple:
+        """
+        Begin a simulation step until the movement of the vehicles.
 
-            if self._step >= self._max_step:
-                self.stop("Reached step limit")
-                continue
+        This spawns vehicles and calls the regular actions on vehicles and infrastructures.
+        The simulation is stopped if the step limit is reached or there are no more vehicles.
 
-            # initialize the GUI
-            if self._gui and self._step == self._gui_start:
-                self._initialize_gui()
+        Returns
+        -------
+        tuple(int, int, int)
+            The number of vehicles in the simulation, in the spawn queue, and spawned within this step,
+            or None if the step limit was reached
+        """
 
-            # spawn vehicle based on given parameters
-            vehicles_spawned = self._spawn_vehicles(self._get_vehicles_df())
+        if self._step >= self._max_step:
+            self.stop("Reached step limit")
+            return None
 
-            # statistics
-            vehicles_in_simulator = len(self._vehicles)
-            vehicles_in_queue = len(self._vehicle_spawn_queue)
+        # initialize the GUI
+        if self._gui and self._step == self._gui_start:
+            self._initialize_gui()
 
-            if self._vehicles:
-                # update the GUI
-                if self._gui and self._step >= self._gui_start:
-                    self._update_gui()
-
-                # call regular actions on vehicles
-                self._call_vehicle_actions()
-                # call regular actions on infrastructure
-                self._call_infrastructure_actions()
-
-                # BEGIN VECTORIZATION PART
-                # TODO move upwards/get rid of it entirely
-                # convert dict of vehicles to Dataframe (temporary)
-                vdf = self._get_vehicles_df()
-                vdf = vdf.sort_values(["position", "lane"], ascending=False)
-
-                # perform lane changes (for all vehicles)
-                # update neighbor data (predecessor, successor, front)
-                lane_changes = compute_lane_changes(
-                    vdf=vdf,
-                    max_lane=self._number_of_lanes - 1,
-                    step_length=self._step_length,
+        # spawn vehicle based on given parameters
+        vehicles_spawned = self._spawn_vehicles(self._get_vehicles_arrays())
+
+        # statistics
+        vehicles_in_simulator = len(self._vehicles)
+        vehicles_in_queue = len(self._vehicle_spawn_queue)
+
+        if self._vehicles:
+            # update the GUI
+            if self._gui and self._step >= self._gui_start:
+                self._update_gui()
+
+            # account time loss and emissions (for all vehicles)
+            self._account_statistics()
+
+            # call regular actions on vehicles
+            self._call_vehicle_actions()
+            # call regular actions on infrastructure
+            self._call_infrastructure_actions()
+        elif not self._vehicle_spawn_queue and (not self._trip_file or self._demand.exhausted):
+            # a trip file is replayed until its end, even if the road is empty in between
+            self.stop("No more vehicles in the simulation")  # do we really want to exit here?
+
+        return vehicles_in_simulator, vehicles_in_queue, vehicles_spawned
+
+    def _end_step(
+            self,
+            vehicles_in_simulator: int,
+            vehicles_in_queue: int,
+            vehicles_spawned: int,
+            arrived_vehicles: list,
+            average_vehicle_speed: float,
+            vehicles_braking_rough: int,
+            runtime: float,
+    ):
+        """
+        End a simulation step after the movement of the vehicles.
+
+        This records the periodic statistics and advances the simulation to the next step.
+
+        Parameters
+        ----------
+        vehicles_in_simulator : int
+            The number of vehicles in the scenario within this step
+        vehicles_in_queue : int
+            The number of vehicles in the spawn queue within this step
+        vehicles_spawned : int
+            The number of vehicles that departed within this step
+        arrived_vehicles : list
+            The vehicles that arrived within this step
+        average_vehicle_speed : float
+            The average driving speed among all vehicles in the scenario within this step
+        vehicles_braking_rough : int
+            The number of vehicles performing rough braking within this step
+        runtime : float
+            The run time of this step
+        """
+
+        # record some periodic statistics
+        self._statistics(
+            vehicles_in_simulator=vehicles_in_simulator,
+            vehicles_in_queue=vehicles_in_queue,
+            vehicles_spawned=vehicles_spawned,
+            vehicles_arrived=len(arrived_vehicles),
+            runtime=runtime,
+            average_vehicle_speed=average_vehicle_speed,
+            vehicles_braking_rough=vehicles_braking_rough,
+        )
+
+        # a new step begins
+        self._step += self._step_length
+
+    def _move_vehicles_df(self) -> tuple:
+        """
+        Move all vehicles within one simulation step, pandas variant.
+
+        This performs lane changes, speed and position updates, and removes arrived vehicles.
+
+        Returns
+        -------
+        tuple(list, float, int)
+            The arrived vehicles, the average vehicle speed, and the number of vehicles braking rough
+        """
+
+        # TODO move upwards/get rid of it entirely
+        # convert dict of vehicles to Dataframe (temporary)
+        vdf = self._get_vehicles_df()
+        vdf = vdf.sort_values(["position", "lane"], ascending=False)
+
+        # perform lane changes (for all vehicles)
+        # update neighbor data (predecessor, successor, front)
+        lane_changes = compute_lane_changes(
+            vdf=vdf,
+            max_lane=self._number_of_lanes - 1,
+            step_length=self._step_length,
+        )
+        # apply lane changes
+        vdf['old_lane'] = vdf['lane']
+        vdf['lane'] = lane_changes['lane']
+        vdf['lc_reason'] = lane_changes['reason']
+
+        # record lane changes
+        # TODO move to better location
+        if self._record_vehicle_changes or self._record_platoon_changes:
+            self._record_lane_changes(vdf)
+
+        # update neighbor data (predecessor, successor, front)
+        predecessor_map = lane_predecessors(vdf, self._number_of_lanes - 1)
+        predecessor = get_predecessors(
+            vdf=vdf,
+            predecessor_map=predecessor_map,
+            target_lane=vdf.lane,
+        ).rename(columns=lambda col: "predecessor_" + col)
+        assert predecessor[predecessor.predecessor_vid != -1].predecessor_vid.is_unique
+
+        # adjust speed (of all vehicles)
+        new_speed = compute_new_speeds(
+            vdf.merge(predecessor, left_index=True, right_index=True),
+            step_length=self._step_length,
+        )
+        # apply new speed
+        vehicles_braking_rough = report_rough_braking(vdf, new_speed, step_length=self._step_length)
+        vdf['old_speed'] = vdf['speed']
+        vdf['speed'] = new_speed
+        vdf['blocked_front'] = (
+            (vdf.speed < vdf.max_speed)
+            & ((vdf.speed - vdf.old_speed) <= 0)
+            & (vdf.cf_model != CF_Model.CACC)
+        )
+        average_vehicle_speed = vdf.speed.mean()
+
+        # adjust positions (of all vehicles)
+        vdf = update_position(vdf, self._step_length)
+
+        # convert Dataframe back to dict of vehicles
+        self._write_back_vehicles_df(vdf)
+
+        # get arrived vehicles
+        arrived_vehicles = vdf[
+            (vdf.position >= vdf.arrival_position)
+        ].index.values
+
+        # remove arrived vehicles from Dataframe
+        vdf = vdf.drop(arrived_vehicles)
+
+        # do collision check (for all vehicles)
+        # without arrived vehicles
+        self._check_collisions(vdf)
+
+        # remove arrived vehicles from dict and do finish
+        self._remove_arrived_vehicles(arrived_vehicles)
+
+        # make sure that everything is correct
+        assert list(vdf.index).sort() == list(self._vehicles.keys()).sort()
+
+        return arrived_vehicles, average_vehicle_speed, vehicles_braking_rough
+
+    def _move_vehicles_np(self) -> tuple:
+        """
+        Move all vehicles within one simulation step, NumPy variant.
+
+        This performs lane changes, speed and position updates, and removes arrived vehicles.
+        Pandas is only used for recording lane changes, reporting rough braking, and checking for collisions.
+
+        Returns
+        -------
+        tuple(list, float, int)
+            The arrived vehicles, the average vehicle speed, and the number of vehicles braking rough
+        """
+
+        vehicles = self._get_mobility_arrays()
+        return self._apply_mobility_np(vehicles, *self._compute_mobility_np(vehicles))
+
+    def _get_mobility_arrays(self) -> dict:
+        """
+        Return the vehicle data required for the mobility computations as NumPy arrays.
+
+        Returns
+        -------
+        dict
+            The mapping from column name to array, sorted by position and lane (descending)
+            keys: [vid, slot, position, lane, leader_row, ..]
+        """
+
+        vehicles = self._get_vehicles_arrays(self._update_vehicle_order())
+        rows = np.arange(len(vehicles["slot"]))
+        # translate leaders' slots to rows
+        slot_rows = np.full(self._vehicle_state.capacity, -1)
+        slot_rows[vehicles["slot"]] = rows
+        vehicles["leader_row"] = np.where(vehicles["leader_slot"] >= 0, slot_rows[vehicles["leader_slot"]], -1)
+        return vehicles
+
+    def _compute_mobility_np(self, vehicles: dict) -> tuple:
+        """
+        Perform lane changes and adjust the speed of all given vehicles, NumPy variant.
+
+        Parameters
+        ----------
+        vehicles : dict
+            The mapping from column name to array (see _get_mobility_arrays)
+
+        Returns
+        -------
+        tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+            The new lanes, the lane change reasons (codes of LC_REASONS), and the new speeds
+        """
+
+        return (
+            compute_lane_changes_and_speeds_platoons_np if self._rigid_platoons else compute_lane_changes_and_speeds_np
+        )(
+            vehicles=vehicles,
+            max_lane=self._number_of_lanes - 1,
+            step_length=self._step_length,
+            kernels=get_kernels(self._mobility_kernels),
+        )
+
+    def _apply_mobility_np(
+            self,
+            vehicles: dict,
+            lane: np.ndarray,
+            lc_reason: np.ndarray,
+            new_speed: np.ndarray,
+    ) -> tuple:
+        """
+        Apply the lane changes and new speeds to all vehicles, update their positions, and remove arrived vehicles.
+
+        Parameters
+        ----------
+        vehicles : dict
+            The mapping from column name to array (see _get_mobility_arrays)
+        lane : numpy.ndarray
+            The new lanes of the vehicles
+        lc_reason : numpy.ndarray
+            The lane change reasons of the vehicles (codes of LC_REASONS)
+        new_speed : numpy.ndarray
+            The new speeds of the vehicles
+
+        Returns
+        -------
+        tuple(list, float, int)
+            The arrived vehicles, the average vehicle speed, and the number of vehicles braking rough
+        """
+
+        kernels = get_kernels(self._mobility_kernels)
+        vid = vehicles["vid"]
+
+        # apply lane changes
+        old_lane = vehicles["lane"]
+        vehicles["lane"] = lane
+
+        # record lane changes
+        # TODO move to better location
+        changed = lane != old_lane
+        if (self._record_vehicle_changes or self._record_platoon_changes) and changed.any():
+            self._record_lane_changes(
+                pd.DataFrame(
+                    {
+                        "position": vehicles["position"][changed],
+                        "speed": vehicles["speed"][changed],
+                        "cf_model": pd.Categorical.from_codes(vehicles["cf_model"][changed], dtype=CFModelDtype),
+                        "platoon_role": pd.Categorical.from_codes(vehicles["platoon_role"][changed], dtype=PlatoonRoleDtype),
+                        "old_lane": old_lane[changed],
+                        "lane": lane[changed],
+                        "lc_reason": np.array(LC_REASONS, dtype=object)[lc_reason[changed]],
+                    },
+                    index=pd.Index(vid[changed], name="vid"),
                 )
-                # apply lane changes
-                vdf['old_lane'] = vdf['lane']
-                vdf['lane'] = lane_changes['lane']
-                vdf['lc_reason'] = lane_changes['reason']
-
-                # record lane changes
-                # TODO move to better location
-                if self._record_vehicle_changes or self._record_platoon_changes:
-                    self._record_lane_changes(vdf)
-
-                # update neighbor data (predecessor, successor, front)
-                predecessor_map = lane_predecessors(vdf, self._number_of_lanes - 1)
-                predecessor = get_predecessors(
-                    vdf=vdf,
-                    predecessor_map=predecessor_map,
-                    target_lane=vdf.lane,
-                ).rename(columns=lambda col: "predecessor_" + col)
-                assert predecessor[predecessor.predecessor_vid != -1].predecessor_vid.is_unique
-
-                # adjust speed (of all vehicles)
-                new_speed = compute_new_speeds(
-                    vdf.merge(predecessor, left_index=True, right_index=True),
-                    step_length=self._step_length,
+            )
+
+        # apply new speed
+        old_speed = vehicles["speed"]
+        # only hand potential rough brakers (see report_rough_braking) to pandas
+        brakers = (old_speed - new_speed) > (vehicles["max_deceleration"] * 0.5 * self._step_length)
+        vehicles_braking_rough = 0
+        if brakers.any():
+            vehicles_braking_rough = report_rough_braking(
+                vdf=pd.DataFrame(
+                    {
+                        "lane": lane[brakers],
+                        "position": vehicles["position"][brakers],
+                        "speed": old_speed[brakers],
+                        "max_deceleration": vehicles["max_deceleration"][brakers],
+                    },
+                    index=pd.Index(vid[brakers], name="vid"),
+                ),
+                new_speed=pd.Series(new_speed[brakers], index=pd.Index(vid[brakers], name="vid")),
+                step_length=self._step_length,
+            )
+        vehicles["speed"] = new_speed
+        blocked_front = (
+            (new_speed < vehicles["max_speed"])
+            & ((new_speed - old_speed) <= 0)
+            & (vehicles["cf_model"] != CF_Model.CACC.value)
+        )
+        average_vehicle_speed = new_speed.mean()
+
+        # adjust positions (of all vehicles)
+        position = update_position_np(vehicles, self._step_length, kernels)
+
+        # write back to the vehicle state store
+        columns = self._vehicle_state.columns
+        slots = vehicles["slot"]
+        columns["position"][slots] = position
+        self._invalidate_neighbor_index()
+        columns["speed"][slots] = new_speed
+        columns["acceleration"][slots] = new_speed - old_speed
+        columns["blocked_front"][slots] = blocked_front
+        columns["lane"][slots] = lane
+
+        # get arrived vehicles
+        arrived = position >= vehicles["arrival_position"]
+        arrived_vehicles = vid[arrived]
+
+        # do collision check (for all vehicles)
+        # without arrived vehicles
+        if self._collisions:
+            remaining = np.flatnonzero(~arrived)
+            crashed = remaining[
+                get_crashed_vehicles_np(
+                    position=position[remaining],
+                    rear_position=position[remaining] - vehicles["length"][remaining],
+                    lane=lane[remaining],
+                    max_lane=self._number_of_lanes - 1,
                 )
-                # apply new speed
-                vehicles_braking_rough = report_rough_braking(vdf, new_speed, step_length=self._step_length)
-                vdf['old_speed'] = vdf['speed']
-                vdf['speed'] = new_speed
-                vdf['blocked_front'] = (
-                    (vdf.speed < vdf.max_speed)
-                    & ((vdf.speed - vdf.old_speed) <= 0)
-                    & (vdf.cf_model != CF_Model.CACC)
+            ]
+            if len(crashed) > 0:
+                report_collisions(
+                    pd.DataFrame(
+                        {
+                            "position": position[crashed],
+                            "length": vehicles["length"][crashed],
+                            "lane": lane[crashed],
+                        },
+                        index=pd.Index(vid[crashed], name="vid"),
+                    ).sort_index()
                 )
-                average_vehicle_speed = vdf.speed.mean()
+                self._abort_on_collisions()
 
-                # adjust positions (of all vehicles)
-                vdf = update_position(vdf, self._step_length)
+        # remove arrived vehicles from dict and do finish
+        self._remove_arrived_vehicles(arrived_vehicles)
 
-                # convert Dataframe back to dict of vehicles
-                self._write_back_vehicles_df(vdf)
+        # make sure that everything is correct
+        assert len(self._vehicle_state) == len(self._vehicles)
 
-                # get arrived vehicles
-                arrived_vehicles = vdf[
-                    (vdf.position >= vdf.arrival_position)
-                ].index.values
+        return arrived_vehicles, average_vehicle_speed, vehicles_braking_rough
 
-                # remove arrived vehicles from Dataframe
-                vdf = vdf.drop(arrived_vehicles)
+    def _get_neighbor_index(self) -> NeighborIndex:
+        """
+        Return the index of all platooning vehicles sorted by position.
 
-                # do collision check (for all vehicles)
-                # without arrived vehicles
-                if self._collisions and check_collisions(vdf):
-                    # record final vehicle trace entries
-                    if self._record_vehicle_traces:
-                        for v in self._vehicles.values():
-                            record_vehicle_trace(
-                                basename=self._result_base_filename,
-                                step=self._step + self._step_length,
-                                vehicle=v,
-                            )
+        The index is built at most once per step unless vehicles depart, arrive, or teleport.
 
-                    sys.exit(f"ERROR [{__name__}]: There were collisions between vehicles!")
+        Returns
+        -------
+        NeighborIndex : The neighbor index
+        """
 
-                # remove arrived vehicles from dict and do finish
-                self._remove_arrived_vehicles(arrived_vehicles)
+        if self._neighbor_index is None:
+            self._neighbor_index = NeighborIndex(self._vehicle_state)
+        return self._neighbor_index
 
-                # make sure that everything is correct
-                assert list(vdf.index).sort() == list(self._vehicles.keys()).sort()
+    def _invalidate_neighbor_index(self):
+        """
+        Invalidate the neighbor index after the positions of vehicles changed.
+        """
 
-                del vdf
-                # END VECTORIZATION PART
-            else:
-                if not self._vehicle_spawn_queue:
-                    self.stop("No more vehicles in the simulation")  # do we really want to exit here?
+        self._neighbor_index = None
 
-                # statistics
-                arrived_vehicles = []
-                average_vehicle_speed = 0
-                vehicles_braking_rough = 0
+    def _update_vehicle_order(self) -> np.ndarray:
+        """
+        Update the persistent order of all vehicles by position and lane (descending).
 
-            end_time = timer()
+        The order of the previous step is repaired instead of being re-computed from scratch:
+        Arrived vehicles are dropped, new vehicles are appended, and the nearly sorted result is re-sorted.
+        Vehicles with equal position and lane are ordered by their slots.
 
-            # record some periodic statistics
-            run_time = end_time - start_time
-            self._statistics(
-                vehicles_in_simulator=vehicles_in_simulator,
-                vehicles_in_queue=vehicles_in_queue,
-                vehicles_spawned=vehicles_spawned,
-                vehicles_arrived=len(arrived_vehicles),
-                runtime=run_time,
-                average_vehicle_speed=average_vehicle_speed,
-                vehicles_braking_rough=vehicles_braking_rough,
-            )
+        Returns
+        -------
+        numpy.ndarray
+            The slots of all vehicles in order
+        """
 
-            # a new step begins
-            self._step += self._step_length
-            progress_bar.update(self._step_length)
-            if self._gui and self._step > self._gui_start:
-                gui_step(target_step=self._step, screenshot_filename=self._screenshot_file)
+        state = self._vehicle_state
+        order = self._vehicle_order
+        # drop vehicles that left the simulation
+        order = order[state.active[order]]
+        # append vehicles that entered the simulation
+        known = np.zeros(state.capacity, dtype=bool)
+        known[order] = True
+        order = np.concatenate([order, np.flatnonzero(state.active & ~known)])
+
+        permutation = sort_order_np(
+            position=state.columns["position"][order],
+            lane=state.columns["lane"][order],
+            tiebreak=order,
+        )
+        self._vehicle_order = order[permutation]
+        return self._vehicle_order
 
-        # We reach this point only by setting self._running to False
-        # which is only done by calling self.stop()
+    def _check_collisions(self, vdf: pd.DataFrame):
+        """
+        Check for collisions between vehicles and exit the simulation if there are any.
 
-        self._finish()
+        Parameters
+        ----------
+        vdf : pd.DataFrame
+            The Dataframe containing the vehicles as rows
+            index: vid
+            columns: [position, length, lane, ..]
+        """
 
-        return self._step
+        if not self._collisions or not check_collisions(vdf):
+            return
+
+        self._abort_on_collisions()
+
+    def _abort_on_collisions(self):
+        """
+        Exit the simulation due to collisions between vehicles.
+        """
+
+        # record final vehicle trace entries
+        if self._record_vehicle_traces:
+            for v in self._vehicles.values():
+                record_vehicle_trace(
+                    basename=self._result_base_filename,
+                    step=self._step + self._step_length,
+                    vehicle=v,
+                )
+
+        sys.exit(f"ERROR [{__name__}]: There were collisions between vehicles!")
 
     def _statistics(
             self,
@@ -1790,6 +2642,102 @@ class Simulator:
                         reason=row.lc_reason,
                     )
 
+    def _get_vehicles_arrays(self, slots: np.ndarray = None) -> dict:
+        """
+        Return the (effective) vehicle data from the internal data structure as NumPy arrays.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray, optional
+            The slots of the vehicles (in the desired order) within the vehicle state store.
+            Defaults to all vehicles ordered by their slots.
+
+        Returns
+        -------
+        dict
+            The mapping from column name to array
+            keys: [vid, slot, position, length, lane, ..]
+        """
+
+        state = self._vehicle_state
+        columns = state.columns
+        if slots is None:
+            slots = state.active_slots()
+
+        def column(name: str) -> np.ndarray:
+            return columns[name][slots]
+
+        position = column("position")
+        length = column("length")
+        cf_model = column("cf_model")
+        platoon_role = column("platoon_role")
+        platooning = platoon_role >= 0
+        leader_slot = column("leader_slot")
+        last_slot = column("last_slot")
+
+        platoon_position = np.full(len(slots), HIGHVAL)
+        platoon_position[platooning] = columns["position"][leader_slot[platooning]]
+        platoon_rear_position = np.full(len(slots), HIGHVAL)
+        platoon_rear_position[platooning] = (
+            columns["position"][last_slot[platooning]]
+            - columns["length"][last_slot[platooning]]
+        )
+        rear_position = position - length
+        assert (rear_position >= 0).all()
+
+        # use potential other desired headway time
+        desired_headway_time = column("headway_time")
+        desired_headway_time = np.where(
+            platooning & (cf_model == CF_Model.ACC.value),
+            column("acc_headway_time"),
+            desired_headway_time,
+        )
+        desired_headway_time = np.where(
+            platooning & (cf_model == CF_Model.CACC.value),
+            0,
+            desired_headway_time,
+        )
+
+        # compute effective limits
+        platoon_desired_speed = column("platoon_desired_speed")
+        platoon_max_speed = column("platoon_max_speed")
+        platoon_max_acceleration = column("platoon_max_acceleration")
+        platoon_max_deceleration = column("platoon_max_deceleration")
+        max_speed = np.minimum.reduce([
+            column("max_speed"),
+            column("cf_target_speed"),
+            platoon_max_speed,
+            platoon_desired_speed,
+        ])
+
+        return {
+            "vid": column("vid"),
+            "slot": slots,
+            "arrival_position": column("arrival_position"),
+            "position": position,
+            "lane": column("lane"),
+            "speed": column("speed"),
+            "cf_model": cf_model,
+            "length": length,
+            "min_gap": column("min_gap"),
+            "max_speed": max_speed,
+            "max_acceleration": np.minimum(column("max_acceleration"), platoon_max_acceleration),
+            "max_deceleration": np.minimum(column("max_deceleration"), platoon_max_deceleration),
+            "leader_id": np.where(platooning, columns["vid"][leader_slot], -1),
+            "leader_slot": np.where(platooning, leader_slot, -1),
+            "platoon_id": column("platoon_id"),
+            "platoon_desired_speed": platoon_desired_speed,
+            "platoon_max_speed": platoon_max_speed,
+            "platoon_max_acceleration": platoon_max_acceleration,
+            "platoon_max_deceleration": platoon_max_deceleration,
+            "platoon_position": platoon_position,
+            "platoon_rear_position": platoon_rear_position,
+            "platoon_role": platoon_role,
+            "desired_headway_time": desired_headway_time,
+            "acc_lambda": column("acc_lambda"),
+            "rear_position": np.minimum(rear_position, platoon_rear_position),
+        }
+
     def _get_vehicles_df(self) -> pd.DataFrame:
         """
         Return a pandas Dataframe from the internal data structure.
@@ -1802,83 +2750,13 @@ class Simulator:
             columns: [position, length, lane, ..]
         """
 
-        platoon_fields = [
-            "leader_id",
-            "platoon_id",
-            "platoon_desired_speed",
-            "platoon_max_speed",
-            "platoon_max_acceleration",
-            "platoon_max_deceleration",
-            "platoon_position",
-            "platoon_rear_position",
-        ]
-
-        def get_platoon_data(vehicle):
-            data = {key: 1e15 for key in platoon_fields}
-            data["leader_id"] = -1
-            data["platoon_id"] = -1
-            data["platoon_role"] = None
-
-            if not isinstance(vehicle, PlatooningVehicle):
-                return data
-
-            platoon = vehicle._platoon
-            data["leader_id"] = platoon._formation[0].vid
-            data["platoon_id"] = platoon._platoon_id
-            data["platoon_role"] = vehicle._platoon_role
-            data["platoon_desired_speed"] = platoon._desired_speed
-            data["platoon_max_speed"] = platoon.max_speed
-            data["platoon_max_acceleration"] = platoon.max_acceleration
-            data["platoon_max_deceleration"] = platoon.max_deceleration
-            data["platoon_position"] = platoon.position
-            data["platoon_rear_position"] = platoon.rear_position
-            return data
-
-        fields = [
-            "arrival_position",
-            "cf_target_speed",
-            "position",
-            "lane",
-            "speed",
-            "cf_model",
-            "vid",
-        ]
-        vtype_fields = [
-            "length",
-            "min_gap",
-            "max_speed",
-            "max_acceleration",
-            "max_deceleration",
-        ]
-
-        if not self._vehicles:
-            return pd.DataFrame({key: [] for key in fields + vtype_fields + platoon_fields + ["desired_headway_time", "acc_lambda"]}).drop(["cf_target_speed"], axis="columns")
-        return (
-            pd.DataFrame([
-                dict(
-                    **{key: vars(vehicle)[f"_{key}"] for key in fields},
-                    **{key: vars(vehicle._vehicle_type)[f"_{key}"] for key in vtype_fields},
-                    **get_platoon_data(vehicle),
-                    desired_headway_time=vehicle.desired_headway_time,
-                    acc_lambda=getattr(vehicle, "_acc_lambda", np.nan),
-                    rear_position=vehicle.rear_position,
-                )
-                for vehicle in self._vehicles.values()
-            ])
-            .astype({"cf_model": CFModelDtype, "platoon_role": PlatoonRoleDtype})
-            .set_index('vid')
-            # compute effective limits
-            # These computations may negatively impact performance, but will
-            # eventually be removed from here anyway once the Dataframe stays
-            # and computations/updates move to actions (like platoon updates).
-            .assign(
-                max_speed=lambda df: df[["max_speed", "cf_target_speed", "platoon_max_speed", "platoon_desired_speed"]].min(axis="columns"),
-                max_acceleration=lambda df: df[["max_acceleration", "platoon_max_acceleration"]].min(axis="columns"),
-                max_deceleration=lambda df: df[["max_deceleration", "platoon_max_deceleration"]].min(axis="columns"),
-                rear_position=lambda df: df[["rear_position", "platoon_rear_position"]].min(axis="columns"),
-            )
-            .drop(["cf_target_speed"], axis="columns")
-        )
+        vehicles = self._get_vehicles_arrays()
+        vehicles["cf_model"] = pd.Categorical.from_codes(vehicles["cf_model"], dtype=CFModelDtype)
+        vehicles["platoon_role"] = pd.Categorical.from_codes(vehicles["platoon_role"], dtype=PlatoonRoleDtype)
+        vid = vehicles.pop("vid")
+        vehicles.pop("slot")
+        vehicles.pop("leader_slot")
+        return pd.DataFrame(vehicles, index=pd.Index(vid, name="vid"))
 
     def _write_back_vehicles_df(self, vdf: pd.DataFrame):
         """
@@ -1895,14 +2773,15 @@ class Simulator:
         # make sure that everything is correct
         assert list(vdf.index).sort() == list(self._vehicles.keys()).sort()
 
-        for row in vdf.itertuples():
-            # update all fields within the data that we updated with pandas
-            vehicle = self._vehicles[row.Index]
-            vehicle._position = row.position
-            vehicle._speed = row.speed
-            vehicle._acceleration = row.speed - row.old_speed
-            vehicle._blocked_front = row.blocked_front
-            vehicle._lane = row.lane
+        # update all fields within the data that we updated with pandas
+        columns = self._vehicle_state.columns
+        slots = self._vehicle_state.slots_of(vdf.index.values)
+        columns["position"][slots] = vdf.position.values
+        self._invalidate_neighbor_index()
+        columns["speed"][slots] = vdf.speed.values
+        columns["acceleration"][slots] = (vdf.speed - vdf.old_speed).values
+        columns["blocked_front"][slots] = vdf.blocked_front.values
+        columns["lane"][slots] = vdf.lane.values
 
     def stop(self, msg: str):
         """
@@ -1925,7 +2804,16 @@ class Simulator:
 
         sim_dict = vars(self).copy()
         sim_dict.pop('_vehicles')
+        sim_dict.pop('_vehicle_state')
+        sim_dict.pop('_vehicle_order')
+        sim_dict.pop('_neighbor_index')
+        sim_dict.pop('_vehicle_sequence')
+        sim_dict.pop('_next_vehicle_sequence')
+        sim_dict.pop('_vehicle_action_queue')
         sim_dict.pop('_infrastructures')
+        sim_dict.pop('_infrastructure_action_queue')
+        sim_dict.pop('_arrived_counter_totals')
+        sim_dict.pop('_demand')
         sim_dict.update({'current_number_of_vehicles': len(self._vehicles)})
         sim_dict.update({'current_number_of_infrastructures': len(self._infrastructures)})
         return str(dict(sorted(sim_dict.items())))
@@ -1999,6 +2887,11 @@ def compute_vehicle_spawns(
     """
     Spawn as many vehicles as possible from the queue (sorted by waiting time).
 
+    The front and back vehicles of all spawn coordinates (ramp + lane) are determined by binary search on the positions of every lane.
+    The gap safety is checked for all queued vehicles and spawn coordinates at once.
+    Every spawn coordinate is then assigned to the longest waiting vehicle that fits.
+    Vehicles with a fixed departure ramp, departure lane, or arrival position (e.g., from a trip file) only fit to the corresponding spawn coordinates.
+
     Assumption: list of vehicles is already sorted ascending by departure priority (e.g., waiting time)
     Assumption: ramp positions is sorted in ascending manner
 
@@ -2006,9 +2899,9 @@ def compute_vehicle_spawns(
     ----------
     vehicles : list(dict)
         The list of vehicles to add
-    vdf : pandas.DataFrame
-        The Dataframe containing the vehicles as rows
-        index: vid
+        keys: [vid, desired_speed, depart_speed, schedule_time, min_trip_length, max_trip_length, arrival_quantile (optional), depart_ramp (optional), depart_lane (optional), arrival_position (optional), platooning (optional)]
+    vdf : pandas.DataFrame or dict
+        The Dataframe containing the vehicles as rows (or the mapping from column name to array)
         columns: [position, length, lane, ..]
     ramp_positions : list(int)
         The list of available on-ramp positions in m
@@ -2031,150 +2924,181 @@ def compute_vehicle_spawns(
     if not vehicles:
         return pd.DataFrame(), []
 
-    # add dummy predecessor to use for all front gap calculations
-    vdf = pd.concat(
-        [vdf] + [DUMMY.assign(lane=lane) for lane in range(number_of_lanes)],
-        ignore_index=True,
-    ).astype({'lane': int})
+    # per-lane arrays of all vehicles sorted by position
+    # add dummy predecessor and successor to use for all gap calculations
+    # since we have the dummies, we can assume there is always a vehicle in front of and behind every spawn position
+    number_of_vehicles = len(np.asarray(vdf['position']))
+    lanes = np.concatenate([np.asarray(vdf['lane'], dtype=int), np.repeat(np.arange(number_of_lanes), len(DUMMY))])
+    order = np.lexsort((np.concatenate([np.asarray(vdf['position'], dtype=float), np.tile(DUMMY['position'], number_of_lanes)]), lanes))
+    lane_bounds = np.searchsorted(lanes[order], np.arange(number_of_lanes + 1))
+
+    def column(name: str) -> np.ndarray:
+        # missing columns are never accessed (e.g., of vehicles that are never neighbors)
+        values = np.asarray(vdf[name], dtype=float) if name in vdf else np.full(number_of_vehicles, np.nan)
+        return np.concatenate([values, np.tile(DUMMY[name], number_of_lanes)])[order]
+
+    neighbors = {
+        name: column(name)
+        for name in ['position', 'speed', 'length', 'max_acceleration', 'max_deceleration', 'min_gap', 'desired_headway_time']
+    }
 
-    spawn_positions = ramp_positions if random_depart_position else [ramp_positions[0]]
+    # the queued vehicles (sorted by waiting time)
+    depart_speed = np.array([v['depart_speed'] for v in vehicles], dtype=float)
+    min_trip_length = np.array([v['min_trip_length'] for v in vehicles], dtype=float)
+    available = np.ones(len(vehicles), dtype=bool)
+    # fixed values of the trips (NaN if not fixed)
+    fixed_ramp = np.array([v.get('depart_ramp', np.nan) for v in vehicles], dtype=float)
+    fixed_lane = np.array([v.get('depart_lane', np.nan) for v in vehicles], dtype=float)
+    fixed_arrival = np.array([v.get('arrival_position', np.nan) for v in vehicles], dtype=float)
+    free_ramp = np.isnan(fixed_ramp)
+    free_lane = np.isnan(fixed_lane)
+    free_arrival = np.isnan(fixed_arrival)
+
+    default_spawn_positions = ramp_positions if random_depart_position else [ramp_positions[0]]
+    spawn_positions = default_spawn_positions
+    if not free_ramp.all():
+        # vehicles with a fixed departure ramp can also depart at other ramps than the default ones
+        spawn_positions = sorted(set(default_spawn_positions).union(fixed_ramp[~free_ramp].tolist()))
 
     vehicles_to_spawn = {}
 
-    # lane first, then ramp, possibly tuple
-
     # this is done for every possible spawn coordinate (ramp + lane)
     # try spawning in lane 0 first
-    spawn_coordinate_queue = [(position, 0) for position in rng.sample(spawn_positions, len(spawn_positions))]
-    for position, lane in spawn_coordinate_queue:
-        if not vehicles:
-            # no more vehicles to process
-            break
-
-        spawn_position = position + vtype.length
+    # a ramp without a fitting vehicle is tried again on the next lane after all other ramps have been tried on the current lane
+    pending_ramps = np.array(rng.sample(spawn_positions, len(spawn_positions)))
+    # limit the size of the matrix of vehicles and spawn coordinates
+    chunk_size = max(1, 2**20 // len(vehicles))
+    for lane in range(number_of_lanes if depart_all_lanes or not free_lane.all() else 1):
+        # TODO do not spawn on fastest lane?
+        # TODO check if lanes are ordered by speed (cf. keepRight)
+        failed_ramps = []
+        lane_positions = neighbors['position'][lane_bounds[lane]:lane_bounds[lane + 1]]
+        for chunk in range(0, len(pending_ramps), chunk_size):
+            if not available.any():
+                # no more vehicles to process
+                break
 
-        # select predecessors at spawn position
-        # since we have the dummy, we can assume there is always at least one vehicle
-        vehicle_after_spawn_position = (
-            vdf
-            [(vdf.position >= spawn_position) & (vdf.lane == lane)]
-            .sort_values('position', ascending=True)
-            .iloc[0]
-        )
-        gap_to_next_vehicle = vehicle_after_spawn_position.position - vtype.length - spawn_position
-
-        # select successor of spawn position
-        # since we have the dummy, we can assume there is always at least one vehicle
-        vehicle_before_spawn_position = (
-            vdf
-            [(vdf.position < spawn_position) & (vdf.lane == lane)]
-            .sort_values('position', ascending=True)
-            .iloc[-1]
-        )
-        gap_to_previous_vehicle = spawn_position - vtype.length - vehicle_before_spawn_position.position  # TODO use corresponding vtype
-
-        max_remanining_trip_length = ramp_positions[-1] - position
-
-        vehicle_to_spawn_now = None
-        # TODO use vectorized approach
-        # assume sorted by waiting time for fairness
-        # search for vehicle to insert at current spawn position
-        # check whether it is safe to insert the vehicle
-        # we use the headway times and the current speed
-        # and assume that the resulting required gap is big enough to avoid a crash
-        # in case the corresponding vehicles apply their maximum acceleration/deceleration
-        # (see mobility.is_gap_safe)
-        # NOTE: departing with desired speed is not really realistic and unnecessary
-        # The vehicle could depart already with max(0, rear_vehicle.speed), which will decrease the required gap
-        for v in vehicles:
+            position = pending_ramps[chunk:chunk + chunk_size]
+            spawn_position = position + vtype.length
+
+            # select predecessors and successors at the spawn positions
+            after = lane_bounds[lane] + np.searchsorted(lane_positions, spawn_position, side='left')
+            front = {name: values[after] for name, values in neighbors.items()}
+            back = {name: values[after - 1] for name, values in neighbors.items()}
+            gap_to_next_vehicle = front['position'] - vtype.length - spawn_position
+            gap_to_previous_vehicle = spawn_position - vtype.length - back['position']  # TODO use corresponding vtype
+            max_remanining_trip_length = ramp_positions[-1] - position
+
+            # check for all vehicles (rows) and spawn coordinates (columns) whether it is safe to insert the vehicle
+            # we use the headway times and the current speed
+            # and assume that the resulting required gap is big enough to avoid a crash
+            # in case the corresponding vehicles apply their maximum acceleration/deceleration
+            # (see mobility.is_gap_safe)
+            # NOTE: departing with desired speed is not really realistic and unnecessary
+            # The vehicle could depart already with max(0, rear_vehicle.speed), which will decrease the required gap
             # TODO use correct headway time (HUMAN vs. ACC)
+            v_speed = depart_speed[:, np.newaxis]
             # enough space on the road to reach the minimum trip length
-            trip_possible = max_remanining_trip_length >= v['min_trip_length']
+            trip_possible = max_remanining_trip_length >= min_trip_length[:, np.newaxis]
+            if not free_arrival.all():
+                # enough space on the road to reach the fixed arrival position
+                trip_possible = np.where(free_arrival[:, np.newaxis], trip_possible, fixed_arrival[:, np.newaxis] > spawn_position)
             # enough space to the vehicle in front
             ## avoid a crash
-            front_gap_safe = is_gap_safe(
-                front_position=vehicle_after_spawn_position.position,
-                front_speed=vehicle_after_spawn_position.speed,
-                front_max_deceleration=vehicle_after_spawn_position.max_deceleration,
-                front_length=vehicle_after_spawn_position.length,
+            front_gap_safe = is_gap_safe_np(
+                front_position=front['position'],
+                front_speed=front['speed'],
+                front_max_deceleration=front['max_deceleration'],
+                front_length=front['length'],
                 back_position=spawn_position,
-                back_speed=v['depart_speed'],
+                back_speed=v_speed,
                 back_max_acceleration=vtype.max_acceleration,  # TODO use corresponding vtype
                 back_min_gap=vtype.min_gap,  # TODO use corresponding vtype
                 step_length=step_length,
             )
             ## avoid decelerating from desired speed, assuming the front vehicles does not change speed
             assert vtype.headway_time >= 0
-            front_gap_desired = gap_to_next_vehicle > max(
+            front_gap_desired = gap_to_next_vehicle > np.maximum(
                 # step length not required
-                vtype.headway_time * v['depart_speed'],  # TODO use corresponding vtype
+                vtype.headway_time * v_speed,  # TODO use corresponding vtype
                 vtype.min_gap,
             )
             # enough space to the vehicle behind
             ## avoid a crash
-            back_gap_safe = is_gap_safe(
+            back_gap_safe = is_gap_safe_np(
                 front_position=spawn_position,
-                front_speed=v['depart_speed'],
+                front_speed=v_speed,
                 front_max_deceleration=vtype.max_deceleration,  # TODO use corresponding vtype
                 front_length=vtype.length,  # TODO use corresponding vtype
-                back_position=vehicle_before_spawn_position.position,
-                back_speed=vehicle_before_spawn_position.speed,
-                back_max_acceleration=vehicle_before_spawn_position.max_acceleration,
-                back_min_gap=vehicle_before_spawn_position.min_gap,
+                back_position=back['position'],
+                back_speed=back['speed'],
+                back_max_acceleration=back['max_acceleration'],
+                back_min_gap=back['min_gap'],
                 step_length=step_length,
             )
             ## avoid deceleration of rear vehicle from desired speed, assuming the speed does not change
-            assert vehicle_before_spawn_position.desired_headway_time >= 0, vehicle_before_spawn_position
-            back_gap_desired = gap_to_previous_vehicle > max(
+            assert (back['desired_headway_time'] >= 0).all()
+            back_gap_desired = gap_to_previous_vehicle > np.maximum(
                 # step length not required
-                vehicle_before_spawn_position.desired_headway_time * vehicle_before_spawn_position.speed,
-                vehicle_before_spawn_position.min_gap,
+                back['desired_headway_time'] * back['speed'],
+                back['min_gap'],
             )
-
-            if (trip_possible and front_gap_safe and front_gap_desired and back_gap_safe and back_gap_desired):
-                vehicle_to_spawn_now = v
-                break
-            else:
-                LOG.trace(f"{v['vid']} could not be spawned at {spawn_position} due to constraints (trip: {trip_possible}, front safe: {front_gap_safe}, front desired: {front_gap_desired}, back safe: {back_gap_safe}, back desired: {back_gap_desired})!")
-
-        # vehicles are sorted, so we always pick the longest waiting vehicle first :-)
-        if not vehicle_to_spawn_now:
-            # no vehicle from the queue fits to the current spawn position
-            # TODO do not spawn on fastest lane?
-            if lane < number_of_lanes - 1:
-                # there might be a spot on a faster lane at this ramp
-                # thus, try again to insert a vehicle at this ramp
-                # TODO check if lanes are ordered by speed (cf. keepRight)
-                if depart_all_lanes:
-                    spawn_coordinate_queue.append((position, lane + 1))
-            continue
-
-        vehicles_to_spawn[vehicle_to_spawn_now['vid']] = {
-            'vid': vehicle_to_spawn_now['vid'],
-            'desired_speed': vehicle_to_spawn_now['desired_speed'],
-            'depart_speed': vehicle_to_spawn_now['depart_speed'],
-            'speed': vehicle_to_spawn_now['depart_speed'],
-            'depart_position': spawn_position,
-            'position': spawn_position,
-            'depart_lane': lane,
-            'lane': lane,
-            'depart_time': current_step,
-            'depart_delay': current_step - vehicle_to_spawn_now['schedule_time'],
-            'arrival_position': get_arrival_position(
-                depart_position=position,
-                road_length=ramp_positions[-1],
-                ramp_interval=ramp_positions[1] - ramp_positions[0],
-                min_trip_length=vehicle_to_spawn_now['min_trip_length'],
-                max_trip_length=vehicle_to_spawn_now['max_trip_length'],
-                rng=rng,
-                random_arrival_position=random_arrival_position,
-                pre_fill=False,
-            ),
-            'schedule_time': vehicle_to_spawn_now['schedule_time'],
-            'min_trip_length': vehicle_to_spawn_now['min_trip_length'],
-            'max_trip_length': vehicle_to_spawn_now['max_trip_length'],
-        }
-        vehicles.remove(vehicle_to_spawn_now)
+            fits = trip_possible & front_gap_safe & front_gap_desired & back_gap_safe & back_gap_desired
+            if not (free_ramp.all() and free_lane.all()):
+                # spawn coordinates matching the fixed departure ramp and lane
+                fits &= np.where(free_ramp[:, np.newaxis], np.isin(position, default_spawn_positions), fixed_ramp[:, np.newaxis] == position)
+                fits &= np.where(free_lane, depart_all_lanes or lane == 0, fixed_lane == lane)[:, np.newaxis]
+
+            # vehicles are sorted, so we always pick the longest waiting vehicle first :-)
+            spawned = np.zeros(len(position), dtype=bool)
+            for coordinate in np.flatnonzero((fits & available[:, np.newaxis]).any(axis=0)):
+                candidates = np.flatnonzero(fits[:, coordinate] & available)
+                if len(candidates) == 0:
+                    # all fitting vehicles have been spawned already
+                    continue
+                index = candidates[0]
+                available[index] = False
+                spawned[coordinate] = True
+                vehicle_to_spawn_now = vehicles[index]
+                vehicles_to_spawn[vehicle_to_spawn_now['vid']] = {
+                    'vid': vehicle_to_spawn_now['vid'],
+                    'desired_speed': vehicle_to_spawn_now['desired_speed'],
+                    'depart_speed': vehicle_to_spawn_now['depart_speed'],
+                    'speed': vehicle_to_spawn_now['depart_speed'],
+                    'depart_position': spawn_position[coordinate].item(),
+                    'position': spawn_position[coordinate].item(),
+                    'depart_lane': lane,
+                    'lane': lane,
+                    'depart_time': current_step,
+                    'depart_delay': current_step - vehicle_to_spawn_now['schedule_time'],
+                    'arrival_position': fixed_arrival[index].item() if not free_arrival[index] else get_arrival_position(
+                        depart_position=position[coordinate].item(),
+                        road_length=ramp_positions[-1],
+                        ramp_interval=ramp_positions[1] - ramp_positions[0],
+                        min_trip_length=vehicle_to_spawn_now['min_trip_length'],
+                        max_trip_length=vehicle_to_spawn_now['max_trip_length'],
+                        rng=rng,
+                        random_arrival_position=random_arrival_position,
+                        pre_fill=False,
+                        quantile=vehicle_to_spawn_now.get('arrival_quantile'),
+                    ),
+                    'schedule_time': vehicle_to_spawn_now['schedule_time'],
+                    'min_trip_length': vehicle_to_spawn_now['min_trip_length'],
+                    'max_trip_length': vehicle_to_spawn_now['max_trip_length'],
+                    'platooning': vehicle_to_spawn_now.get('platooning', np.nan),
+                }
+                if not available.any():
+                    # no more vehicles to process
+                    break
+
+            # no vehicle from the queue fits to these spawn positions
+            # there might be a spot on a faster lane at these ramps
+            # thus, try again to insert a vehicle at these ramps
+            LOG.trace(f"No vehicle could be spawned at {np.count_nonzero(~spawned)} spawn positions on lane {lane} due to constraints!")
+            failed_ramps.append(position[~spawned])
+        if not failed_ramps:
+            break
+        pending_ramps = np.concatenate(failed_ramps)
 
     # TODO make global
     columns = {
@@ -2192,11 +3116,12 @@ def compute_vehicle_spawns(
         'schedule_time': int,
         'min_trip_length': int,
         'max_trip_length': int,
+        'platooning': float,
     }
     spawned_vehicles_df = pd.DataFrame(
         data=vehicles_to_spawn.values(),
         columns=columns.keys()
     ).astype(columns)
-    not_spawned_vehicles = vehicles
+    not_spawned_vehicles = [v for v, a in zip(vehicles, available) if a]
 
     return spawned_vehicles_df, not_spawned_vehicles
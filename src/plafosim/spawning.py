@@ -19,6 +19,10 @@
 
 import random
 
+import numpy as np
+
+from plafosim.vehicle_type import VehicleType
+
 
 def get_desired_speed(
     desired_speed: float,
@@ -111,6 +115,7 @@ def get_arrival_position(
     rng: random.Random,
     random_arrival_position: bool = False,
     pre_fill: bool = False,
+    quantile: float = None,
 ) -> int:
     """
     Return a (random) arrival position for a given departure position.
@@ -135,6 +140,8 @@ def get_arrival_position(
         Whether to use random arrival positions
     pre_fill : bool, optional
         Whether the trip is for a pre-filled vehicle
+    quantile : float, optional
+        The (pre-drawn) quantile in [0, 1) for choosing the random arrival position instead of the random number generator
 
     Returns
     -------
@@ -166,7 +173,12 @@ def get_arrival_position(
 
     if random_arrival_position:
         # make sure to also include the end of the road itself
-        arrival_position = rng.randrange(min_arrival_ramp, max_arrival_ramp + 1, ramp_interval)
+        if quantile is None:
+            arrival_position = rng.randrange(min_arrival_ramp, max_arrival_ramp + 1, ramp_interval)
+        else:
+            assert 0 <= quantile < 1
+            number_of_ramps = (max_arrival_ramp - min_arrival_ramp) // ramp_interval + 1
+            arrival_position = min_arrival_ramp + int(quantile * number_of_ramps) * ramp_interval
         assert min_arrival_ramp <= arrival_position <= max_arrival_ramp
         assert arrival_position <= road_length
     else:
@@ -178,3 +190,163 @@ def get_arrival_position(
     assert arrival_position - depart_position <= max_trip_length
 
     return arrival_position
+
+
+def get_free_intervals_np(
+    position: np.ndarray,
+    length: np.ndarray,
+    min_gap: np.ndarray,
+    speed: np.ndarray,
+    max_acceleration: np.ndarray,
+    max_deceleration: np.ndarray,
+    desired_headway_time: np.ndarray,
+    depart_speed: float,
+    vtype: VehicleType,
+    road_length: int,
+    step_length: float,
+) -> tuple:
+    """
+    Return the intervals of a lane in which a pre-filled vehicle could be inserted.
+
+    An interval is bounded by the closest position behind a vehicle and the closest position in front of the next vehicle,
+    which avoid a collision, an unsafe insert, and a gap smaller than desired (cf. Simulator._is_prefill_position_free).
+    Only the direct neighbors are considered, thus positions within the intervals still need to be checked.
+
+    Parameters
+    ----------
+    position : numpy.ndarray
+        The positions of the vehicles in the lane in ascending order
+    length : numpy.ndarray
+        The lengths of the vehicles
+    min_gap : numpy.ndarray
+        The minimum gaps of the vehicles
+    speed : numpy.ndarray
+        The speeds of the vehicles
+    max_acceleration : numpy.ndarray
+        The maximum accelerations of the vehicles
+    max_deceleration : numpy.ndarray
+        The maximum decelerations of the vehicles
+    desired_headway_time : numpy.ndarray
+        The desired headway times of the vehicles
+    depart_speed : float
+        The departure speed of the vehicle to insert
+    vtype : VehicleType
+        The vehicle type of the vehicle to insert
+    road_length : int
+        The length of the entire road
+    step_length : float
+        The length of a simulation step
+
+    Returns
+    -------
+    tuple(numpy.ndarray, numpy.ndarray)
+        The start and end positions of all non-empty intervals
+    """
+
+    assert (np.diff(position) >= 0).all()
+
+    # the lowest position in front of every vehicle
+    lower = position + vtype.length + np.maximum.reduce([
+        min_gap,
+        min_gap + (speed + max_acceleration * step_length - depart_speed + vtype.max_deceleration * step_length) * step_length,
+        desired_headway_time * speed * step_length,
+    ])
+    # the highest position behind every vehicle
+    upper = position - length - np.maximum.reduce([
+        np.full(len(position), vtype.min_gap),
+        vtype.min_gap - (speed - max_deceleration * step_length - depart_speed - vtype.max_acceleration * step_length) * step_length,
+        np.full(len(position), vtype.headway_time * depart_speed * step_length),
+    ])
+
+    # consider length, equal to departPos="base" in SUMO
+    # we assume that a vehicle has to drive at least 1m
+    start = np.maximum(np.concatenate([[vtype.length], lower]), vtype.length)
+    end = np.minimum(np.concatenate([upper, [road_length - 1]]), road_length - 1)
+    free = end > start
+    return start[free], end[free]
+
+
+class SpawnQueue:
+    """
+    A queue of vehicles waiting to be spawned, ordered by schedule time and vehicle id.
+
+    The vehicles are kept in buckets per schedule time.
+    Thus, adding and removing a vehicle does not require sorting or searching the entire queue.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty spawn queue.
+        """
+
+        self._buckets = {}  # the mapping from schedule time to the mapping from vid to vehicle
+        self._schedule_times = {}  # the mapping from vid to schedule time
+
+    def __len__(self) -> int:
+        """
+        Return the number of vehicles within the queue.
+        """
+
+        return len(self._schedule_times)
+
+    def __contains__(self, vid: int) -> bool:
+        """
+        Return whether a vehicle is within the queue.
+        """
+
+        return vid in self._schedule_times
+
+    def __iter__(self):
+        """
+        Iterate over all vehicles in the order of their schedule time and vehicle id.
+        """
+
+        # buckets and vehicles are usually added in order already
+        for schedule_time in sorted(self._buckets):
+            bucket = self._buckets[schedule_time]
+            for vid in sorted(bucket):
+                yield bucket[vid]
+
+    def __repr__(self) -> str:
+        """
+        Return a representation of the vehicles within the queue.
+        """
+
+        return repr(list(self))
+
+    def push(self, vehicle: dict):
+        """
+        Add a vehicle to the queue.
+
+        Parameters
+        ----------
+        vehicle : dict
+            The vehicle to add
+            keys: [vid, schedule_time, ..]
+        """
+
+        vid = vehicle['vid']
+        assert vid not in self._schedule_times
+        self._schedule_times[vid] = vehicle['schedule_time']
+        self._buckets.setdefault(vehicle['schedule_time'], {})[vid] = vehicle
+
+    def remove(self, vid: int) -> dict:
+        """
+        Remove a vehicle from the queue.
+
+        Parameters
+        ----------
+        vid : int
+            The id of the vehicle to remove
+
+        Returns
+        -------
+        dict : The removed vehicle
+        """
+
+        schedule_time = self._schedule_times.pop(vid)
+        bucket = self._buckets[schedule_time]
+        vehicle = bucket.pop(vid)
+        if not bucket:
+            del self._buckets[schedule_time]
+        return vehicle
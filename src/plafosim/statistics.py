@@ -39,6 +39,7 @@ def record_general_data_begin(basename: str, simulator: 'Simulator'):
         f.write(f"version: {__version__}\n")
         f.write(f"command:\n{' '.join(sys.argv)}\n")
         f.write(f"parameters:\n{str(simulator)}\n")
+        f.write(f"mobility: {simulator._mobility_backend} backend with {simulator._mobility_kernels} kernels\n")
 
 
 def record_general_data_end(basename: str, simulator: 'Simulator'):
@@ -53,6 +54,8 @@ def record_general_data_end(basename: str, simulator: 'Simulator'):
         f.write(f"average number of vehicles arrived: {simulator._avg_number_vehicles_arrived}\n")
         f.write(f"average vehicle speed: {simulator._avg_vehicle_speed}\n")
         f.write(f"average number of vehicles braking rough: {simulator._avg_number_vehicles_braking_rough}\n")
+        for counter, total in simulator.counter_totals.items():
+            f.write(f"total {counter.replace('_', ' ')}: {total}\n")
 
 
 def initialize_vehicle_trips(basename: str):
@@ -237,43 +240,12 @@ def initialize_platoon_maneuvers(basename: str):
         )
 
 
-def record_vehicle_platoon_maneuvers(basename: str, vehicle: 'PlatooningVehicle'):
+def record_vehicle_platoon_maneuvers(basename: str, vids: list, maneuvers: list):
     assert basename
-    from .platooning_vehicle import PlatooningVehicle
-    assert isinstance(vehicle, PlatooningVehicle)
+    assert len(vids) == len(maneuvers)
     with open(f'{basename}_vehicle_platoon_maneuvers.csv', 'a') as f:
-        f.write(
-            f"{vehicle._vid},"
-            f"{vehicle._joins_attempted},"
-            f"{vehicle._joins_succesful},"
-            f"{vehicle._joins_aborted},"
-            f"{vehicle._joins_aborted_front},"
-            f"{vehicle._joins_aborted_arbitrary},"
-            f"{vehicle._joins_aborted_road_begin},"
-            f"{vehicle._joins_aborted_trip_begin},"
-            f"{vehicle._joins_aborted_road_end},"
-            f"{vehicle._joins_aborted_trip_end},"
-            f"{vehicle._joins_aborted_leader_maneuver},"
-            f"{vehicle._joins_aborted_max_speed},"
-            f"{vehicle._joins_aborted_teleport_threshold},"
-            f"{vehicle._joins_aborted_approaching},"
-            f"{vehicle._joins_aborted_no_space},"
-            f"{vehicle._joins_aborted_leave_other},"
-            f"{vehicle._joins_front},"
-            f"{vehicle._joins_arbitrary},"
-            f"{vehicle._joins_back},"
-            f"{vehicle._joins_teleport_position},"
-            f"{vehicle._joins_teleport_lane},"
-            f"{vehicle._joins_teleport_speed},"
-            f"{vehicle._joins_correct_position},"
-            f"{vehicle._leaves_attempted},"
-            f"{vehicle._leaves_successful},"
-            f"{vehicle._leaves_aborted},"
-            f"{vehicle._leaves_front},"
-            f"{vehicle._leaves_arbitrary},"
-            f"{vehicle._leaves_back}"
-            "\n"
-        )
+        for vid, counters in zip(vids, maneuvers):
+            f.write(f"{vid},{','.join(str(counter) for counter in counters)}\n")
 
 
 def initialize_platoon_formation(basename: str):
@@ -298,32 +270,37 @@ def initialize_platoon_formation(basename: str):
 
 def record_platoon_formation(
     basename: str,
-    vehicle: 'PlatooningVehicle',
-    candidates_found_avg: float,
-    candidates_found_individual_avg: float,
-    candidates_found_platoon_avg: float,
-    candidates_filtered_avg: float
+    vids: list,
+    formation_iterations: list,
+    candidates_found: list,
+    candidates_found_avg: list,
+    candidates_found_individual: list,
+    candidates_found_platoon: list,
+    candidates_found_individual_avg: list,
+    candidates_found_platoon_avg: list,
+    candidates_filtered: list,
+    candidates_filtered_avg: list,
+    candidates_filtered_follower: list,
+    candidates_filtered_maneuver: list,
 ):
     assert basename
-    from .platooning_vehicle import PlatooningVehicle
-    assert isinstance(vehicle, PlatooningVehicle)
 
     with open(f'{basename}_vehicle_platoon_formation.csv', 'a') as f:
-        f.write(
-            f"{vehicle._vid},"
-            f"{vehicle._formation_iterations},"
-            f"{vehicle._candidates_found},"
-            f"{candidates_found_avg},"
-            f"{vehicle._candidates_found_individual},"
-            f"{vehicle._candidates_found_platoon},"
-            f"{candidates_found_individual_avg},"
-            f"{candidates_found_platoon_avg},"
-            f"{vehicle._candidates_filtered},"
-            f"{candidates_filtered_avg},"
-            f"{vehicle._candidates_filtered_follower},"
-            f"{vehicle._candidates_filtered_maneuver}"
-            "\n"
-        )
+        for row in zip(
+            vids,
+            formation_iterations,
+            candidates_found,
+            candidates_found_avg,
+            candidates_found_individual,
+            candidates_found_platoon,
+            candidates_found_individual_avg,
+            candidates_found_platoon_avg,
+            candidates_filtered,
+            candidates_filtered_avg,
+            candidates_filtered_follower,
+            candidates_filtered_maneuver,
+        ):
+            f.write(f"{','.join(str(value) for value in row)}\n")
 
 
 # traces
@@ -427,27 +404,16 @@ def initialize_emission_traces(basename: str):
         )
 
 
-def record_emission_trace_prefix(basename: str, step: float, vid: int):
-    assert basename
-    with open(f'{basename}_emission_traces.csv', 'a') as f:
-        f.write(
-            f"{step},"
-            f"{vid}"
-        )
-
-
-def record_emission_trace_value(basename: str, value: float):
-    assert basename
-    with open(f'{basename}_emission_traces.csv', 'a') as f:
-        f.write(
-            f",{value}"
-        )
-
-
-def record_emission_trace_suffix(basename: str):
+def record_emission_traces(basename: str, step: float, vids: list, emissions: list):
     assert basename
     with open(f'{basename}_emission_traces.csv', 'a') as f:
-        f.write("\n")
+        for vid, values in zip(vids, emissions):
+            f.write(
+                f"{step},"
+                f"{vid},"
+                f"{','.join(str(value) for value in values)}"
+                "\n"
+            )
 
 
 def initialize_vehicle_platoon_traces(basename: str):
@@ -48,6 +48,44 @@ def find_resource(path: str) -> str:
     return str(resource_path)
 
 
+def get_slots(cls: type) -> list:
+    """
+    Return the names of all slots of a class, including the slots of its base classes.
+
+    Parameters
+    ----------
+    cls : type
+        The class to inspect
+
+    Returns
+    -------
+    list : The names of all slots
+    """
+
+    return [
+        name
+        for klass in reversed(cls.__mro__)
+        for name in vars(klass).get('__slots__', ())
+    ]
+
+
+def slots2dict(instance: object) -> dict:
+    """
+    Return the values of all (set) slots of an instance.
+
+    Parameters
+    ----------
+    instance : object
+        The instance to inspect
+
+    Returns
+    -------
+    dict : The mapping from slot name to value
+    """
+
+    return {name: getattr(instance, name) for name in get_slots(type(instance)) if hasattr(instance, name)}
+
+
 def round_to_next_base(value: float, base: float) -> float:
     """
     Round a value to the next base value.
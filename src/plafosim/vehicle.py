@@ -20,16 +20,17 @@
 import logging
 from typing import TYPE_CHECKING
 
+import numpy as np
+
+from plafosim.emissions import POLLUTANTS
 from plafosim.mobility import CF_Model
 from plafosim.statistics import (
-    record_emission_trace_prefix,
-    record_emission_trace_suffix,
-    record_emission_trace_value,
     record_vehicle_emission,
     record_vehicle_trace,
     record_vehicle_trip,
 )
-from plafosim.util import speed2distance
+from plafosim.util import slots2dict, speed2distance
+from plafosim.vehicle_state import StateField, VehicleState, state_fields
 from plafosim.vehicle_type import VehicleType
 
 if TYPE_CHECKING:
@@ -52,8 +53,42 @@ class Vehicle:
     A vehicle can really be anything that can move and can be defined by a vehicle type.
     It does not necessarily be driven by a computer (i.e., autonomous).
     However, by default it does have V2X functionality.
+
+    The mobility state of a vehicle is kept within a VehicleState store.
+    A vehicle owns a private store until it is attached to the simulator's store.
     """
 
+    # state stored within the vehicle state store
+    _position = StateField("position")
+    _lane = StateField("lane")
+    _speed = StateField("speed")
+    _blocked_front = StateField("blocked_front")
+    _acceleration = StateField("acceleration")
+    _cf_model = StateField("cf_model", CF_Model)
+    _cf_target_speed = StateField("cf_target_speed")
+    # SUMO: "The time lost due to driving below the ideal speed."
+    _total_time_loss = StateField("time_loss")
+
+    # attributes stored within the vehicle object
+    __slots__ = (
+        "_simulator",
+        "_started",
+        "_vid",
+        "_vehicle_type",
+        "_state",
+        "_slot",
+        "_depart_position",
+        "_arrival_position",
+        "_desired_speed",
+        "_depart_lane",
+        "_depart_speed",
+        "_depart_time",
+        "_depart_delay",
+        "_pre_filled",
+        "_communication_range",
+        "_color",
+    )
+
     def __init__(
             self,
             simulator: 'Simulator',
@@ -105,6 +140,19 @@ class Vehicle:
 
         self._vid = vid  # the id of the vehicle
         self._vehicle_type = vehicle_type  # the vehicle type of the vehicle
+        # the (private) state store of the vehicle
+        self._state = VehicleState(capacity=1)
+        self._slot = self._state.add(
+            vid,
+            arrival_position=arrival_position,
+            length=vehicle_type._length,
+            min_gap=vehicle_type._min_gap,
+            max_speed=vehicle_type._max_speed,
+            max_acceleration=vehicle_type._max_acceleration,
+            max_deceleration=vehicle_type._max_deceleration,
+            headway_time=vehicle_type._headway_time,
+            emission_class=vehicle_type.emission_class.value,
+        )
         # trip details
         self._depart_position = depart_position  # the departure position of the vehicle
         self._arrival_position = arrival_position  # the arrival position of the vehicle
@@ -127,16 +175,7 @@ class Vehicle:
         # TODO move to platooning vehicle
         self._communication_range = communication_range  # the maximum communication range between two vehicles
 
-        # statistics
-        self._time_loss = 0  # SUMO: "The time lost due to driving below the ideal speed."
-        self._emissions = {
-            "CO": 0,  # the total carbon monoxide (CO) emission in mg
-            "CO2": 0,  # the total carbon dioxide (CO2) emission in mg
-            "HC": 0,  # the total hydro carbon (HC) emission in mg
-            "NOx": 0,  # the total nitrogen oxides (NO and NO2) emission in mg
-            "PMx": 0,  # the total fine-particle (PMx) emission in mg
-            "fuel": 0,  # the total fuel consumption emission in ml
-        }
+        # statistics (time loss and emissions) are accounted for all vehicles by the simulator
 
         # gui properties
         self._color = (
@@ -347,6 +386,16 @@ class Vehicle:
 
         return self._simulator.step - self._depart_time
 
+    @property
+    def _time_loss(self) -> float:
+        """
+        Return the time lost due to driving below the ideal speed.
+
+        This is 0 (i.e., an int) as long as no time was lost, in order to keep the format of the results.
+        """
+
+        return self._total_time_loss or 0
+
     @property
     def blocked_front(self) -> bool:
         """
@@ -360,10 +409,46 @@ class Vehicle:
         """Return the current color of the vehicle."""
         return self._color
 
+    @property
+    def _emissions(self) -> dict:
+        """
+        Return the total emissions of the vehicle per pollutant (mg, ml for fuel).
+        """
+
+        columns = self._state.columns
+        return {pollutant: columns[f"emissions_{pollutant}"].item(self._slot) for pollutant in POLLUTANTS}
+
+    def _attach_state(self, state: VehicleState):
+        """
+        Move the state of the vehicle into the given state store.
+
+        Parameters
+        ----------
+        state : VehicleState
+            The state store to use from now on
+        """
+
+        slot = state.add_from(self._state, self._slot)
+        self._state.remove(self._vid)
+        self._state = state
+        self._slot = slot
+
+    def _detach_state(self):
+        """
+        Move the state of the vehicle into a private state store.
+
+        This keeps the vehicle usable after it was removed from the simulation.
+        """
+
+        self._attach_state(VehicleState(capacity=1))
+
     def action(self, step: int):
         """
         Triggers actions of a vehicle.
 
+        This is called by the simulator at the first step of the vehicle and whenever its next action is due.
+        Periodic statistics are recorded by the simulator in every step.
+
         Parameters
         ----------
         step : int
@@ -373,13 +458,6 @@ class Vehicle:
         # we started (right now)
         self._start()
 
-        # log status information
-        if LOG.getEffectiveLevel() <= logging.TRACE:
-            LOG.trace(self.info())
-
-        # record periodic statistics
-        self._statistics()
-
         # What has to be triggered periodically?
         if self._simulator._actions:
             self._action(step)
@@ -396,6 +474,17 @@ class Vehicle:
 
         pass  # this vehicle has no application running
 
+    def _next_action_step(self) -> float:
+        """
+        Return the step at which the next action of the vehicle is due.
+
+        Returns
+        -------
+        float : The step of the next action or None if there is no action to trigger
+        """
+
+        return None  # this vehicle has no application running
+
     # TODO: obsolete?
     def _start(self):
         """
@@ -422,18 +511,14 @@ class Vehicle:
     def _statistics(self):
         """
         Write continuous statistics for the vehicle.
+
+        The time loss and the emissions are accounted for all vehicles at once by the simulator.
         """
 
         if not self._simulator._record_prefilled and self._depart_time == -1:
             # we do not record statistics for pre-filled vehicles
             return
 
-        # calculate time loss
-        # SUMO: "The time lost due to driving below the ideal speed."
-        # can also use higher layer desired speed
-        if self._speed < self._cf_target_speed:
-            self._time_loss += self._simulator.step_length
-
         if self._simulator._record_vehicle_traces:
             # mobility/trip statistics
             record_vehicle_trace(
@@ -442,92 +527,8 @@ class Vehicle:
                 vehicle=self,
             )
 
-        self._calculate_emissions()
-
         # TODO current gap to front
 
-    def _calculate_emissions(self):
-        """
-        Calculate the emitted pollutant amount using the given speed and acceleration based on the HBEFA3 model.
-
-        As the functions are defining emissions in g/hour, the function's result is normed
-        by 3.6 (seconds in an hour/1000) yielding mg/s. For fuel ml/s is returned.
-        Negative acceleration results directly in zero emission.
-
-        The amount emitted by the given emission class when moving with the given velocity and acceleration [mg/s or ml/s]
-        """
-
-        if not self._simulator._record_prefilled and self._depart_time == -1:
-            # we do not record statistics for pre-filled vehicles
-            return
-
-        if self._simulator._record_emission_traces:
-            record_emission_trace_prefix(
-                basename=self._simulator._result_base_filename,
-                step=self._simulator.step,
-                vid=self._vid,
-            )
-
-        ec = self._vehicle_type.emission_class
-        for variable in self._emissions.keys():
-            scale = 3.6
-            if variable == "fuel":
-                if ec.is_diesel:
-                    scale *= 836.0
-                else:
-                    scale *= 742.0
-            value = (
-                self._calculate_emission(
-                    a=self._acceleration,
-                    v=self._speed,
-                    f=ec.emission_factors[variable],
-                    scale=scale,
-                )
-                * self._simulator.step_length
-            )
-            self._emissions[variable] += value
-
-            if self._simulator._record_emission_traces:
-                record_emission_trace_value(basename=self._simulator._result_base_filename, value=value)
-
-        if self._simulator._record_emission_traces:
-            record_emission_trace_suffix(basename=self._simulator._result_base_filename)
-
-    def _calculate_emission(self, a: float, v: float, f: list, scale: float) -> float:
-        """
-        Calculate the actual emission of the vehicle.
-
-        Parameters
-        ----------
-        a : float
-            The current acceleration
-        v : float
-            The current speed
-        f : list
-            The emission factors to use for current emission variable to be calculated
-        scale : float
-            The scale to normalize the calculated value
-
-        Returns
-        -------
-        float : The calculcated emission in ml/mg per s
-        """
-
-        if a < 0:
-            return 0
-        return max(
-            (
-                f[0]
-                + f[1] * a * v
-                + f[2] * a * a * v
-                + f[3] * v
-                + f[4] * v * v
-                + f[5] * v * v * v
-            )
-            / scale,
-            0.0,
-        )
-
     def finish(self):
         """
         Clean up the instance of the vehicle.
@@ -572,7 +573,8 @@ class Vehicle:
         assert average_driving_speed >= 0
 
         if self._simulator._record_end_trace:
-            # call trace recording once again
+            # call statistics and trace recording once again
+            self._simulator._account_statistics(np.array([self._slot]))
             self._statistics()
 
         if self._simulator._record_vehicle_trips:
@@ -595,6 +597,10 @@ class Vehicle:
         Return the str representation of the vehicle.
         """
 
-        self_dict = self.__dict__.copy()
+        self_dict = slots2dict(self)
+        self_dict.pop('_state')
+        self_dict.pop('_slot')
+        self_dict.update({name: getattr(self, name) for name in state_fields(type(self))})
+        self_dict.update({'_emissions': self._emissions})
         self_dict.update({'_vehicle_type': str(self._vehicle_type)})  # use str representation of vehicle type
         return str(self_dict)
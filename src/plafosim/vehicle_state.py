@@ -0,0 +1,508 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import logging
+from enum import Enum
+
+import numpy as np
+
+from plafosim.emissions import POLLUTANTS
+from plafosim.mobility import HIGHVAL
+from plafosim.platoon_role import PlatoonRole
+
+LOG = logging.getLogger(__name__)
+
+# the maneuver statistics of platooning vehicles (in the order of the platoon maneuvers result file)
+MANEUVER_COUNTERS = [
+    "joins_attempted",
+    "joins_succesful",
+    "joins_aborted",
+    "joins_aborted_front",
+    "joins_aborted_arbitrary",
+    "joins_aborted_road_begin",
+    "joins_aborted_trip_begin",
+    "joins_aborted_road_end",
+    "joins_aborted_trip_end",
+    "joins_aborted_leader_maneuver",
+    "joins_aborted_max_speed",
+    "joins_aborted_teleport_threshold",
+    "joins_aborted_approaching",
+    "joins_aborted_no_space",
+    "joins_aborted_leave_other",
+    "joins_front",
+    "joins_arbitrary",
+    "joins_back",
+    "joins_teleport_position",
+    "joins_teleport_lane",
+    "joins_teleport_speed",
+    "joins_correct_position",
+    "leaves_attempted",
+    "leaves_successful",
+    "leaves_aborted",
+    "leaves_front",
+    "leaves_arbitrary",
+    "leaves_back",
+]
+
+# the formation statistics of platooning vehicles
+FORMATION_COUNTERS = [
+    "formation_iterations",
+    "candidates_found",
+    "candidates_found_individual",
+    "candidates_found_platoon",
+    "candidates_filtered",
+    "candidates_filtered_follower",
+    "candidates_filtered_maneuver",
+]
+
+# all counters of platooning vehicles
+COUNTERS = MANEUVER_COUNTERS + FORMATION_COUNTERS
+
+# the columns of the vehicle state store: name -> (dtype, default value)
+COLUMNS = {
+    # identity
+    "vid": (np.int64, -1),
+    "sequence": (np.int64, -1),  # the order in which the vehicle was added to the simulation
+    # mobility state
+    "position": (np.float64, 0.0),
+    "lane": (np.int64, 0),
+    "speed": (np.float64, 0.0),
+    "acceleration": (np.float64, 0.0),
+    "blocked_front": (np.bool_, False),
+    "cf_model": (np.int64, 0),
+    "cf_target_speed": (np.float64, 0.0),
+    "arrival_position": (np.float64, 0.0),
+    # vehicle type limits
+    "length": (np.float64, 0.0),
+    "min_gap": (np.float64, 0.0),
+    "max_speed": (np.float64, 0.0),
+    "max_acceleration": (np.float64, 0.0),
+    "max_deceleration": (np.float64, 0.0),
+    "headway_time": (np.float64, 0.0),
+    # platooning vehicle properties
+    "acc_headway_time": (np.float64, np.nan),
+    "acc_lambda": (np.float64, np.nan),
+    "platoon_role": (np.int64, -1),  # -1 for vehicles without platooning functionality
+    "in_maneuver": (np.bool_, False),
+    # platoon properties
+    "platoon_id": (np.int64, -1),
+    "leader_slot": (np.int64, -1),
+    "last_slot": (np.int64, -1),
+    "platoon_desired_speed": (np.float64, HIGHVAL),
+    "platoon_max_speed": (np.float64, HIGHVAL),
+    "platoon_max_acceleration": (np.float64, HIGHVAL),
+    "platoon_max_deceleration": (np.float64, HIGHVAL),
+    # statistics
+    "record_statistics": (np.bool_, False),  # whether statistics are recorded for the vehicle
+    "emission_class": (np.int64, 0),
+    "time_loss": (np.float64, 0.0),
+    # the total emissions per pollutant
+    **{f"emissions_{pollutant}": (np.float64, 0.0) for pollutant in POLLUTANTS},
+    # the maneuver and formation counters
+    **{counter: (np.int64, 0) for counter in COUNTERS},
+}
+
+
+class VehicleState:
+    """
+    A persistent struct-of-arrays store for the state of vehicles.
+
+    Every vehicle occupies one slot (i.e., one row) in all columns.
+    Slots of removed vehicles are re-used for new vehicles.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize a vehicle state store.
+
+        Parameters
+        ----------
+        capacity : int, optional
+            The initial number of slots
+        """
+
+        assert capacity > 0
+        self._capacity = capacity  # the current number of slots
+        self._columns = {
+            name: np.full(capacity, default, dtype=dtype)
+            for name, (dtype, default) in COLUMNS.items()
+        }
+        self._active = np.zeros(capacity, dtype=bool)  # whether a slot is currently in use
+        self._slots = {}  # the mapping from vid to slot
+        self._free_slots = list(range(capacity - 1, -1, -1))  # the unused slots (as stack)
+
+    @property
+    def columns(self) -> dict:
+        """
+        Return all columns of the store.
+        """
+
+        return self._columns
+
+    @property
+    def capacity(self) -> int:
+        """
+        Return the current number of slots of the store.
+        """
+
+        return self._capacity
+
+    @property
+    def active(self) -> np.ndarray:
+        """
+        Return whether the slots of the store are currently in use.
+        """
+
+        return self._active
+
+    def __len__(self) -> int:
+        """
+        Return the number of vehicles within the store.
+        """
+
+        return len(self._slots)
+
+    def __contains__(self, vid: int) -> bool:
+        """
+        Return whether a vehicle is within the store.
+        """
+
+        return vid in self._slots
+
+    def _grow(self):
+        """
+        Double the number of slots of the store.
+        """
+
+        capacity = 2 * self._capacity
+        for name, (dtype, default) in COLUMNS.items():
+            column = np.full(capacity, default, dtype=dtype)
+            column[:self._capacity] = self._columns[name]
+            self._columns[name] = column
+        active = np.zeros(capacity, dtype=bool)
+        active[:self._capacity] = self._active
+        self._active = active
+        self._free_slots = list(range(capacity - 1, self._capacity - 1, -1)) + self._free_slots
+        self._capacity = capacity
+        LOG.trace(f"Increased the capacity of the vehicle state to {capacity}")
+
+    def add(self, vid: int, **values) -> int:
+        """
+        Add a vehicle to the store.
+
+        Parameters
+        ----------
+        vid : int
+            The id of the vehicle
+        **values
+            The initial values for the vehicle's columns
+
+        Returns
+        -------
+        int : The slot of the vehicle
+        """
+
+        assert vid not in self._slots, f"Vehicle {vid} is already in the store!"
+        if not self._free_slots:
+            self._grow()
+        slot = self._free_slots.pop()
+        for name, (_, default) in COLUMNS.items():
+            self._columns[name][slot] = values.pop(name, default)
+        assert not values, f"Unknown columns {list(values)}!"
+        self._columns["vid"][slot] = vid
+        self._active[slot] = True
+        self._slots[vid] = slot
+        return slot
+
+    def add_from(self, other: 'VehicleState', slot: int) -> int:
+        """
+        Add a vehicle to the store by copying its row from another store.
+
+        Parameters
+        ----------
+        other : VehicleState
+            The store to copy from
+        slot : int
+            The slot of the vehicle within the other store
+
+        Returns
+        -------
+        int : The slot of the vehicle within this store
+        """
+
+        return self.add(**{name: column[slot] for name, column in other._columns.items()})
+
+    def remove(self, vid: int):
+        """
+        Remove a vehicle from the store.
+
+        Parameters
+        ----------
+        vid : int
+            The id of the vehicle
+        """
+
+        slot = self._slots.pop(vid)
+        self._active[slot] = False
+        self._free_slots.append(slot)
+
+    def slot(self, vid: int) -> int:
+        """
+        Return the slot of a vehicle.
+
+        Parameters
+        ----------
+        vid : int
+            The id of the vehicle
+
+        Returns
+        -------
+        int : The slot of the vehicle
+        """
+
+        return self._slots[vid]
+
+    def active_slots(self) -> np.ndarray:
+        """
+        Return the slots of all vehicles within the store.
+
+        Returns
+        -------
+        numpy.ndarray : The used slots in ascending order
+        """
+
+        return np.flatnonzero(self._active)
+
+    def slots_of(self, vids: np.ndarray) -> np.ndarray:
+        """
+        Return the slots of the given vehicles.
+
+        Parameters
+        ----------
+        vids : numpy.ndarray
+            The ids of the vehicles
+
+        Returns
+        -------
+        numpy.ndarray : The slots of the vehicles in the same order
+        """
+
+        active_slots = self.active_slots()
+        active_vids = self._columns["vid"][active_slots]
+        order = np.argsort(active_vids)
+        positions = np.searchsorted(active_vids, vids, sorter=order)
+        slots = active_slots[order[positions]]
+        assert (self._columns["vid"][slots] == vids).all()
+        return slots
+
+
+class NeighborIndex:
+    """
+    An index of all platooning vehicles within a vehicle state store sorted by position.
+
+    The vehicles within a distance of a position are found by two binary searches.
+    The index is a snapshot of the positions, thus it needs to be rebuilt whenever vehicles move, depart, or arrive.
+    Platoon roles and maneuver states are always read from the store, thus they may change in the meantime.
+    """
+
+    def __init__(self, state: VehicleState):
+        """
+        Initialize a neighbor index.
+
+        Parameters
+        ----------
+        state : VehicleState
+            The state store of the vehicles
+        """
+
+        columns = state.columns
+        slots = state.active_slots()
+        # vehicles without platooning functionality are not part of the index
+        slots = slots[columns["platoon_role"][slots] != -1]
+        order = np.argsort(columns["position"][slots], kind="stable")
+        self._state = state  # the state store of the vehicles
+        self._slots = slots[order]  # the slots of all platooning vehicles sorted by position
+        self._positions = columns["position"][self._slots]  # the positions of all platooning vehicles
+
+    def __len__(self) -> int:
+        """
+        Return the number of platooning vehicles within the index.
+        """
+
+        return len(self._slots)
+
+    def _in_order(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Return the given slots in the order in which the vehicles were added to the simulation.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray
+            The slots of the vehicles
+
+        Returns
+        -------
+        numpy.ndarray : The sorted slots
+        """
+
+        return slots[np.argsort(self._state.columns["sequence"][slots], kind="stable")]
+
+    def all_slots(self) -> np.ndarray:
+        """
+        Return the slots of all platooning vehicles.
+
+        Returns
+        -------
+        numpy.ndarray : The slots in the order in which the vehicles were added to the simulation
+        """
+
+        return self._in_order(self._slots)
+
+    def within(self, position: float, distance: float) -> np.ndarray:
+        """
+        Return the slots of all platooning vehicles within a distance of a position.
+
+        Parameters
+        ----------
+        position : float
+            The position to search around
+        distance : float
+            The maximum distance to the position (e.g., the communication range)
+
+        Returns
+        -------
+        numpy.ndarray : The slots in the order in which the vehicles were added to the simulation
+        """
+
+        # use a slightly bigger window and apply the exact criterion afterwards to avoid rounding issues at the borders
+        margin = 1e-6 * (1 + abs(position))
+        start = np.searchsorted(self._positions, position - distance - margin, side='left')
+        end = np.searchsorted(self._positions, position + distance + margin, side='right')
+        within = np.abs(self._positions[start:end] - position) <= distance
+        return self._in_order(self._slots[start:end][within])
+
+    def available(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Return whether the given vehicles are available as (new) platoon leaders.
+
+        Only individual vehicles and platoon leaders are available, i.e., the ones that would advertise their platoon.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray
+            The slots of the vehicles
+
+        Returns
+        -------
+        numpy.ndarray : The mask of available vehicles
+        """
+
+        role = self._state.columns["platoon_role"][slots]
+        return (role == PlatoonRole.NONE.value) | (role == PlatoonRole.LEADER.value)
+
+    def in_maneuver(self, slots: np.ndarray) -> np.ndarray:
+        """
+        Return whether the given vehicles are currently in a maneuver.
+
+        Parameters
+        ----------
+        slots : numpy.ndarray
+            The slots of the vehicles
+
+        Returns
+        -------
+        numpy.ndarray : The mask of vehicles in a maneuver
+        """
+
+        return self._state.columns["in_maneuver"][slots]
+
+
+class StateField:
+    """
+    A descriptor exposing a column of a vehicle's state store as an attribute.
+
+    The owning instance needs to provide the attributes _state and _slot.
+    """
+
+    def __init__(self, column: str, kind: Enum = None):
+        """
+        Initialize a state field.
+
+        Parameters
+        ----------
+        column : str
+            The name of the column within the state store
+        kind : Enum, optional
+            The enumeration used for the values of the column
+        """
+
+        assert column in COLUMNS
+        self._column = column
+        self._members = {member.value: member for member in kind} if kind else None
+
+    @property
+    def column(self) -> str:
+        """
+        Return the name of the column within the state store.
+        """
+
+        return self._column
+
+    def __get__(self, instance, owner=None):
+        """
+        Return the value of the column for the slot of the instance.
+        """
+
+        if instance is None:
+            return self
+        value = instance._state._columns[self._column].item(instance._slot)
+        if self._members is not None:
+            return self._members.get(value)
+        return value
+
+    def __set__(self, instance, value):
+        """
+        Set the value of the column for the slot of the instance.
+        """
+
+        if self._members is not None:
+            value = value.value
+        instance._state._columns[self._column][instance._slot] = value
+
+
+def state_fields(cls: type) -> dict:
+    """
+    Return all state fields of a class.
+
+    Parameters
+    ----------
+    cls : type
+        The class to inspect
+
+    Returns
+    -------
+    dict : The mapping from attribute name to state field
+    """
+
+    return {
+        name: attribute
+        for klass in reversed(cls.__mro__)
+        for name, attribute in vars(klass).items()
+        if isinstance(attribute, StateField)
+    }
@@ -0,0 +1,271 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plafosim.demand import (
+    Demand,
+    TripFile,
+    generate_demand,
+    get_depart_speed_np,
+    get_desired_speed_np,
+    get_schedule_counts,
+    get_steps,
+)
+from plafosim.simulator import Simulator, vtype
+
+DEMAND = {
+    "max_step": 100,
+    "step_length": 1.0,
+    "depart_probability": 0.5,
+    "desired_speed": 30.0,
+    "speed_variation": 0.1,
+    "min_desired_speed": 20.0,
+    "max_desired_speed": 40.0,
+    "random_desired_speed": True,
+    "depart_desired": False,
+    "random_depart_speed": True,
+}
+
+
+def test_get_steps():
+    assert list(get_steps(5, 1.0)) == [0, 1, 2, 3, 4]
+    assert list(get_steps(2, 0.5)) == [0, 0.5, 1, 1.5]
+
+    # accumulated the same way as by the simulator
+    step = 0
+    steps = []
+    while step < 10:
+        steps.append(step)
+        step += 0.1
+    assert list(get_steps(10, 0.1)) == steps
+
+
+def test_get_schedule_counts():
+    rng = np.random.default_rng(42)
+    steps = get_steps(100, 1.0)
+
+    # one vehicle every 4 steps
+    counts = get_schedule_counts(steps, rng, "interval", 0.25, None)
+    assert list(np.flatnonzero(counts)) == list(range(0, 100, 4))
+    assert (counts <= 1).all()
+
+    # 7200 vehicles per hour
+    counts = get_schedule_counts(steps, rng, "rate", 2, None)
+    assert counts[0] == 1
+    assert (counts[1:] == 2).all()
+
+    counts = get_schedule_counts(steps, rng, "probability", None, 0.5)
+    # always one vehicle in the first step
+    assert counts[0] == 1
+    assert set(counts[1:]) == {0, 1}
+
+
+def test_get_desired_speed_np():
+    rng = np.random.default_rng(42)
+    speed = get_desired_speed_np(30, rng, 0.5, 20, 40, random_desired_speed=True, size=1000)
+    assert len(speed) == 1000
+    assert (speed >= 20).all()
+    assert (speed <= 40).all()
+    assert len(np.unique(speed)) > 2
+
+    speed = get_desired_speed_np(30, rng, 0.5, 20, 40, random_desired_speed=False, size=10)
+    assert (speed == 30).all()
+
+
+def test_get_depart_speed_np():
+    rng = np.random.default_rng(42)
+    desired_speed = np.full(1000, 30.0)
+
+    assert (get_depart_speed_np(desired_speed, rng, depart_desired=True, random_depart_speed=True) == 30).all()
+    assert (get_depart_speed_np(desired_speed, rng, depart_desired=False, random_depart_speed=False) == 0).all()
+    speed = get_depart_speed_np(desired_speed, rng, depart_desired=False, random_depart_speed=True)
+    assert set(speed) == set(range(0, 31))
+
+
+def test_generate_demand():
+    demand = generate_demand(
+        rng=np.random.default_rng(42),
+        first_vid=0,
+        depart_method="rate",
+        effective_depart_rate=0.5,
+        depart_flow=True,
+        number_of_vehicles=10,
+        **DEMAND,
+    )
+    assert len(demand["schedule_time"]) == 50
+    assert (np.diff(demand["schedule_time"]) >= 0).all()
+    for values in demand.values():
+        assert len(values) == 50
+    assert ((demand["arrival_quantile"] >= 0) & (demand["arrival_quantile"] < 1)).all()
+
+    # the same demand with the same seed
+    again = generate_demand(
+        rng=np.random.default_rng(42),
+        first_vid=0,
+        depart_method="rate",
+        effective_depart_rate=0.5,
+        depart_flow=True,
+        number_of_vehicles=10,
+        **DEMAND,
+    )
+    for column, values in demand.items():
+        assert (values == again[column]).all()
+
+    # the total number of vehicles is limited without a departure flow
+    for first_vid, expected in [(0, 10), (4, 6), (10, 0)]:
+        demand = generate_demand(
+            rng=np.random.default_rng(42),
+            first_vid=first_vid,
+            depart_method="rate",
+            effective_depart_rate=0.5,
+            depart_flow=False,
+            number_of_vehicles=10,
+            **DEMAND,
+        )
+        assert len(demand["schedule_time"]) == expected
+
+
+def test_simulator_demand(tmp_path):
+    s = Simulator(
+        road_length=2 * 1000,
+        ramp_interval=1000,
+        number_of_vehicles=20,
+        depart_method="interval",
+        depart_interval=3,
+        penetration_rate=0,
+        random_desired_speed=True,
+        random_arrival_position=True,
+        max_step=200,
+        random_seed=42,
+        progress=False,
+        record_end_trace=False,
+        record_vehicle_trips=True,
+        result_base_filename=str(tmp_path / "demand"),
+    )
+    # the demand is available before the simulation starts
+    demand = s._demand
+    assert isinstance(demand, Demand)
+    assert len(demand) == 20
+    assert list(demand["schedule_time"]) == list(range(0, 60, 3))
+    s.run()
+
+    # all vehicles depart according to the demand
+    trips = pd.read_csv(tmp_path / "demand_vehicle_trips.csv", float_precision="round_trip").sort_values("id")
+    assert list(trips.id) == list(range(20))
+    assert (trips.desiredSpeed.values == demand["desired_speed"]).all()
+    assert (trips.depart.values - trips.departDelay.values == demand["schedule_time"]).all()
+
+
+def test_demand():
+    demand = Demand({"schedule_time": np.array([0, 0, 1, 3]), "desired_speed": np.array([30, 31, 32, 33])})
+    assert list(demand.pop(0)["desired_speed"]) == [30, 31]
+    assert len(demand.pop(0)["desired_speed"]) == 0
+    assert list(demand.pop(2)["desired_speed"]) == [32]
+    assert not demand.exhausted
+    assert list(demand.pop(3)["desired_speed"]) == [33]
+    assert demand.exhausted
+
+
+def test_trip_file(tmp_path):
+    filename = str(tmp_path / "trips.csv")
+    pd.DataFrame({
+        "id": [3, None, 7, None, 9],
+        "depart": [0, 0, 2, 5, 5],
+        "vClass": ["Vehicle", None, "PlatooningVehicle", None, None],
+    }).to_csv(filename, index=False)
+
+    # the file is read in chunks of 2 trips
+    trips = TripFile(filename, chunk_size=2)
+    assert len(trips._buffer["schedule_time"]) == 2
+    popped = trips.pop(0)
+    assert list(popped["vid"][:1]) == [3]
+    assert np.isnan(popped["vid"][1])
+    assert np.isnan(popped["desired_speed"]).all()
+    assert popped["platooning"][0] == 0
+    assert np.isnan(popped["platooning"][1])
+    assert len(trips.pop(1)["vid"]) == 0
+
+    # a snapshot continues with the next trips
+    restored = pickle.loads(pickle.dumps(trips))
+    popped = restored.pop(5)
+    assert list(popped["schedule_time"]) == [2, 5, 5]
+    assert popped["platooning"][0] == 1
+    assert restored.exhausted
+    assert list(trips.pop(4)["vid"]) == [7]
+
+    # binary files contain a structured array
+    filename = str(tmp_path / "trips.npy")
+    np.save(filename, np.array([(0, 30), (1, 31)], dtype=[("depart", float), ("desiredSpeed", float)]))
+    trips = TripFile(filename)
+    assert list(trips.pop(1)["desired_speed"]) == [30, 31]
+    assert trips.exhausted
+
+    # the trips need to be sorted by departure time
+    pd.DataFrame({"depart": [1, 0]}).to_csv(tmp_path / "unsorted.csv", index=False)
+    with pytest.raises(SystemExit):
+        TripFile(str(tmp_path / "unsorted.csv"))
+    pd.DataFrame({"departure": [1, 0]}).to_csv(tmp_path / "invalid.csv", index=False)
+    with pytest.raises(SystemExit):
+        TripFile(str(tmp_path / "invalid.csv"))
+
+
+def test_simulator_trip_file(tmp_path):
+    trip_file = tmp_path / "trips.csv"
+    pd.DataFrame({
+        "id": [None, None, 10, None, 20],
+        "depart": [0, 0, 4, 4, 30],
+        "desiredSpeed": [30, 31, 32, 33, 34],
+        "departRamp": [0, 1000, None, 1000, None],
+        "departLane": [0, 1, None, None, 1],
+        "arrivalPos": [1500, None, 1800, None, None],
+        "vClass": ["Vehicle", "PlatooningVehicle", None, None, "Vehicle"],
+    }).to_csv(trip_file, index=False)
+
+    s = Simulator(
+        road_length=2 * 1000,
+        ramp_interval=1000,
+        number_of_lanes=2,
+        # the trip file overrides the number of vehicles
+        number_of_vehicles=2,
+        depart_all_lanes=False,
+        penetration_rate=1,
+        max_step=500,
+        random_seed=42,
+        progress=False,
+        record_end_trace=False,
+        record_vehicle_trips=True,
+        result_base_filename=str(tmp_path / "replay"),
+        trip_file=str(trip_file),
+    )
+    s.run()
+
+    # all vehicles of the trip file depart according to the trip file
+    trips = pd.read_csv(tmp_path / "replay_vehicle_trips.csv").set_index("id").sort_index()
+    assert list(trips.index) == [0, 1, 10, 11, 20]
+    assert list(trips.desiredSpeed) == [30, 31, 32, 33, 34]
+    assert list(trips.depart - trips.departDelay) == [0, 0, 4, 4, 30]
+    assert list(trips.departPos - vtype.length) == [0, 1000, 0, 1000, 0]
+    assert list(trips.departLane) == [0, 1, 0, 0, 1]
+    assert list(trips.arrivalPos[[0, 1, 10]]) == [1500, 2000, 1800]
+    assert list(trips.vClass) == ["Vehicle", "PlatooningVehicle", "PlatooningVehicle", "PlatooningVehicle", "Vehicle"]
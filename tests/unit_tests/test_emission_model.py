@@ -17,7 +17,17 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
-from plafosim.emissions import EMISSION_FACTORS, EmissionClass
+import numpy as np
+import pytest
+
+from plafosim.emissions import (
+    EMISSION_FACTORS,
+    POLLUTANTS,
+    EmissionClass,
+    air_drag_change_np,
+    compute_emissions_np,
+)
+from plafosim.platoon_role import PlatoonRole
 
 
 def test_emission_factors():
@@ -29,3 +39,37 @@ def test_emission_factors():
 def test_is_diesel():
     cl = EmissionClass.PC_G_EU4
     assert not cl.is_diesel
+
+
+def test_compute_emissions_np():
+    rng = np.random.RandomState(seed=1337)
+    num_vehicles = 100
+    acceleration = rng.uniform(-2.5, 2.5, num_vehicles)
+    speed = rng.uniform(0, 40, num_vehicles)
+    classes = list(EmissionClass)
+    emission_class = rng.choice([ec.value for ec in classes], num_vehicles)
+    emission_factor = rng.uniform(0.5, 1.0, num_vehicles)
+
+    emissions = compute_emissions_np(acceleration, speed, emission_class, emission_factor, step_length=0.5)
+    assert emissions.shape == (num_vehicles, len(POLLUTANTS))
+
+    for i in range(num_vehicles):
+        ec = EmissionClass(emission_class[i])
+        a = acceleration[i]
+        v = speed[i]
+        for j, pollutant in enumerate(POLLUTANTS):
+            f = ec.emission_factors[pollutant]
+            scale = 3.6
+            if pollutant == "fuel":
+                scale *= 836.0 if ec.is_diesel else 742.0
+            if a < 0:
+                expected = 0
+            else:
+                expected = max((f[0] + f[1] * a * v + f[2] * a * a * v + f[3] * v + f[4] * v * v + f[5] * v * v * v) / scale, 0)
+            assert emissions[i, j] == pytest.approx(expected * emission_factor[i] * 0.5)
+
+
+def test_air_drag_change_np():
+    platoon_role = np.array([role.value for role in [PlatoonRole.NONE, PlatoonRole.LEADER, PlatoonRole.FOLLOWER, PlatoonRole.FOLLOWER, PlatoonRole.JOINER]])
+    is_last = np.array([True, False, False, True, True])
+    assert list(air_drag_change_np(platoon_role, is_last)) == [0, 0.12, 0.27, 0.23, 0]
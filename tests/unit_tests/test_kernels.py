@@ -0,0 +1,86 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import numpy as np
+import pytest
+
+from plafosim.kernels import NUMPY_KERNELS, get_kernels, jit_available
+from plafosim.mobility import is_gap_safe, is_gap_safe_np
+
+num_vehicles = 1000
+
+
+def test_get_kernels():
+    assert get_kernels("numpy") is NUMPY_KERNELS
+    kernels = get_kernels("numba")
+    assert kernels.name == ("numba" if jit_available() else "numpy")
+
+
+def test_numba_kernels_equal_numpy_kernels():
+    pytest.importorskip("numba")
+
+    rng = np.random.RandomState(seed=1337)
+    speed = rng.uniform(0, 40, num_vehicles)
+    predecessor_speed = rng.uniform(0, 40, num_vehicles)
+    max_deceleration = np.full(num_vehicles, 15.0)
+    predecessor_gap = rng.uniform(0, 100, num_vehicles)
+    desired_gap = rng.uniform(2.5, 40, num_vehicles)
+    desired_headway_time = rng.uniform(0.5, 1.5, num_vehicles)
+    acc_lambda = np.full(num_vehicles, 0.1)
+    numba_kernels = get_kernels("numba")
+
+    args = (predecessor_speed, speed, max_deceleration, predecessor_gap, desired_gap, desired_headway_time)
+    assert (numba_kernels.safe_speed(*args) == NUMPY_KERNELS.safe_speed(*args)).all()
+
+    args = (predecessor_speed, speed, acc_lambda, predecessor_gap, desired_gap, desired_headway_time, 1.0)
+    assert (numba_kernels.acc_speed(*args) == NUMPY_KERNELS.acc_speed(*args)).all()
+
+    args = (predecessor_speed, speed - 2.5, speed + 2.5)
+    assert (numba_kernels.clamp_speed(*args) == NUMPY_KERNELS.clamp_speed(*args)).all()
+
+    args = (speed - 50, predecessor_gap)
+    assert (numba_kernels.clip_position(*args) == NUMPY_KERNELS.clip_position(*args)).all()
+    assert (numba_kernels.clip_position(*args) == np.clip(*args[:1], 0, args[1])).all()
+
+
+@pytest.mark.parametrize("name", ["numpy", "numba"])
+def test_is_gap_safe_np(name: str):
+    rng = np.random.RandomState(seed=42)
+    front_position = rng.uniform(50, 100, num_vehicles)
+    front_speed = rng.uniform(0, 40, num_vehicles)
+    back_position = rng.uniform(0, 50, num_vehicles)
+    back_speed = rng.uniform(0, 40, num_vehicles)
+
+    safe = is_gap_safe_np(
+        front_position=front_position,
+        front_speed=front_speed,
+        front_max_deceleration=15.0,
+        front_length=4.0,
+        back_position=back_position,
+        back_speed=back_speed,
+        back_max_acceleration=2.5,
+        back_min_gap=2.5,
+        step_length=1.0,
+        kernels=get_kernels(name),
+    )
+    expected = [
+        is_gap_safe(fp, fs, 15.0, 4.0, bp, bs, 2.5, 2.5, 1.0)
+        for fp, fs, bp, bs in zip(front_position, front_speed, back_position, back_speed)
+    ]
+    assert (safe == np.array(expected)).all()
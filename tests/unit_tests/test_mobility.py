@@ -21,7 +21,20 @@ import numpy as np
 import pandas as pd
 from pytest import fixture
 
-from plafosim.mobility import lane_predecessors
+from plafosim.mobility import (
+    CF_Model,
+    compute_lane_changes_and_speeds_np,
+    compute_lane_changes_and_speeds_platoons_np,
+    compute_new_speeds_np,
+    get_crashed_vehicles,
+    get_crashed_vehicles_np,
+    lane_predecessors,
+    lane_predecessors_np,
+    lane_successors,
+    lane_successors_np,
+    sort_order_np,
+    stack_replications_np,
+)
 
 num_vehicles = 100
 num_lanes = 3
@@ -69,3 +82,178 @@ def test_found_predecessors_are_valid(random_vdf):
         # each vehicle is actually on the lane that is can be a predecessor for
         real_predecessors = predecessors[lane_nr][predecessors[lane_nr] > 0]
         assert (test_vdf.set_index("vid").loc[real_predecessors].lane == lane_nr).all()
+
+
+def test_lane_neighbors_np(random_vdf):
+    test_vdf = random_vdf.sort_values(["position", "lane"], ascending=False).reset_index(drop=True)
+    vids = test_vdf.vid.values
+
+    # translate rows of the NumPy variant to vids
+    predecessors = lane_predecessors_np(test_vdf.lane.values, num_lanes - 1)
+    successors = lane_successors_np(test_vdf.lane.values, num_lanes - 1)
+    assert predecessors.dtype == successors.dtype == np.int32
+    predecessors = np.where(predecessors >= 0, vids[predecessors], -1)
+    successors = np.where(successors >= 0, vids[successors], -1)
+
+    for lane_nr in range(num_lanes):
+        # the closest vehicle in front of/behind each vehicle on the lane
+        on_lane = test_vdf.vid.where(test_vdf.lane == lane_nr)
+        assert (predecessors[:, lane_nr] == on_lane.ffill().shift().fillna(-1).astype(int)).all()
+        assert (successors[:, lane_nr] == on_lane.bfill().shift(-1).fillna(-1).astype(int)).all()
+
+    # the DataFrame variants use vids
+    assert (lane_predecessors(test_vdf.set_index("vid"), num_lanes - 1).values == predecessors).all()
+    assert (lane_successors(test_vdf.set_index("vid"), num_lanes - 1).values == successors).all()
+
+
+def test_lane_neighbors_np_incremental(rng):
+    lane = rng.randint(0, num_lanes, size=num_vehicles)
+    predecessors = lane_predecessors_np(lane, num_lanes - 1)
+    successors = lane_successors_np(lane, num_lanes - 1)
+
+    # no lane changes
+    assert lane_predecessors_np(lane, num_lanes - 1, predecessors, lane) is predecessors
+
+    # some lane changes
+    new_lane = lane.copy()
+    new_lane[rng.randint(0, num_vehicles, size=5)] = 0
+    assert (
+        lane_predecessors_np(new_lane, num_lanes - 1, predecessors, lane)
+        == lane_predecessors_np(new_lane, num_lanes - 1)
+    ).all()
+    assert (
+        lane_successors_np(new_lane, num_lanes - 1, successors, lane)
+        == lane_successors_np(new_lane, num_lanes - 1)
+    ).all()
+
+
+def test_sort_order_np(rng):
+    position = rng.normal(mean_speed, std_speed, num_vehicles)
+    lane = rng.randint(0, num_lanes, size=num_vehicles)
+    # some vehicles next to each other
+    position[:10] = position[10:20]
+    slot = rng.permutation(num_vehicles)
+
+    order = sort_order_np(position, lane, slot)
+    assert (order == np.lexsort((slot, -lane, -position))).all()
+
+    # already sorted
+    position = np.arange(num_vehicles, 0, -1, dtype=float)
+    assert (sort_order_np(position, lane, slot) == np.arange(num_vehicles)).all()
+
+
+def random_vehicles(rng):
+    position = np.sort(rng.uniform(0, 20 * num_vehicles, num_vehicles))[::-1]
+    speed = rng.normal(mean_speed, std_speed, num_vehicles)
+    length = np.full(num_vehicles, 4.0)
+    return {
+        "position": position,
+        "rear_position": position - length,
+        "lane": rng.randint(0, num_lanes, size=num_vehicles),
+        "speed": speed,
+        "cf_model": rng.choice([CF_Model.HUMAN.value, CF_Model.ACC.value], size=num_vehicles),
+        "leader_row": np.full(num_vehicles, -1),
+        "min_gap": np.full(num_vehicles, 2.5),
+        "desired_headway_time": np.full(num_vehicles, 1.0),
+        "acc_lambda": np.full(num_vehicles, 0.1),
+        "max_speed": speed + rng.uniform(0, 5, num_vehicles),
+        "max_acceleration": np.full(num_vehicles, 2.5),
+        "max_deceleration": np.full(num_vehicles, 15.0),
+    }
+
+
+def test_compute_lane_changes_and_speeds_np(rng):
+    vehicles = random_vehicles(rng)
+
+    lane, reason, new_speed = compute_lane_changes_and_speeds_np(vehicles, num_lanes - 1, 1.0)
+    assert ((reason != 0) == (lane != vehicles["lane"])).all()
+
+    # the fused speeds equal the speeds computed behind the predecessors on the new lanes
+    predecessor = lane_predecessors_np(lane, num_lanes - 1)[np.arange(num_vehicles), lane]
+    assert (new_speed == compute_new_speeds_np(vehicles, predecessor, 1.0)).all()
+
+    # stacked candidates equal the individual candidates
+    predecessors = lane_predecessors_np(vehicles["lane"], num_lanes - 1).T
+    stacked_speed = compute_new_speeds_np(vehicles, predecessors, 1.0)
+    for candidate in range(num_lanes):
+        assert (stacked_speed[candidate] == compute_new_speeds_np(vehicles, predecessors[candidate], 1.0)).all()
+
+
+def test_compute_lane_changes_and_speeds_platoons_np(rng):
+    vehicles = random_vehicles(rng)
+
+    # without platoons, both variants are equal
+    for expected, actual in zip(
+        compute_lane_changes_and_speeds_np(vehicles, num_lanes - 1, 1.0),
+        compute_lane_changes_and_speeds_platoons_np(vehicles, num_lanes - 1, 1.0),
+    ):
+        assert (expected == actual).all()
+
+    # vehicles 10 to 12 form a platoon led by vehicle 10
+    vehicles["cf_model"][10] = CF_Model.ACC.value
+    vehicles["cf_model"][11:13] = CF_Model.CACC.value
+    vehicles["leader_row"][11:13] = 10
+    vehicles["lane"][11:13] = vehicles["lane"][10]
+    vehicles["speed"][11:13] = vehicles["speed"][10]
+    # platoons share their limits
+    vehicles["max_speed"][11:13] = vehicles["max_speed"][10]
+    vehicles["rear_position"][10:13] = vehicles["rear_position"][12]
+
+    lane, reason, new_speed = compute_lane_changes_and_speeds_platoons_np(vehicles, num_lanes - 1, 1.0)
+    assert (lane[11:13] == lane[10]).all()
+    assert (reason[11:13] == reason[10]).all()
+    assert (new_speed[11:13] == new_speed[10]).all()
+
+
+def test_compute_lane_changes_and_speeds_np_replications(rng):
+    replications = [random_vehicles(rng) for _ in range(3)]
+    # overlapping roads to provoke neighbors across replications
+    replications[1]["position"] += 5.0
+    replications[1]["rear_position"] += 5.0
+    replications[2]["cf_model"][10] = CF_Model.ACC.value
+    replications[2]["cf_model"][11] = CF_Model.CACC.value
+    replications[2]["leader_row"][11] = 10
+    replications[2]["lane"][11] = replications[2]["lane"][10]
+
+    stacked, offsets = stack_replications_np(replications)
+    assert (stacked["replication"] == np.repeat(np.arange(3), num_vehicles)).all()
+    assert stacked["leader_row"][offsets[2] + 11] == offsets[2] + 10
+
+    # stacked replications equal the individual replications
+    for compute in [compute_lane_changes_and_speeds_np, compute_lane_changes_and_speeds_platoons_np]:
+        results = compute(stacked, num_lanes - 1, 1.0)
+        for vehicles, offset in zip(replications, offsets):
+            for expected, actual in zip(compute(vehicles, num_lanes - 1, 1.0), results):
+                assert (expected == actual[offset:offset + num_vehicles]).all()
+
+
+def test_get_crashed_vehicles_np(rng):
+    # dense traffic to provoke crashes
+    vdf = pd.DataFrame(
+        {
+            "position": rng.uniform(0, 6 * num_vehicles, num_vehicles),
+            "length": np.full(num_vehicles, 4.0),
+            "lane": rng.randint(0, num_lanes, size=num_vehicles),
+        },
+        index=pd.Index(rng.permutation(num_vehicles), name="vid"),
+    )
+    expected = get_crashed_vehicles(vdf)
+    assert expected
+
+    def crashed(vdf: pd.DataFrame) -> list:
+        mask = get_crashed_vehicles_np(
+            vdf.position.values,
+            (vdf.position - vdf.length).values,
+            vdf.lane.values,
+            num_lanes - 1,
+        )
+        return sorted(vdf.index.values[mask])
+
+    # in order
+    assert crashed(vdf.sort_values(["position", "lane"], ascending=False)) == expected
+    # in the order of a previous step
+    previous = vdf.position - rng.uniform(0, 10, num_vehicles)
+    assert crashed(vdf.iloc[np.argsort(-previous.values)]) == expected
+    # without crashes
+    position = np.arange(num_vehicles, 0, -1) * 5.0
+    assert not get_crashed_vehicles_np(position, position - 4.0, vdf.lane.values, num_lanes - 1).any()
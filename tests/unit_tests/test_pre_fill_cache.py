@@ -0,0 +1,82 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import os
+
+import pandas as pd
+
+from plafosim.pre_fill_cache import CACHE_EXTENSION, evict_entries, get_cache_key
+from plafosim.simulator import Simulator
+
+SCENARIO = {
+    "road_length": 10 * 1000,
+    "ramp_interval": 1000,
+    "number_of_vehicles": 50,
+    "pre_fill": True,
+    "penetration_rate": 0.5,
+    "formation_algorithm": "SpeedPosition",
+    "random_seed": 42,
+    "max_step": 60,
+    "progress": False,
+    "record_end_trace": False,
+    "record_vehicle_trips": True,
+}
+
+
+def test_get_cache_key():
+    key = get_cache_key({"road_length": 1000, "random_seed": 42, "result_base_filename": "a", "record_vehicle_trips": True})
+    # parameters that do not influence the pre-filled vehicles are ignored
+    assert key == get_cache_key({"road_length": 1000, "random_seed": 42, "result_base_filename": "b", "record_vehicle_trips": False})
+    assert key != get_cache_key({"road_length": 1000, "random_seed": 43, "result_base_filename": "a", "record_vehicle_trips": True})
+    assert key != get_cache_key({"road_length": 1000, "random_seed": 42, "result_base_filename": "a", "record_prefilled": True})
+
+
+def test_cached_pre_fill_equals_generated_pre_fill(tmp_path):
+    cache = str(tmp_path / "cache")
+    generated = Simulator(result_base_filename=str(tmp_path / "generated"), **SCENARIO)
+    stored = Simulator(result_base_filename=str(tmp_path / "stored"), pre_fill_cache=cache, **SCENARIO)
+    assert len(os.listdir(cache)) == 1
+    loaded = Simulator(result_base_filename=str(tmp_path / "loaded"), pre_fill_cache=cache, **SCENARIO)
+    assert len(os.listdir(cache)) == 1
+
+    for s in [stored, loaded]:
+        assert s._rng.getstate() == generated._rng.getstate()
+        assert s._last_vehicle_id == generated._last_vehicle_id
+        assert s._number_of_prefilled_vehicles == generated._number_of_prefilled_vehicles
+        assert all(v._simulator is s for v in s._vehicles.values())
+        pd.testing.assert_frame_equal(s._get_vehicles_df(), generated._get_vehicles_df())
+
+    for s in [generated, loaded]:
+        s.run()
+    pd.testing.assert_frame_equal(
+        pd.read_csv(tmp_path / "loaded_vehicle_trips.csv"),
+        pd.read_csv(tmp_path / "generated_vehicle_trips.csv"),
+    )
+
+
+def test_evict_entries(tmp_path):
+    for index in range(3):
+        path = tmp_path / f"{index}{CACHE_EXTENSION}"
+        path.write_bytes(b"0" * 100)
+        os.utime(path, (index, index))
+    (tmp_path / "other").write_bytes(b"0" * 100)
+
+    evict_entries(str(tmp_path), max_size=250)
+    # the least recently used entry is removed
+    assert sorted(os.listdir(tmp_path)) == [f"1{CACHE_EXTENSION}", f"2{CACHE_EXTENSION}", "other"]
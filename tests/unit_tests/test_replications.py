@@ -0,0 +1,93 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import sys
+
+import pandas as pd
+import pytest
+
+from plafosim.cli import plafosim
+from plafosim.replications import Replications
+from plafosim.simulator import Simulator
+
+SCENARIO = {
+    "road_length": 10 * 1000,
+    "ramp_interval": 1000,
+    "number_of_vehicles": 100,
+    "depart_method": "rate",
+    "depart_rate": 3600,
+    "random_depart_position": True,
+    "depart_desired": True,
+    "random_arrival_position": True,
+    "penetration_rate": 0.5,
+    "formation_algorithm": "SpeedPosition",
+    "max_step": 60,
+    "progress": False,
+    "record_end_trace": False,
+    "record_vehicle_trips": True,
+}
+
+
+def test_replications_equal_individual_runs(tmp_path):
+    replications = Replications(
+        2,
+        random_seed=42,
+        result_base_filename=str(tmp_path / "batch"),
+        **SCENARIO,
+    )
+    assert replications.random_seeds == [42, 43]
+    assert replications.run() == SCENARIO["max_step"]
+
+    for seed, batched in zip(replications.random_seeds, replications.simulators):
+        assert batched._result_base_filename == str(tmp_path / f"batch_seed{seed}")
+        s = Simulator(
+            random_seed=seed,
+            result_base_filename=str(tmp_path / f"single_seed{seed}"),
+            **SCENARIO,
+        )
+        s.run()
+
+        assert batched._vehicles.keys() == s._vehicles.keys()
+        pd.testing.assert_frame_equal(batched._get_vehicles_df(), s._get_vehicles_df(), check_exact=True)
+        assert batched._avg_vehicle_speed == s._avg_vehicle_speed
+        assert (tmp_path / f"batch_seed{seed}_vehicle_trips.csv").read_text() == (tmp_path / f"single_seed{seed}_vehicle_trips.csv").read_text()
+
+
+def test_replications_without_gui():
+    with pytest.raises(SystemExit):
+        Replications(2, gui=True)
+
+
+@pytest.mark.parametrize(
+    "argv, message",
+    [
+        (["--replications", "0"], "The number of replications needs to be at least 1!"),
+        (["--replications", "2", "--save-snapshot", "snapshot.pickle"], "Snapshots are not supported with replications!"),
+        (["--replications", "2", "--load-snapshot", "snapshot.pickle"], "Snapshots are not supported with replications!"),
+    ],
+)
+def test_replications_invalid_arguments(argv: list, message: str, monkeypatch):
+    # reject the arguments before creating any simulation
+    monkeypatch.setattr(plafosim, "create_simulator", None)
+    monkeypatch.setattr(plafosim, "create_replications", None)
+    monkeypatch.setattr(plafosim, "load_snapshot", None)
+    monkeypatch.setattr(sys, "argv", ["plafosim"] + argv)
+    with pytest.raises(SystemExit) as pytest_wrapped_e:
+        plafosim.main()
+    assert pytest_wrapped_e.value.code == f"ERROR [plafosim.cli.plafosim]: {message}"
@@ -17,6 +17,10 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+import pandas as pd
+import pytest
+
+from plafosim.platooning_vehicle import PlatooningVehicle
 from plafosim.simulator import Simulator, vtype
 
 
@@ -184,3 +188,142 @@ class TestSimulator:
         assert self.s._get_predecessor_speed(self.s._vehicles[2]) == self.s._vehicles[1].speed
 
         # we are skipping more complex scenarios, since they are handled by test_predecessor
+
+
+def test_mobility_backends(tmp_path):
+    """
+    The NumPy (with and without JIT compiled kernels) and the pandas mobility backends produce identical results.
+    """
+
+    simulators = {}
+    for name, backend, jit_kernels in [("pandas", "pandas", False), ("numpy", "numpy", False), ("numba", "numpy", True)]:
+        s = Simulator(
+            road_length=10 * 1000,
+            ramp_interval=1000,
+            number_of_vehicles=100,
+            depart_method="rate",
+            depart_rate=3600,
+            random_depart_position=True,
+            depart_desired=True,
+            random_arrival_position=True,
+            penetration_rate=0.5,
+            formation_algorithm="SpeedPosition",
+            max_step=120,
+            random_seed=42,
+            progress=False,
+            record_end_trace=False,
+            mobility_backend=backend,
+            jit_kernels=jit_kernels,
+            result_base_filename=str(tmp_path / name),
+        )
+        s.run()
+        simulators[name] = s
+
+    for name in ["numpy", "numba"]:
+        assert simulators[name]._vehicles.keys() == simulators["pandas"]._vehicles.keys()
+        pd.testing.assert_frame_equal(
+            simulators[name]._get_vehicles_df(),
+            simulators["pandas"]._get_vehicles_df(),
+            check_exact=True,
+        )
+        assert simulators[name]._avg_vehicle_speed == simulators["pandas"]._avg_vehicle_speed
+
+
+def test_vehicle_action_scheduling(tmp_path, monkeypatch):
+    """
+    Vehicles are only triggered at their first step and whenever their next action (here: the formation) is due.
+    """
+
+    triggered = {}
+    action = PlatooningVehicle.action
+
+    def record_action(vehicle, step):
+        triggered.setdefault(vehicle.vid, []).append(step)
+        action(vehicle, step)
+
+    monkeypatch.setattr(PlatooningVehicle, "action", record_action)
+
+    s = Simulator(
+        road_length=10 * 1000,
+        number_of_vehicles=50,
+        pre_fill=True,
+        penetration_rate=1.0,
+        formation_algorithm="SpeedPosition",
+        execution_interval=10,
+        delay_teleports=False,
+        max_step=60,
+        random_seed=42,
+        progress=False,
+        record_end_trace=False,
+        result_base_filename=str(tmp_path / "scheduling"),
+    )
+    s.run()
+
+    assert triggered
+    for vid, steps in triggered.items():
+        assert all(later - earlier >= 10 for earlier, later in zip(steps, steps[1:]))
+
+
+def test_pre_fill(tmp_path):
+    """
+    Pre-filled vehicles do not overlap and pre-filling fails fast if the vehicles do not fit on the road.
+    """
+
+    s = Simulator(
+        road_length=10 * 1000,
+        number_of_lanes=2,
+        number_of_vehicles=200,
+        pre_fill=True,
+        random_seed=42,
+        progress=False,
+        result_base_filename=str(tmp_path / "pre_fill"),
+    )
+    assert len(s._vehicles) == 200
+    for lane in range(2):
+        positions = sorted(v.position for v in s._vehicles.values() if v.lane == lane)
+        assert all(front - back > vtype.length + vtype.min_gap for back, front in zip(positions, positions[1:]))
+
+    # too many vehicles for the road
+    with pytest.raises(SystemExit):
+        Simulator(
+            road_length=1000,
+            number_of_lanes=1,
+            number_of_vehicles=200,
+            pre_fill=True,
+            progress=False,
+            result_base_filename=str(tmp_path / "pre_fill_full"),
+        )
+
+    # too many vehicles for the (random) placement with the desired gaps
+    with pytest.raises(SystemExit):
+        Simulator(
+            road_length=1000,
+            number_of_lanes=1,
+            number_of_vehicles=100,
+            pre_fill=True,
+            progress=False,
+            result_base_filename=str(tmp_path / "pre_fill_full"),
+        )
+
+
+def test_time_loss_format(tmp_path):
+    Simulator(
+        road_length=5 * 1000,
+        number_of_vehicles=20,
+        depart_method="interval",
+        depart_interval=2,
+        desired_speed=25,
+        random_desired_speed=False,
+        depart_desired=True,
+        max_step=500,
+        random_seed=5,
+        progress=False,
+        record_end_trace=False,
+        record_vehicle_trips=True,
+        result_base_filename=str(tmp_path / "time_loss"),
+    ).run()
+
+    # no time loss is written as 0 (i.e., an int)
+    time_loss = pd.read_csv(tmp_path / "time_loss_vehicle_trips.csv", dtype=str).timeLoss
+    assert (time_loss == "0").any()
+    assert not (time_loss == "0.0").any()
@@ -19,10 +19,18 @@
 
 import random
 
+import numpy as np
 import pandas as pd
+import pytest
 
 from plafosim.simulator import compute_vehicle_spawns, vtype
-from plafosim.spawning import get_arrival_position, get_depart_speed, get_desired_speed
+from plafosim.spawning import (
+    SpawnQueue,
+    get_arrival_position,
+    get_depart_speed,
+    get_desired_speed,
+    get_free_intervals_np,
+)
 
 
 def test_single_ramp_empty_road():
@@ -727,6 +735,62 @@ def test_rear_blocking_vehicle():
     assert not_spawned_vehicles[0]["vid"] == vid
 
 
+def test_first_lane_blocked():
+    """
+    Two vehicles should be inserted into a road with a single ramp and two lanes, where the first lane is blocked by another vehicle.
+    Only one (i.e., the first) vehicle can be inserted on the second lane, if all lanes can be used for departure.
+    """
+
+    road_length = 1000
+    ramp_interval = 1000
+    ramp_positions = list(range(0, road_length + 1, ramp_interval))
+    current_step = 0
+    trip_length = road_length
+
+    # the vehicles in the simulation as arrays
+    vdf = {
+        "position": np.array([10.0]),
+        "lane": np.array([0]),
+        "speed": np.array([36.0]),
+        "length": np.array([vtype.length]),
+        "max_deceleration": np.array([vtype.max_deceleration]),
+    }
+    new_vehicles = [
+        {
+            "vid": vid,
+            "desired_speed": 36,
+            "depart_speed": 36,
+            "schedule_time": current_step,
+            "min_trip_length": trip_length,
+            "max_trip_length": trip_length,
+        }
+        for vid in [1, 2]
+    ]
+
+    for depart_all_lanes in [False, True]:
+        spawned_vehicles_df, not_spawned_vehicles = compute_vehicle_spawns(
+            vehicles=list(new_vehicles),
+            vdf=vdf,
+            ramp_positions=ramp_positions,
+            number_of_lanes=2,
+            current_step=current_step,
+            rng=random,
+            random_depart_position=False,
+            random_arrival_position=False,
+            depart_all_lanes=depart_all_lanes,
+        )
+
+        if depart_all_lanes:
+            # the first vehicle could be inserted on the second lane
+            assert list(spawned_vehicles_df.vid) == [1]
+            assert spawned_vehicles_df.iloc[0].lane == 1
+            assert [v["vid"] for v in not_spawned_vehicles] == [2]
+        else:
+            # no vehicle could be inserted
+            assert spawned_vehicles_df.empty
+            assert [v["vid"] for v in not_spawned_vehicles] == [1, 2]
+
+
 def test_single_trip_lengths():
     """
     A single vehicle should be inserted with a random trip.
@@ -932,3 +996,76 @@ def test_get_depart_speed():
         random_depart_speed=True,
     )
     assert s == 36
+
+
+def test_spawn_queue():
+    queue = SpawnQueue()
+    assert len(queue) == 0
+    assert list(queue) == []
+
+    # vehicles are not necessarily added in order
+    for vid, schedule_time in [(3, 1), (1, 0), (2, 1), (0, 0), (4, 2)]:
+        queue.push({'vid': vid, 'schedule_time': schedule_time})
+    assert len(queue) == 5
+    assert 3 in queue
+    assert [v['vid'] for v in queue] == [0, 1, 2, 3, 4]
+
+    assert queue.remove(2) == {'vid': 2, 'schedule_time': 1}
+    assert queue.remove(4) == {'vid': 4, 'schedule_time': 2}
+    assert len(queue) == 3
+    assert 2 not in queue
+    assert [v['vid'] for v in queue] == [0, 1, 3]
+    assert repr(queue) == repr(list(queue))
+
+    # every vehicle can only be queued once
+    with pytest.raises(AssertionError):
+        queue.push({'vid': 0, 'schedule_time': 5})
+
+
+def test_get_free_intervals_np():
+    kwargs = {
+        'length': np.full(2, vtype.length),
+        'min_gap': np.full(2, vtype.min_gap),
+        'speed': np.zeros(2),
+        'max_acceleration': np.full(2, vtype.max_acceleration),
+        'max_deceleration': np.full(2, vtype.max_deceleration),
+        'desired_headway_time': np.full(2, vtype.headway_time),
+        'depart_speed': 0,
+        'vtype': vtype,
+        'road_length': 1000,
+        'step_length': 1,
+    }
+
+    # empty lane
+    empty = {key: value[:0] if isinstance(value, np.ndarray) else value for key, value in kwargs.items()}
+    start, end = get_free_intervals_np(position=np.array([]), **empty)
+    assert list(start) == [vtype.length]
+    assert list(end) == [999]
+
+    # two standing vehicles
+    start, end = get_free_intervals_np(position=np.array([100.0, 200.0]), **kwargs)
+    # the vehicle behind could accelerate and the vehicle in front could decelerate within the next step
+    lower = upper = vtype.length + vtype.min_gap + vtype.max_acceleration + vtype.max_deceleration
+    assert list(start) == [vtype.length, 100 + lower, 200 + lower]
+    assert list(end) == [100 - upper, 200 - upper, 999]
+
+    # no space between the two vehicles
+    start, end = get_free_intervals_np(position=np.array([100.0, 120.0]), **kwargs)
+    assert list(start) == [vtype.length, 120 + lower]
+    assert list(end) == [100 - upper, 999]
+
+
+def test_get_arrival_position_quantile():
+    kwargs = {
+        'depart_position': 0,
+        'road_length': 10000,
+        'ramp_interval': 1000,
+        'min_trip_length': 2000,
+        'max_trip_length': 5000,
+        'rng': None,
+        'random_arrival_position': True,
+    }
+    # the arrival ramps between the minimum and maximum trip length are chosen uniformly
+    assert get_arrival_position(quantile=0, **kwargs) == 2000
+    assert get_arrival_position(quantile=0.25, **kwargs) == 3000
+    assert get_arrival_position(quantile=0.99, **kwargs) == 5000
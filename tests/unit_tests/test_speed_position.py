@@ -0,0 +1,214 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from plafosim.algorithms import speed_position
+from plafosim.algorithms.speed_position import get_components, solve_assignment_problem
+from plafosim.platooning_vehicle import PlatooningVehicle
+from plafosim.simulator import Simulator
+
+
+@pytest.fixture
+def algorithm():
+    s = Simulator(
+        road_length=20 * 1000,
+        number_of_vehicles=200,
+        pre_fill=True,
+        penetration_rate=0.8,
+        formation_algorithm="SpeedPosition",
+        formation_strategy="centralized",
+        number_of_infrastructures=1,
+        random_seed=42,
+        progress=False,
+        record_end_trace=False,
+    )
+    return s._infrastructures[0]._formation_algorithm
+
+
+def test_find_candidates(algorithm):
+    searching_vehicles, available_vehicles = algorithm._get_formation_vehicles()
+    assert searching_vehicles
+
+    # all pairs of searching vehicles and available platoons
+    expected = []
+    for vehicle in searching_vehicles:
+        for other_vehicle in available_vehicles:
+            platoon = other_vehicle.platoon
+            if other_vehicle is vehicle or vehicle.position > platoon.rear_position:
+                continue
+            ds = algorithm.ds(vehicle, platoon)
+            dp = algorithm.dp(vehicle, platoon)
+            if ds > 1.0 or dp > 1.0:
+                continue
+            expected.append((vehicle.vid, platoon.platoon_id, platoon.leader.vid, algorithm.cost_speed_position(ds, dp)))
+    assert expected
+
+    candidates = algorithm._find_candidates(searching_vehicles, available_vehicles)
+    found = list(zip(candidates['vid'].tolist(), candidates['pid'].tolist(), candidates['lid'].tolist(), candidates['cost'].tolist()))
+    assert found == expected
+    assert sum(vehicle._candidates_found for vehicle in searching_vehicles) == len(expected)
+
+    # driving individually is an additional candidate of every searching vehicle
+    candidates = algorithm._find_candidates(searching_vehicles, available_vehicles, self_cost=1)
+    assert len(candidates['cost']) == len(expected) + len(searching_vehicles)
+    own = candidates['vid'] == candidates['lid']
+    assert sorted(candidates['vid'][own].tolist()) == sorted(vehicle.vid for vehicle in searching_vehicles)
+    assert (candidates['cost'][own] == 1).all()
+
+
+def test_do_formation_centralized(algorithm, monkeypatch):
+    searching_vehicles, available_vehicles = algorithm._get_formation_vehicles()
+    candidates = algorithm._find_candidates(searching_vehicles, available_vehicles)
+    matches = [
+        {'vid': vid, 'pid': pid, 'lid': lid, 'cost': cost, 'index': index}
+        for index, (vid, pid, lid, cost) in enumerate(
+            zip(candidates['vid'].tolist(), candidates['pid'].tolist(), candidates['lid'].tolist(), candidates['cost'].tolist())
+        )
+    ]
+
+    # filter the whole list of possible matches for every searching vehicle
+    expected = []
+    busy = set()
+    for v in set(candidates['vid'].tolist()):
+        found_candidates = [x for x in matches if x['vid'] == v and v not in busy and x['lid'] not in busy]
+        if not found_candidates:
+            continue
+        best = min(found_candidates, key=lambda x: (x['cost'], x['index']))
+        expected.append((v, best['pid'], best['lid']))
+        busy.update([v, best['lid']])
+    # some vehicles do not have any candidates left
+    assert expected
+    assert len(expected) < len(set(candidates['vid'].tolist()))
+
+    joins = []
+    monkeypatch.setattr(PlatooningVehicle, "_join", lambda self, pid, lid: joins.append((self.vid, pid, lid)))
+    algorithm._do_formation_centralized()
+    assert joins == expected
+
+
+def test_get_components():
+    vids = np.array([1, 1, 2, 3, 3, 5, 6])
+    lids = np.array([1, 4, 2, 3, 5, 5, 6])
+    # the self-assignments do not connect vehicles
+    assert list(get_components(vids, lids)) == [0, 0, 1, 2, 2, 2, 3]
+
+
+@pytest.mark.parametrize("debug", [False, True])
+def test_solve_assignment_problem(debug: bool, capsys):
+    pytest.importorskip("ortools")
+    # vehicles 1 and 2 can join each other, vehicle 3 can join vehicle 2
+    result = solve_assignment_problem(
+        name="test",
+        vids=[1, 1, 2, 2, 3, 3],
+        pids=[1, 2, 1, 2, 2, 3],
+        lids=[1, 2, 1, 2, 2, 3],
+        costs=[1, 0.2, 0.5, 1, 0.1, 1],
+        time_limit=0,
+        debug=debug,
+    )
+    # the cost and assignment matrices
+    assert capsys.readouterr().out.count("(lid)") == (2 if debug else 0)
+    assert result['result_status'] == 0
+    assert result['variables'] == 6
+    # one row per searching vehicle and two per leader
+    assert result['constraints'] == 3 + 2 * 3
+    # vehicle 2 cannot join anyone when vehicle 3 joins it
+    assert result['assignments'] == [0, 3, 4]
+    assert result['solution_value'] == pytest.approx(2.1)
+
+
+def test_solver_decomposition(tmp_path):
+    pytest.importorskip("ortools")
+    traces = {}
+    for solver_decomposition in [True, False]:
+        basename = str(tmp_path / str(solver_decomposition))
+        Simulator(
+            road_length=20 * 1000,
+            number_of_vehicles=100,
+            pre_fill=True,
+            formation_algorithm="SpeedPosition",
+            formation_strategy="centralized",
+            formation_centralized_kind="optimal",
+            solver_decomposition=solver_decomposition,
+            number_of_infrastructures=1,
+            execution_interval=10,
+            max_step=30,
+            random_seed=42,
+            progress=False,
+            record_end_trace=False,
+            record_solver_traces=True,
+            result_base_filename=basename,
+        ).run()
+        traces[solver_decomposition] = pd.read_csv(f"{basename}_solver_traces.csv")
+
+    # the separate problems are as big and as good as the single problem
+    assert len(traces[True]) == 2
+    assert list(traces[True].numVariables) == list(traces[False].numVariables)
+    assert list(traces[True].numConstraints) == list(traces[False].numConstraints)
+    assert np.allclose(traces[True].solutionValue, traces[False].solutionValue)
+
+
+def test_solver_workers(tmp_path, monkeypatch):
+    pytest.importorskip("ortools")
+    pools = []
+    calls = []
+
+    class Pool(speed_position.ProcessPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            pools.append(self)
+
+        def map(self, *args, **kwargs):
+            calls.append(None)
+            return super().map(*args, **kwargs)
+
+    monkeypatch.setattr(speed_position, "ProcessPoolExecutor", Pool)
+
+    formation = {}
+    for solver_workers in [1, 2]:
+        basename = str(tmp_path / str(solver_workers))
+        s = Simulator(
+            road_length=20 * 1000,
+            number_of_vehicles=100,
+            pre_fill=True,
+            formation_algorithm="SpeedPosition",
+            formation_strategy="centralized",
+            formation_centralized_kind="optimal",
+            position_deviation_threshold=300,
+            solver_workers=solver_workers,
+            number_of_infrastructures=1,
+            execution_interval=5,
+            max_step=30,
+            random_seed=42,
+            progress=False,
+            record_end_trace=False,
+            record_platoon_formation=True,
+            result_base_filename=basename,
+        )
+        s.run()
+        assert s._infrastructures[0]._formation_algorithm._solver_pool is None
+        formation[solver_workers] = pd.read_csv(f"{basename}_vehicle_platoon_formation.csv")
+
+    # the processes are created once and re-used for all formation iterations
+    assert len(pools) == 1
+    assert len(calls) > 1
+    pd.testing.assert_frame_equal(formation[1], formation[2])
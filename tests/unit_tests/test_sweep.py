@@ -0,0 +1,117 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from unittest import mock
+
+import pandas as pd
+import pytest
+
+from plafosim.cli import sweep
+from plafosim.cli.sweep import expand_sweep, run_simulation, write_index
+from plafosim.simulator import Simulator
+
+
+def test_expand_sweep():
+    sweep = {
+        "options": {"--road-length": 10, "--pre-fill": True},
+        "grid": {"--penetration": [0.5, 1.0], "--formation-strategy": ["distributed", "centralized"]},
+        "runs": [{"--lanes": 2}, {"--lanes": 3}],
+        "repetitions": 2,
+    }
+    runs = expand_sweep(sweep, random_seed=42, result_base_filename="results")
+
+    assert len(runs) == 2 * 2 * 2 * 2
+    assert [run["index"] for run in runs] == [index for index in range(8) for _ in range(2)]
+    # all combinations use the same seeds
+    assert [run["random_seed"] for run in runs] == [42, 43] * 8
+    assert len({run["result_base_filename"] for run in runs}) == len(runs)
+    assert runs[0]["options"] == {
+        "--road-length": 10,
+        "--pre-fill": True,
+        "--lanes": 2,
+        "--penetration": 0.5,
+        "--formation-strategy": "distributed",
+    }
+    assert runs[3]["argv"] == [
+        "--progress", "false",
+        "--road-length", "10",
+        "--pre-fill", "true",
+        "--lanes", "2",
+        "--penetration", "0.5",
+        "--formation-strategy", "centralized",
+        "--random-seed", "43",
+        "--result-base-filename", "results_run1_seed43",
+    ]
+
+
+def test_expand_sweep_reserved_option():
+    with pytest.raises(SystemExit):
+        expand_sweep({"grid": {"--random-seed": [1, 2]}}, random_seed=42, result_base_filename="results")
+
+
+def test_write_index(tmp_path):
+    runs = expand_sweep(
+        {"grid": {"--trip-file": ['a "quoted", value', "two\nlines"]}},
+        random_seed=42,
+        result_base_filename="results",
+    )
+    filename = tmp_path / "results_sweep.csv"
+    write_index(str(filename), runs)
+
+    index = pd.read_csv(filename)
+    assert list(index.run) == [0, 1]
+    assert list(index.random_seed) == [42, 42]
+    assert list(index.options) == [" ".join(run["argv"]) for run in runs]
+
+
+def test_run_simulation(tmp_path):
+    runs = expand_sweep(
+        {"options": {"--road-length": 10, "--vehicles": 10, "--time-limit": 0.01, "--record-vehicle-trips": True}},
+        random_seed=42,
+        result_base_filename=str(tmp_path / "results"),
+    )
+    steps, run_time, error = run_simulation(runs[0]["argv"])
+    assert error is None
+    assert steps == 36
+    assert (tmp_path / "results_run0_seed42_vehicle_trips.csv").exists()
+
+    # errors do not tear down the worker
+    steps, run_time, error = run_simulation(["--progress", "false", "--mobility-backend", "pandas", "--rigid-platoons", "true"])
+    assert error.startswith("SystemExit")
+
+
+def _run_log_level(argv: list) -> int:
+    # return the log level during the simulation instead of running it
+    with mock.patch.object(Simulator, "run", lambda self: logging.getLogger().getEffectiveLevel()):
+        return run_simulation(argv)[0]
+
+
+def test_run_simulation_log_level(monkeypatch):
+    monkeypatch.setattr(sweep.LOG, "handlers", [])
+    monkeypatch.setattr(sweep.LOG, "propagate", True)
+    sweep.configure_logging("DEBUG")
+
+    argv = ["--road-length", "10", "--vehicles", "10", "--progress", "false"]
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        # the runs in the same worker use their own log level instead of the one of the sweep
+        assert pool.submit(_run_log_level, argv).result() == logging.WARNING
+        assert pool.submit(_run_log_level, argv + ["--verbosity", "--verbosity"]).result() == logging.DEBUG
+        assert pool.submit(_run_log_level, argv + ["--quiet"]).result() == logging.ERROR
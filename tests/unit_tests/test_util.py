@@ -17,9 +17,13 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 #
 
+from plafosim.platoon import Platoon
+from plafosim.platooning_vehicle import PlatooningVehicle
 from plafosim.util import (
     acceleration2speed,
     distance2speed,
+    get_slots,
+    slots2dict,
     speed2acceleration,
     speed2distance,
 )
@@ -43,3 +47,19 @@ def test_acceleration2speed():
 def test_speed2acceleration():
     assert speed2acceleration(36.0, 24.0) == -12.0
     assert speed2acceleration(32.0, 42.0, 10) == 1.0
+
+
+def test_get_slots():
+    slots = get_slots(PlatooningVehicle)
+    assert slots[0] == "_simulator"  # slots of the base class first
+    assert "_joiner" in slots
+    assert len(slots) == len(set(slots))
+
+
+def test_slots2dict():
+    platoon = Platoon.__new__(Platoon)
+    assert not hasattr(platoon, "__dict__")
+    platoon._platoon_id = 0
+    platoon._desired_speed = 36.0
+    # unset slots are skipped
+    assert slots2dict(platoon) == {"_platoon_id": 0, "_desired_speed": 36.0}
@@ -0,0 +1,153 @@
+#
+# Copyright (c) 2020-2025 Julian Heinovski <heinovski@ccs-labs.org>
+#
+# SPDX-License-Identifier: GPL-3.0-or-later
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+import numpy as np
+
+from plafosim.mobility import HIGHVAL, CF_Model
+from plafosim.platoon_role import PlatoonRole
+from plafosim.simulator import Simulator, vtype
+from plafosim.vehicle_state import NeighborIndex, VehicleState
+
+
+def test_add_remove():
+    state = VehicleState(capacity=2)
+
+    assert len(state) == 0
+    slot_1 = state.add(1, position=100, speed=36)
+    slot_2 = state.add(2, position=50)
+    assert len(state) == 2
+    assert 1 in state and 2 in state
+    assert state.columns["position"][slot_1] == 100
+    assert state.columns["speed"][slot_1] == 36
+    assert state.columns["platoon_max_speed"][slot_2] == HIGHVAL
+
+    # grow beyond the initial capacity
+    slot_3 = state.add(3, position=10)
+    assert len(state) == 3
+    assert state.columns["position"][slot_1] == 100
+    assert list(state.slots_of(np.array([3, 1, 2]))) == [slot_3, slot_1, slot_2]
+
+    # re-use slots of removed vehicles
+    state.remove(2)
+    assert 2 not in state
+    assert list(state.active_slots()) == sorted([slot_1, slot_3])
+    slot_4 = state.add(4)
+    assert slot_4 == slot_2
+    assert state.columns["position"][slot_4] == 0
+
+
+def test_vehicle_views():
+    s = Simulator()
+    s._penetration_rate = 1
+    v1 = s._add_vehicle(1, vtype, 100, 1000, 36, 0, 30, 0)
+    v2 = s._add_vehicle(2, vtype, 50, 1000, 36, 1, 20, 0)
+
+    assert v1._state is v2._state is s._vehicle_state
+    # writes to the vehicle are visible in the store
+    v1._position = 120
+    v1._cf_model = CF_Model.HUMAN
+    v2._platoon_role = PlatoonRole.JOINER
+    columns = s._vehicle_state.columns
+    assert columns["position"][v1._slot] == 120
+    assert columns["cf_model"][v1._slot] == CF_Model.HUMAN.value
+    assert v2._platoon_role is PlatoonRole.JOINER
+
+    # writes to the store are visible in the vehicle
+    columns["speed"][v2._slot] = 25
+    assert v2.speed == 25
+
+    vdf = s._get_vehicles_df()
+    assert list(vdf.index) == [1, 2]
+    assert vdf.loc[1, "position"] == 120
+    assert vdf.loc[2, "speed"] == 25
+    assert vdf.loc[1, "rear_position"] == 120 - vtype.length
+    assert vdf.loc[2, "leader_id"] == 2
+
+    # removed vehicles keep their last state
+    s._vehicles[1]._detach_state()
+    del s._vehicles[1]
+    assert 1 not in s._vehicle_state
+    assert v1.position == 120
+    assert list(s._get_vehicles_df().index) == [2]
+
+
+def test_counters():
+    s = Simulator(record_prefilled=True)
+    s._penetration_rate = 1
+    v1 = s._add_vehicle(1, vtype, 100, 1000, 36, 0, 30, 0)
+    v2 = s._add_vehicle(2, vtype, 50, 1000, 36, 1, 20, -1)  # pre-filled
+    s._record_prefilled = False
+    v3 = s._add_vehicle(3, vtype, 20, 1000, 36, 2, 20, -1)  # pre-filled, not recorded
+
+    assert v1._joins_attempted == 0
+    for vehicle in [v1, v2, v3]:
+        vehicle._joins_attempted += 1
+        vehicle._candidates_found += 2
+    columns = s._vehicle_state.columns
+    assert columns["joins_attempted"][v1._slot] == 1
+    assert columns["candidates_found"][v2._slot] == 2
+
+    totals = s.counter_totals
+    assert totals["joins_attempted"] == 2
+    assert totals["candidates_found"] == 4
+    assert totals["leaves_attempted"] == 0
+
+    # totals include arrived vehicles
+    s._record_counters(np.array([v1._slot]))
+    s._vehicles[1]._detach_state()
+    del s._vehicles[1]
+    assert v1._joins_attempted == 1
+    assert s.counter_totals == totals
+
+
+def test_neighbor_index():
+    s = Simulator(communication_range=100)
+    s._penetration_rate = 1
+    v1 = s._add_vehicle(1, vtype, 300, 1000, 36, 0, 30, 0)
+    v2 = s._add_vehicle(2, vtype, 100, 1000, 36, 1, 20, 0)
+    v3 = s._add_vehicle(3, vtype, 200, 1000, 36, 2, 20, 0)
+    s._penetration_rate = 0
+    s._add_vehicle(4, vtype, 150, 1000, 36, 0, 20, 0)  # not capable of platooning
+
+    index = s._get_neighbor_index()
+    assert isinstance(index, NeighborIndex)
+    assert s._get_neighbor_index() is index
+    assert len(index) == 3
+    columns = s._vehicle_state.columns
+    # the vehicles are returned in the order in which they were added
+    assert list(columns["vid"][index.all_slots()]) == [1, 2, 3]
+    assert list(columns["vid"][index.within(200, 100)]) == [1, 2, 3]
+    assert list(columns["vid"][index.within(250, 50)]) == [1, 3]
+    assert list(columns["vid"][index.within(120, 10)]) == []
+
+    # roles and maneuvers are always up to date
+    v2._platoon_role = PlatoonRole.FOLLOWER
+    v3.in_maneuver = True
+    slots = index.all_slots()
+    assert list(index.available(slots)) == [True, False, True]
+    assert list(index.in_maneuver(slots)) == [False, False, True]
+
+    # vehicles find platoons within their communication range
+    v3.in_maneuver = False
+    assert [p.leader.vid for p in v3._get_available_platoons()] == [1]
+    assert v3._candidates_filtered_follower == 1
+
+    # the index is rebuilt after positions changed
+    v1._teleport(120, 0, 30)
+    assert s._get_neighbor_index() is not index
+    assert list(columns["vid"][s._get_neighbor_index().within(120, 10)]) == [1]